@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the log processing pipeline on synthetic data.
+Reports wall time and peak traced memory for each benchmarked stage,
+and the start-up time of the command line interface.
+"""
+
+import argparse
+import datetime
+import gc
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sample_logs import generate_log_file
+from src.ingestion import load_multiple_logs
+from src.processing import logs_to_dataframe, preprocess_dataframe, enrich_data, process_logs
+
+def generate_data(directory, num_files, entries_per_file):
+    """Generate synthetic log files into a directory."""
+    start_date = datetime.datetime(2024, 1, 1)
+    for i in range(1, num_files + 1):
+        generate_log_file(directory / f"server_{i}.log", entries_per_file,
+                          start_date + datetime.timedelta(hours=i))
+
+def legacy_pipeline(log_dir):
+    """Run the original list -> DataFrame -> preprocess -> enrich pipeline."""
+    logs = list(load_multiple_logs(log_dir))
+    df = logs_to_dataframe(logs)
+    df = preprocess_dataframe(df)
+    return enrich_data(df)
+
+def fused_pipeline(log_dir):
+    """Run the single-pass processing pipeline."""
+    return process_logs(load_multiple_logs(log_dir))
+
+def measure(func, *args):
+    """Return (seconds, peak bytes) for a call, timing and tracing separately."""
+    gc.collect()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def measure_command(args, repeat=5):
+    """Return the best wall time of running the CLI with the given arguments."""
+    root = Path(__file__).resolve().parent.parent
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "src.main", *args], cwd=root, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the log processing pipeline.')
+    parser.add_argument('--files', type=int, default=4, help='Number of log files')
+    parser.add_argument('--entries', type=int, default=50000, help='Entries per log file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_dir = Path(tmp)
+        print(f"Generating {args.files} files with {args.entries} entries each...")
+        generate_data(log_dir, args.files, args.entries)
+
+        results = {
+            "legacy pipeline": measure(legacy_pipeline, log_dir),
+            "fused pipeline": measure(fused_pipeline, log_dir),
+        }
+
+        output_dir = Path(tmp) / "output"
+        startup = {
+            "--help": measure_command(["--help"]),
+            "analyze --no-charts": measure_command(["analyze", "--log-dir", str(log_dir),
+                                                    "--output-dir", str(output_dir), "--no-charts"], repeat=1),
+            "analyze": measure_command(["analyze", "--log-dir", str(log_dir),
+                                        "--output-dir", str(output_dir)], repeat=1),
+        }
+
+    print(f"\n{'benchmark':<24}{'time (s)':>10}{'peak (MB)':>12}")
+    for name, (elapsed, peak) in results.items():
+        print(f"{name:<24}{elapsed:>10.2f}{peak / 1e6:>12.1f}")
+
+    legacy_peak = results["legacy pipeline"][1]
+    fused_peak = results["fused pipeline"][1]
+    print(f"\nPeak memory reduction: {(1 - fused_peak / legacy_peak) * 100:.1f}%")
+
+    print(f"\n{'command':<24}{'time (s)':>10}")
+    for name, elapsed in startup.items():
+        print(f"{name:<24}{elapsed:>10.2f}")
+
+if __name__ == "__main__":
+    main()
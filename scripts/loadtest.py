@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Load test the dashboard API on synthetic data.
+Starts the web server on generated logs, replays a weighted mix of endpoint
+calls at increasing concurrency, and reports latency percentiles, throughput
+and errors per endpoint together with the server's resident memory. Each
+endpoint is then called on its own to report the memory it needs.
+"""
+
+import argparse
+import datetime
+import json
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sample_logs import COMPONENTS, LOG_LEVELS, generate_log_file
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def generate_data(directory, num_files, entries_per_file):
+    """Generate synthetic log files into a directory."""
+    start_date = datetime.datetime(2024, 1, 1)
+    for i in range(1, num_files + 1):
+        generate_log_file(directory / f"server_{i}.log", entries_per_file,
+                          start_date + datetime.timedelta(hours=i))
+
+def build_mix(total_entries):
+    """Endpoint names with a weight and a function returning a request path.
+
+    The weights follow what a dashboard page load and a user paging and
+    filtering through entries request; /api/logs mixes shallow and deep pages.
+    """
+    last_page = max(1, total_entries // 50)
+
+    def logs_path(rng):
+        page = rng.randint(1, 5) if rng.random() < 0.7 else rng.randint(1, last_page)
+        path = f"/api/logs?page={page}&per_page=50"
+        if rng.random() < 0.3:
+            path += f"&level={rng.choice(list(LOG_LEVELS))}"
+        if rng.random() < 0.3:
+            path += f"&component={rng.choice(COMPONENTS)}"
+        return path
+
+    return [
+        ("stats", 10, lambda rng: "/api/stats"),
+        ("logs", 25, logs_path),
+        ("time-series", 8, lambda rng: f"/api/time-series?window={rng.choice(['1min', '5min', '1h'])}"),
+        ("hourly-distribution", 6, lambda rng: "/api/hourly-distribution"),
+        ("component-stats", 6, lambda rng: "/api/component-stats"),
+        ("level-distribution", 6, lambda rng: "/api/level-distribution"),
+        ("anomalies", 6, lambda rng: f"/api/anomalies?threshold={rng.choice([2.0, 2.5, 3.0])}"),
+        ("gaps", 3, lambda rng: "/api/gaps"),
+        ("incidents", 3, lambda rng: "/api/incidents"),
+        ("metric-stats", 3, lambda rng: "/api/metric-stats"),
+        ("top-values", 3, lambda rng: f"/api/top-values?field={rng.choice(['ip', 'user', 'endpoint'])}"),
+        ("query", 6, lambda rng: "/api/query?group_by=component,level&agg=count,error_rate&bucket="
+                                 + rng.choice(["5min", "1h"])),
+        ("metrics", 5, lambda rng: "/metrics"),
+    ]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for_server(base_url, process, timeout):
+    """Wait until the server answers, failing early if it exits."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError("Server exited during start-up")
+        try:
+            urllib.request.urlopen(base_url + "/api/stats", timeout=5).read()
+            return
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not answer within {timeout} seconds")
+
+def rss_bytes(pid):
+    """Resident memory of a process from /proc, or None where that is unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+class MemorySampler(threading.Thread):
+    """Samples a process's resident memory, keeping the peak."""
+
+    def __init__(self, pid, interval=0.1):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes(self.pid) or 0)
+
+def run_level(base_url, mix, concurrency, duration, seed):
+    """Send requests from concurrency threads for duration seconds; return (endpoint, seconds, ok) samples."""
+    names = [name for name, _, _ in mix]
+    weights = [weight for _, weight, _ in mix]
+    paths = {name: path for name, _, path in mix}
+    samples = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        local = []
+        while time.monotonic() < deadline:
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base_url + paths[name](rng), timeout=60) as response:
+                    response.read()
+                    ok = response.status == 200
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                ok = False
+            local.append((name, time.perf_counter() - start, ok))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+def summarize(samples, duration):
+    """Latency percentiles (ms), throughput and errors per endpoint, plus an overall row."""
+    rows = {}
+    groups = {}
+    for name, seconds, ok in samples:
+        groups.setdefault(name, []).append((seconds, ok))
+    groups["all"] = [(seconds, ok) for _, seconds, ok in samples]
+    for name, values in sorted(groups.items()):
+        latencies = np.array([seconds for seconds, _ in values]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        rows[name] = {
+            "requests": len(values),
+            "errors": sum(not ok for _, ok in values),
+            "rps": len(values) / duration,
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
+        }
+    return rows
+
+def run_sampled(process, run):
+    """Call run while sampling the server's memory; return (result, RSS before, RSS after, peak RSS)."""
+    if process is None:
+        return run(), None, None, None
+    before = rss_bytes(process.pid)
+    sampler = MemorySampler(process.pid)
+    sampler.start()
+    result = run()
+    after = rss_bytes(process.pid)
+    sampler.stopped.set()
+    sampler.join()
+    return result, before, after, max(sampler.peak, after or 0)
+
+def endpoint_memory(base_url, mix, process, concurrency, duration, seed):
+    """Call each endpoint on its own and return its requests, errors and server memory.
+
+    Growth is the peak resident memory above that at the start of the
+    endpoint's run. Memory the server kept from earlier runs is not counted
+    again, so growth shows what an endpoint needs beyond what is already held.
+    """
+    results = {}
+    for name, weight, path in mix:
+        samples, before, _, peak = run_sampled(
+            process, lambda: run_level(base_url, [(name, weight, path)], concurrency, duration, seed))
+        results[name] = {
+            "requests": len(samples),
+            "errors": sum(not ok for _, _, ok in samples),
+            "rss_before_bytes": before,
+            "peak_rss_bytes": peak,
+            "growth_bytes": peak - before if before is not None else None,
+        }
+    return results
+
+def print_endpoint_memory(concurrency, results):
+    print(f"\nServer memory per endpoint, alone at concurrency {concurrency}")
+    print(f"{'endpoint':<22}{'requests':>9}{'errors':>8}{'peak MB':>9}{'growth MB':>11}")
+    for name, row in results.items():
+        print(f"{name:<22}{row['requests']:>9}{row['errors']:>8}{row['peak_rss_bytes'] / 1024 / 1024:>9.0f}"
+              f"{row['growth_bytes'] / 1024 / 1024:>11.1f}")
+
+def print_level(concurrency, rows, rss, peak):
+    print(f"\nConcurrency {concurrency}"
+          + (f" - server RSS {rss / 1024 / 1024:.0f} MB, peak {peak / 1024 / 1024:.0f} MB" if rss else ""))
+    print(f"{'endpoint':<22}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, row in rows.items():
+        print(f"{name:<22}{row['requests']:>9}{row['errors']:>8}{row['rps']:>9.1f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the dashboard API.')
+    parser.add_argument('--files', type=int, default=3, help='Number of log files')
+    parser.add_argument('--entries', type=int, default=20000, help='Entries per log file')
+    parser.add_argument('--concurrency', type=str, default='1,4,16,32',
+                        help='Comma-separated numbers of concurrent clients, run in order')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per concurrency level')
+    parser.add_argument('--endpoint-duration', type=float, default=3.0,
+                        help='Seconds each endpoint is called on its own to measure its memory (0 to skip)')
+    parser.add_argument('--url', type=str, help='Test a running server instead of starting one')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the request mix')
+    parser.add_argument('--output', type=str, help='Also write the results as JSON to this file')
+    args = parser.parse_args()
+
+    try:
+        levels = [int(value) for value in args.concurrency.split(',')]
+    except ValueError:
+        print(f"Error: Invalid concurrency list '{args.concurrency}'")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process = None
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            log_dir = Path(tmp)
+            print(f"Generating {args.files} files with {args.entries} entries each...")
+            generate_data(log_dir, args.files, args.entries)
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            print(f"Starting server on {base_url}...")
+            process = subprocess.Popen(
+                [sys.executable, "-m", "src.main", "web", "--log-dir", str(log_dir), "--port", str(port)],
+                cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        try:
+            started = time.perf_counter()
+            wait_for_server(base_url, process, timeout=300)
+            print(f"Server ready in {time.perf_counter() - started:.1f} seconds")
+            mix = build_mix(args.files * args.entries)
+
+            results = []
+            for concurrency in levels:
+                samples, _, rss, peak = run_sampled(
+                    process, lambda: run_level(base_url, mix, concurrency, args.duration, args.seed))
+                rows = summarize(samples, args.duration)
+                print_level(concurrency, rows, rss, peak)
+                results.append({"concurrency": concurrency, "rss_bytes": rss, "peak_rss_bytes": peak,
+                                "endpoints": rows})
+
+            # Memory is read from the server process, so only a server started here is measured
+            memory = None
+            if process is not None and rss_bytes(process.pid) is not None and args.endpoint_duration > 0:
+                memory = endpoint_memory(base_url, mix, process, levels[-1], args.endpoint_duration, args.seed)
+                print_endpoint_memory(levels[-1], memory)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"files": args.files, "entries": args.entries, "duration": args.duration,
+                       "levels": results, "endpoint_memory": memory}, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
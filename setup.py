@@ -5,7 +5,7 @@ setup(
     version="0.1.0",
     packages=find_packages(),
     install_requires=[
-        "flask>=2.0.1",
+        "flask>=2.2.0",
         "pandas>=1.3.3",
         "numpy>=1.21.2",
         "python-dateutil>=2.8.2",
@@ -0,0 +1,347 @@
+import json
+import logging
+import re
+import sys
+import threading
+import urllib.request
+from abc import ABC, abstractmethod
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Number of slots a rule's window is divided into; alerts fire at slot resolution
+WINDOW_SLOTS = 12
+
+class Alert(NamedTuple):
+    """A rule that started or stopped firing, at the log time it happened."""
+    rule: str
+    state: str
+    timestamp: pd.Timestamp
+    value: float
+    message: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'rule': self.rule,
+            'state': self.state,
+            'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            'value': round(float(self.value), 3),
+            'message': self.message,
+        }
+
+class WindowCounter:
+    """Sums over a sliding time window, kept in a fixed ring of slots.
+
+    Memory is the same however many entries pass through: entries are added to
+    the slot of their timestamp, and slots that fall out of the window are
+    cleared as time advances. Entries older than the window are ignored.
+    """
+
+    def __init__(self, window: float, width: int = 1, slots: int = WINDOW_SLOTS):
+        self.slot_ns = int(window * 1e9 / slots)
+        self.ring = np.zeros((slots, width))
+        self.head: Optional[int] = None
+
+    def add(self, slot: int, values: np.ndarray):
+        """Add values to an absolute slot number, advancing the window if it is newer."""
+        slots = len(self.ring)
+        if self.head is None:
+            self.head = slot
+        elif slot > self.head:
+            for stale in range(self.head + 1, min(slot, self.head + slots) + 1):
+                self.ring[stale % slots] = 0
+            self.head = slot
+        elif slot <= self.head - slots:
+            return
+        self.ring[slot % slots] += values
+
+    def totals(self) -> np.ndarray:
+        return self.ring.sum(axis=0)
+
+class AlertRule(ABC):
+    """A named condition evaluated on each ingested batch.
+
+    Subclasses return the alerts raised by a batch. A rule fires once when its
+    condition becomes true and resolves once when it becomes false again.
+    """
+
+    def __init__(self, name: str, component: Optional[str] = None):
+        self.name = name
+        self.component = component
+        self.firing = False
+
+    def _rows(self, batch: pd.DataFrame) -> pd.DataFrame:
+        if self.component is None or "component" not in batch.columns:
+            return batch
+        return batch[batch["component"] == self.component]
+
+    def _transition(self, active: bool, timestamp: pd.Timestamp, value: float, message: str) -> List[Alert]:
+        if active == self.firing:
+            return []
+        self.firing = active
+        return [Alert(self.name, "firing" if active else "resolved", timestamp, float(value), message)]
+
+    @abstractmethod
+    def evaluate(self, batch: pd.DataFrame) -> List[Alert]:
+        """Return the alerts raised or resolved by a time-ordered batch."""
+
+class WindowRule(AlertRule):
+    """A rule over counts summed in a sliding window, checked at the end of every slot touched."""
+
+    width = 1
+
+    def __init__(self, name: str, window: float, threshold: float, component: Optional[str] = None):
+        super().__init__(name, component)
+        if window <= 0:
+            raise ValueError(f"Rule {name}: window must be positive")
+        self.window = window
+        self.threshold = threshold
+        self.counter = WindowCounter(window, self.width)
+
+    def _values(self, rows: pd.DataFrame) -> np.ndarray:
+        """Per-row values to sum, shape (rows, width)."""
+        return np.ones((len(rows), 1))
+
+    @abstractmethod
+    def _check(self, totals: np.ndarray, timestamp: pd.Timestamp) -> List[Alert]:
+        """Compare the window totals with the threshold at the end of a slot."""
+
+    def evaluate(self, batch: pd.DataFrame) -> List[Alert]:
+        rows = self._rows(batch)
+        alerts = []
+        if not rows.empty:
+            slots = rows["timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64) // self.counter.slot_ns
+            order = np.argsort(slots, kind="stable")
+            slots = slots[order]
+            values = self._values(rows)[order]
+
+            # One update and check per slot, not per entry
+            starts = np.flatnonzero(np.r_[True, slots[1:] != slots[:-1]])
+            sums = np.add.reduceat(values, starts, axis=0)
+            for slot, value in zip(slots[starts], sums):
+                self.counter.add(int(slot), value)
+                alerts.extend(self._check(self.counter.totals(), pd.Timestamp((int(slot) + 1) * self.counter.slot_ns)))
+
+        # Other entries move the clock too, so counts age out of the window without new matches
+        end = int(batch["timestamp"].max().value // self.counter.slot_ns)
+        if self.counter.head is not None and end > self.counter.head:
+            self.counter.add(end, np.zeros(self.width))
+            alerts.extend(self._check(self.counter.totals(), pd.Timestamp((end + 1) * self.counter.slot_ns)))
+        return alerts
+
+class ErrorRateRule(WindowRule):
+    """Fires when the error rate (percent) over the window exceeds the threshold."""
+
+    width = 2
+
+    def __init__(self, name: str, window: float, threshold: float, component: Optional[str] = None,
+                 min_count: int = 1):
+        super().__init__(name, window, threshold, component)
+        self.min_count = min_count
+
+    def _values(self, rows: pd.DataFrame) -> np.ndarray:
+        errors = rows["is_error"].to_numpy(dtype=float) if "is_error" in rows.columns else np.zeros(len(rows))
+        return np.column_stack([np.ones(len(rows)), errors])
+
+    def _check(self, totals: np.ndarray, timestamp: pd.Timestamp) -> List[Alert]:
+        total, errors = totals
+        rate = errors / total * 100 if total else 0.0
+        active = total >= self.min_count and rate > self.threshold
+        scope = f"{self.component} " if self.component else ""
+        return self._transition(active, timestamp, rate,
+                                f"{scope}error rate {rate:.1f}% over {self.window:g}s ({int(errors)}/{int(total)})")
+
+class MessageCountRule(WindowRule):
+    """Fires when more than threshold messages match a template within the window.
+
+    The template is a message with * for variable parts, e.g. "Connection timeout to *";
+    a regular expression can be given as pattern instead.
+    """
+
+    def __init__(self, name: str, window: float, threshold: float, component: Optional[str] = None,
+                 template: Optional[str] = None, pattern: Optional[str] = None):
+        super().__init__(name, window, threshold, component)
+        if (template is None) == (pattern is None):
+            raise ValueError(f"Rule {name}: give either a template or a pattern")
+        if template is not None:
+            pattern = "^" + ".*?".join(re.escape(part) for part in template.split("*")) + "$"
+        try:
+            self.pattern = re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Rule {name}: invalid pattern: {e}")
+        self.description = template or pattern
+
+    def _rows(self, batch: pd.DataFrame) -> pd.DataFrame:
+        rows = super()._rows(batch)
+        if rows.empty or "message" not in rows.columns:
+            return rows.iloc[:0]
+        return rows[rows["message"].astype(str).str.contains(self.pattern, na=False)]
+
+    def _check(self, totals: np.ndarray, timestamp: pd.Timestamp) -> List[Alert]:
+        count = totals[0]
+        return self._transition(count > self.threshold, timestamp, count,
+                                f"{int(count)} messages matching '{self.description}' over {self.window:g}s")
+
+class SilenceRule(AlertRule):
+    """Fires when a component logs nothing for more than max_silence seconds of log time."""
+
+    def __init__(self, name: str, component: str, max_silence: float):
+        super().__init__(name, component)
+        self.max_silence = max_silence
+        self.last_seen: Optional[pd.Timestamp] = None
+
+    def evaluate(self, batch: pd.DataFrame) -> List[Alert]:
+        if batch.empty:
+            return []
+        limit = pd.Timedelta(seconds=self.max_silence)
+        times = self._rows(batch)["timestamp"].sort_values().reset_index(drop=True)
+        alerts = []
+        if not times.empty:
+            previous = times.shift()
+            if self.last_seen is not None:
+                previous.iloc[0] = self.last_seen
+            quiet = (times - previous) > limit
+            # Silences that ended within this batch
+            for start, end in zip(previous[quiet], times[quiet]):
+                silence = (end - start).total_seconds()
+                alerts += self._transition(True, start + limit, silence, f"{self.component} silent since {start}")
+                alerts += self._transition(False, end, silence, f"{self.component} logging again")
+            self.last_seen = times.iloc[-1]
+
+        # Still quiet at the end of the batch
+        now = batch["timestamp"].max()
+        if self.last_seen is not None and now - self.last_seen > limit:
+            alerts += self._transition(True, self.last_seen + limit, (now - self.last_seen).total_seconds(),
+                                       f"{self.component} silent since {self.last_seen}")
+        return alerts
+
+class StdoutSink:
+    """Print alerts, one line each."""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def emit(self, alert: Alert):
+        print(f"[ALERT {alert.state.upper()}] {alert.timestamp} {alert.rule}: {alert.message}",
+              file=self.stream or sys.stdout, flush=True)
+
+class FileSink:
+    """Append alerts to a file as JSON lines."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def emit(self, alert: Alert):
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(alert.to_dict()) + "\n")
+
+class WebhookSink:
+    """POST each alert as JSON to a URL; failures are logged, not raised."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def emit(self, alert: Alert):
+        request = urllib.request.Request(self.url, data=json.dumps(alert.to_dict()).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except Exception as e:
+            logger.error(f"Error sending alert to {self.url}: {e}")
+
+class MemorySink:
+    """Keep emitted alerts in a list, for tests and local inspection."""
+
+    def __init__(self):
+        self.alerts: List[Alert] = []
+
+    def emit(self, alert: Alert):
+        self.alerts.append(alert)
+
+class AlertEngine:
+    """Evaluates rules on every ingested batch and sends alerts to the sinks.
+
+    Batches are expected in roughly increasing time order, as ingestion and
+    follow mode produce them. Each rule keeps constant-size state, so the
+    cost of a batch depends only on its size.
+    """
+
+    def __init__(self, rules: Iterable[AlertRule], sinks: Iterable[Any] = (), history: int = 100):
+        self.rules = list(rules)
+        self.sinks = list(sinks)
+        self.recent: "deque[Alert]" = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def evaluate(self, batch: pd.DataFrame) -> List[Alert]:
+        """Evaluate all rules on a batch and emit the alerts it raised, in time order."""
+        if batch.empty or "timestamp" not in batch.columns:
+            return []
+        with self._lock:
+            alerts = [alert for rule in self.rules for alert in rule.evaluate(batch)]
+            alerts.sort(key=lambda alert: alert.timestamp)
+            self.recent.extend(alerts)
+        for alert in alerts:
+            for sink in self.sinks:
+                sink.emit(alert)
+        return alerts
+
+    def prime(self, df: pd.DataFrame):
+        """Bring rule state up to date with existing data without emitting alerts."""
+        if not df.empty and "timestamp" in df.columns:
+            with self._lock:
+                for rule in self.rules:
+                    rule.evaluate(df)
+
+    def firing(self) -> List[str]:
+        """Names of the rules currently firing."""
+        return [rule.name for rule in self.rules if rule.firing]
+
+RULE_TYPES = {
+    "error_rate": (ErrorRateRule, ("window", "threshold"), ("component", "min_count")),
+    "message_count": (MessageCountRule, ("window", "threshold"), ("component", "template", "pattern")),
+    "silence": (SilenceRule, ("component", "max_silence"), ()),
+}
+
+def build_rule(spec: Dict[str, Any]) -> AlertRule:
+    """Build a rule from its config entry."""
+    rule_type = spec.get("type")
+    if rule_type not in RULE_TYPES:
+        raise ValueError(f"Unsupported rule type: {rule_type}")
+    rule_class, required, optional = RULE_TYPES[rule_type]
+    name = spec.get("name") or rule_type
+    missing = [key for key in required if key not in spec]
+    if missing:
+        raise ValueError(f"Rule {name}: missing {', '.join(missing)}")
+    unknown = set(spec) - set(required) - set(optional) - {"name", "type"}
+    if unknown:
+        raise ValueError(f"Rule {name}: unknown option {', '.join(sorted(unknown))}")
+    return rule_class(name, **{key: spec[key] for key in required + optional if key in spec})
+
+def build_sink(spec: Dict[str, Any]):
+    """Build a sink from its config entry."""
+    sink_type = spec.get("type")
+    if sink_type == "stdout":
+        return StdoutSink()
+    if sink_type == "file" and spec.get("path"):
+        return FileSink(Path(spec["path"]))
+    if sink_type == "webhook" and spec.get("url"):
+        return WebhookSink(spec["url"], float(spec.get("timeout", 5.0)))
+    raise ValueError(f"Invalid alert sink: {spec}")
+
+def load_alert_config(path: Path) -> AlertEngine:
+    """Read alert rules and sinks from a JSON file; alerts go to stdout when no sink is given."""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            config = json.load(file)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid alert config {path}: {e}")
+    rules = [build_rule(spec) for spec in config.get("rules", [])]
+    sinks = [build_sink(spec) for spec in config.get("sinks", [{"type": "stdout"}])]
+    return AlertEngine(rules, sinks)
@@ -1,17 +1,69 @@
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional, Sequence
+
+from .sketches import LogSketches
+
+def entry_weights(df: pd.DataFrame) -> Optional[pd.Series]:
+    """Number of log lines each row stands for, or None when every row is one line.
+    
+    Rows folded by collapse_repeats carry a repeat_count, and sampled rows a
+    sample_weight; counts computed with these weights are the same as (or
+    estimate) the counts over every line.
+    """
+    if "repeat_count" in df.columns and "sample_weight" in df.columns:
+        return df["repeat_count"] * df["sample_weight"]
+    if "repeat_count" in df.columns:
+        return df["repeat_count"]
+    if "sample_weight" in df.columns:
+        return df["sample_weight"]
+    return None
+
+def get_sampling_error(df: pd.DataFrame, z: float = 1.96) -> Dict[str, float]:
+    """Estimate the total entries and error rate of sampled data, with margins at z standard errors.
+    
+    Each row was kept with probability 1 / sample_weight, so the variance of
+    an estimated total is the sum of repeat_count^2 * w * (w - 1) over its
+    rows. The error rate uses the linearised variance of a ratio. Returns an
+    empty dict when the data was not sampled.
+    """
+    if "sample_weight" not in df.columns or df.empty:
+        return {}
+    sample_weight = df["sample_weight"].astype("float64")
+    repeats = df["repeat_count"] if "repeat_count" in df.columns else 1
+    weights = sample_weight * repeats
+    variance = repeats ** 2 * sample_weight * (sample_weight - 1)
+    errors = df["is_error"] if "is_error" in df.columns else pd.Series(False, index=df.index)
+    
+    total = weights.sum()
+    error_total = weights[errors].sum()
+    total_variance = variance.sum()
+    error_variance = variance[errors].sum()
+    rate = error_total / total if total else 0.0
+    rate_variance = (error_variance * (1 - 2 * rate) + rate ** 2 * total_variance) / total ** 2 if total else 0.0
+    return {
+        "sampled_rows": int(len(df)),
+        "total_logs": float(total),
+        "total_logs_margin": float(z * np.sqrt(total_variance)),
+        "error_rate": float(rate * 100),
+        "error_rate_margin": float(z * np.sqrt(max(rate_variance, 0.0)) * 100),
+    }
 
 def get_error_rate(df: pd.DataFrame) -> float:
     """Calculate the percentage of error logs."""
     if "is_error" not in df.columns:
         return 0.0
+    weights = entry_weights(df)
+    if weights is not None:
+        return weights[df["is_error"]].sum() / weights.sum() * 100
     return df["is_error"].mean() * 100
 
 def find_busiest_hour(df: pd.DataFrame) -> Tuple[int, int]:
     """Find the hour with most log entries."""
     if "hour" not in df.columns:
         return (0, 0)
-    hourly_counts = df["hour"].value_counts()
+    weights = entry_weights(df)
+    hourly_counts = df["hour"].value_counts() if weights is None else weights.groupby(df["hour"]).sum()
     busiest_hour = hourly_counts.idxmax()
     return (busiest_hour, hourly_counts[busiest_hour])
 
@@ -21,13 +73,20 @@ def get_component_stats(df: pd.DataFrame) -> pd.DataFrame:
         return pd.DataFrame()
         
     # Group by component and count logs
-    component_stats = df.groupby("component").agg(
-        total_logs=("component", "count"),
-    )
+    weights = entry_weights(df)
+    if weights is None:
+        component_stats = df.groupby("component").agg(
+            total_logs=("component", "count"),
+        )
+    else:
+        component_stats = weights.groupby(df["component"]).sum().to_frame("total_logs")
     
     # Add error counts if available
     if "is_error" in df.columns:
-        error_counts = df[df["is_error"]].groupby("component").size()
+        if weights is None:
+            error_counts = df[df["is_error"]].groupby("component").size()
+        else:
+            error_counts = weights[df["is_error"]].groupby(df.loc[df["is_error"], "component"]).sum()
         component_stats["error_logs"] = error_counts
         component_stats["error_logs"] = component_stats["error_logs"].fillna(0).astype(int)
         component_stats["error_rate"] = (component_stats["error_logs"] / component_stats["total_logs"]) * 100
@@ -41,8 +100,16 @@ def detect_anomalies(df: pd.DataFrame, threshold: float = 3.0) -> pd.DataFrame:
         
     # Resample to 5-minute intervals
     time_series = df.set_index("timestamp")
-    counts = time_series.resample("5T").size()
+    weights = entry_weights(df)
+    if weights is None:
+        counts = time_series.resample("5min").size()
+    else:
+        counts = pd.Series(weights.to_numpy(), index=time_series.index).resample("5min").sum()
     
+    return detect_anomalies_from_counts(counts, threshold)
+
+def detect_anomalies_from_counts(counts: pd.Series, threshold: float = 3.0) -> pd.DataFrame:
+    """Detect anomalies in a series of log counts per 5-minute bucket."""
     # Calculate rolling mean and standard deviation
     rolling_mean = counts.rolling(window=12).mean()  # 1 hour window
     rolling_std = counts.rolling(window=12).std()
@@ -56,3 +123,217 @@ def detect_anomalies(df: pd.DataFrame, threshold: float = 3.0) -> pd.DataFrame:
         "expected": rolling_mean.loc[anomalies.index].values,
         "deviation": (anomalies.values - rolling_mean.loc[anomalies.index].values) / rolling_std.loc[anomalies.index].values
     })
+
+def get_inter_arrival_stats(df: pd.DataFrame, by: str = "component") -> pd.DataFrame:
+    """Summarise seconds between consecutive entries of each group."""
+    if "timestamp" not in df.columns or by not in df.columns:
+        return pd.DataFrame()
+    
+    deltas = df.groupby(by, sort=False)["timestamp"].diff().dt.total_seconds()
+    grouped = deltas.groupby(df[by])
+    stats = grouped.agg(["count", "mean", "median", "max"]).rename(columns={"count": "intervals"})
+    stats["p95"] = grouped.quantile(0.95)
+    return stats.sort_values("max", ascending=False)
+
+def detect_gaps(df: pd.DataFrame, min_gap: float = 600.0, by: str = "component",
+                include_ongoing: bool = True) -> pd.DataFrame:
+    """Find periods longer than min_gap seconds in which a group logged nothing.
+    
+    Expects rows ordered by timestamp. With include_ongoing, groups that have
+    been quiet since their last entry until the end of the data are reported
+    with ongoing=True.
+    """
+    columns = [by, "gap_start", "gap_end", "duration_seconds", "ongoing"]
+    if "timestamp" not in df.columns or by not in df.columns or df.empty:
+        return pd.DataFrame(columns=columns)
+    
+    previous = df.groupby(by, sort=False)["timestamp"].shift()
+    duration = (df["timestamp"] - previous).dt.total_seconds()
+    mask = (duration > min_gap).values
+    gaps = pd.DataFrame({
+        by: df[by].values[mask],
+        "gap_start": previous.values[mask],
+        "gap_end": df["timestamp"].values[mask],
+        "duration_seconds": duration.values[mask],
+        "ongoing": False,
+    })
+    
+    if include_ongoing:
+        end = df["timestamp"].max()
+        last_seen = df.groupby(by)["timestamp"].max()
+        quiet = (end - last_seen).dt.total_seconds()
+        quiet = quiet[quiet > min_gap]
+        ongoing = pd.DataFrame({
+            by: quiet.index.values,
+            "gap_start": last_seen[quiet.index].values,
+            "gap_end": end,
+            "duration_seconds": quiet.values,
+            "ongoing": True,
+        })
+        gaps = pd.concat([gaps, ongoing], ignore_index=True) if not gaps.empty else ongoing
+    
+    return gaps[columns].sort_values("duration_seconds", ascending=False).reset_index(drop=True)
+
+def detect_bursts(df: pd.DataFrame, window: str = "1min", threshold: float = 3.0,
+                  by: str = "component", min_count: int = 5) -> pd.DataFrame:
+    """Find windows in which a group logged far more than its usual rate."""
+    columns = [by, "window_start", "log_count", "expected", "deviation"]
+    if "timestamp" not in df.columns or by not in df.columns or df.empty:
+        return pd.DataFrame(columns=columns)
+    
+    # Window counts as a (time x group) matrix, including empty windows
+    buckets = df["timestamp"].dt.floor(window)
+    weights = entry_weights(df)
+    if weights is None:
+        counts = df.groupby([buckets, df[by]]).size().unstack(fill_value=0)
+    else:
+        counts = weights.groupby([buckets, df[by]]).sum().unstack(fill_value=0)
+    counts = counts.reindex(pd.date_range(counts.index.min(), counts.index.max(), freq=window), fill_value=0)
+    matrix = counts.to_numpy(dtype=np.float64)
+    
+    mean = matrix.mean(axis=0)
+    std = matrix.std(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deviation = (matrix - mean) / std
+    rows, cols = np.nonzero((deviation > threshold) & (matrix >= min_count))
+    
+    bursts = pd.DataFrame({
+        by: counts.columns.values[cols],
+        "window_start": counts.index.values[rows],
+        "log_count": matrix[rows, cols].astype(int),
+        "expected": mean[cols],
+        "deviation": deviation[rows, cols],
+    })
+    return bursts.sort_values("deviation", ascending=False).reset_index(drop=True)
+
+class GapTracker:
+    """Incrementally detect gaps per group over successive batches of entries."""
+
+    def __init__(self, min_gap: float = 600.0, by: str = "component"):
+        self.min_gap = min_gap
+        self.by = by
+        self.last_seen: Dict[Any, pd.Timestamp] = {}
+        self.closed = detect_gaps(pd.DataFrame(), min_gap, by)
+
+    def update(self, batch: pd.DataFrame) -> pd.DataFrame:
+        """Add a time-ordered batch and return gaps that ended within it."""
+        if batch.empty:
+            return detect_gaps(batch, self.min_gap, self.by, include_ongoing=False)
+        if not self.last_seen:
+            gaps = detect_gaps(batch, self.min_gap, self.by, include_ongoing=False)
+            self.last_seen.update(batch.groupby(self.by)["timestamp"].max().to_dict())
+            self._record(gaps)
+            return gaps
+        
+        # Seed each group with its last timestamp so gaps spanning batches are found
+        previous = pd.DataFrame({
+            self.by: list(self.last_seen.keys()),
+            "timestamp": pd.to_datetime(list(self.last_seen.values())),
+        })
+        combined = pd.concat([previous, batch[[self.by, "timestamp"]]], ignore_index=True)
+        combined = combined.sort_values("timestamp", kind="stable")
+        gaps = detect_gaps(combined, self.min_gap, self.by, include_ongoing=False)
+        
+        self.last_seen.update(batch.groupby(self.by)["timestamp"].max().to_dict())
+        self._record(gaps)
+        return gaps
+
+    def _record(self, gaps: pd.DataFrame):
+        if not gaps.empty:
+            closed = pd.concat([self.closed, gaps], ignore_index=True) if not self.closed.empty else gaps
+            self.closed = closed.sort_values("duration_seconds", ascending=False, kind="stable").reset_index(drop=True)
+
+    def gaps(self, now: pd.Timestamp) -> pd.DataFrame:
+        """Return all gaps seen so far plus ongoing ones as of now, like detect_gaps."""
+        quiet = self.silent(now)
+        if not quiet:
+            return self.closed
+        ongoing = pd.DataFrame({
+            self.by: list(quiet.keys()),
+            "gap_start": pd.to_datetime([self.last_seen[key] for key in quiet]),
+            "gap_end": now,
+            "duration_seconds": list(quiet.values()),
+            "ongoing": True,
+        })
+        gaps = pd.concat([self.closed, ongoing], ignore_index=True) if not self.closed.empty else ongoing
+        return gaps.sort_values("duration_seconds", ascending=False).reset_index(drop=True)
+
+    def silent(self, now: pd.Timestamp) -> Dict[Any, float]:
+        """Return groups quiet for more than min_gap seconds as of now."""
+        return {
+            key: (now - seen).total_seconds()
+            for key, seen in self.last_seen.items()
+            if (now - seen).total_seconds() > self.min_gap
+        }
+
+def get_metric_stats(df: pd.DataFrame, metric: str, by: str = "component") -> pd.DataFrame:
+    """Aggregate an extracted numeric metric, optionally grouped by a column."""
+    if metric not in df.columns:
+        return pd.DataFrame()
+    
+    values = df[metric].astype("float64")
+    mask = values.notna()
+    keys = df.loc[mask, by] if by in df.columns else pd.Series("all", index=values.index[mask])
+    weights = entry_weights(df)
+    if weights is not None:
+        return _weighted_metric_stats(values[mask], weights[mask], keys)
+    grouped = values[mask].groupby(keys)
+    stats = grouped.agg(["count", "mean", "median", "max"])
+    stats["p95"] = grouped.quantile(0.95)
+    return stats.sort_values("count", ascending=False)
+
+def _weighted_metric_stats(values: pd.Series, weights: pd.Series, keys: pd.Series) -> pd.DataFrame:
+    """get_metric_stats where each value occurred weights times."""
+    rows = {}
+    for key, positions in values.groupby(keys).indices.items():
+        group_values = values.to_numpy()[positions]
+        group_weights = weights.to_numpy(dtype=np.float64)[positions]
+        order = np.argsort(group_values, kind="stable")
+        cumulative = np.cumsum(group_weights[order])
+        total = cumulative[-1]
+        quantile = lambda q: group_values[order][np.searchsorted(cumulative, q * total)]
+        rows[key] = {
+            "count": int(total),
+            "mean": float(np.average(group_values, weights=group_weights)),
+            "median": float(quantile(0.5)),
+            "max": float(group_values.max()),
+            "p95": float(quantile(0.95)),
+        }
+    stats = pd.DataFrame.from_dict(rows, orient="index", columns=["count", "mean", "median", "max", "p95"])
+    return stats.sort_values("count", ascending=False)
+
+def get_distinct_counts(sketches: LogSketches) -> Dict[str, int]:
+    """Estimate the number of distinct values of each tracked field."""
+    return {name: sketch.count() for name, sketch in sketches.distinct.items()}
+
+def get_top_values(sketches: LogSketches, field: str, k: int = 10) -> List[Tuple[str, int]]:
+    """Estimate the most frequent values of a tracked field."""
+    if field not in sketches.top:
+        raise ValueError(f"Field is not tracked: {field}")
+    return sketches.top[field].top(k)
+
+def get_latency_percentiles(sketches: LogSketches, percentiles: Sequence[float] = (50, 90, 95, 99),
+                            component: Optional[str] = None) -> Dict[str, Optional[float]]:
+    """Estimate latency percentiles extracted from log messages."""
+    sketch = sketches.latency if component is None else sketches.component_latency.get(component)
+    if sketch is None:
+        return {f"p{p:g}": None for p in percentiles}
+    return {f"p{p:g}": sketch.quantile(p / 100) for p in percentiles}
+
+def get_component_latency_percentiles(sketches: LogSketches) -> pd.DataFrame:
+    """Estimate per-component latency statistics from sketches."""
+    rows = {
+        component: {
+            "count": sketch.count,
+            "median": sketch.quantile(0.5),
+            "p95": sketch.quantile(0.95),
+            "max": sketch.max,
+        }
+        for component, sketch in sketches.component_latency.items()
+        if sketch.count
+    }
+    if not rows:
+        return pd.DataFrame()
+    stats = pd.DataFrame.from_dict(rows, orient="index")
+    stats.index.name = "component"
+    return stats.sort_values("count", ascending=False)
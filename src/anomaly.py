@@ -0,0 +1,265 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .analysis import entry_weights
+
+# Series that can be scored: total volume, or one series per value of these columns
+ANOMALY_GROUPS = ("component", "level")
+MIN_BUCKET = pd.Timedelta(minutes=1)
+MAX_WINDOW = 1000
+
+# Detection methods, and the seasonal slots a baseline can be built over
+ANOMALY_METHODS = ("rolling", "seasonal")
+SEASONS = {"day": pd.Timedelta(days=1), "week": pd.Timedelta(days=7)}
+
+# Scales a median absolute deviation to a standard deviation for normal data
+MAD_SCALE = 1.4826
+
+def bucket_counts(df: pd.DataFrame, bucket: str = "5min", by: Optional[str] = None) -> pd.DataFrame:
+    """Count entries per time bucket, one column per group (or a single 'total' column)."""
+    if df.empty or "timestamp" not in df.columns:
+        return pd.DataFrame()
+    weights = entry_weights(df)
+    if by is None:
+        if weights is None:
+            counts = df.set_index("timestamp").resample(bucket).size()
+        else:
+            counts = weights.groupby(df["timestamp"].dt.floor(bucket)).sum()
+            counts = counts.reindex(pd.date_range(counts.index.min(), counts.index.max(), freq=bucket), fill_value=0)
+        return counts.to_frame("total")
+
+    keys = [df["timestamp"].dt.floor(bucket), df[by]]
+    grouped = df.groupby(keys, observed=True).size() if weights is None else weights.groupby(keys, observed=True).sum()
+    counts = grouped.unstack(fill_value=0)
+    # Buckets where nothing was logged count as zero for every group
+    full_range = pd.date_range(counts.index.min(), counts.index.max(), freq=bucket)
+    return counts.reindex(full_range, fill_value=0)
+
+def score_counts(counts: pd.DataFrame, window: int = 12) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling mean and z-score of each column, over the window ending at each bucket."""
+    rolling = counts.rolling(window=window)
+    mean = rolling.mean().to_numpy()
+    std = rolling.std().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deviation = (counts.to_numpy() - mean) / std
+    return mean, deviation
+
+def _check_season_bucket(season: str, bucket: str, bucket_size: pd.Timedelta):
+    # Slots are counted within each day, so a bucket must tile a day (or be the whole season)
+    if bucket_size != SEASONS[season] and (bucket_size > SEASONS["day"] or SEASONS["day"] % bucket_size):
+        raise ValueError(f"Seasonal time buckets must divide a day evenly, got {bucket}")
+
+def season_slots(index: pd.DatetimeIndex, season: str = "day", bucket: str = "5min") -> np.ndarray:
+    """Slot of each bucket within the season: time of day, or day of week and time of day."""
+    bucket_size = pd.Timedelta(pd.tseries.frequencies.to_offset(bucket))
+    slots = np.asarray((index - index.normalize()) // bucket_size)
+    if season == "week":
+        slots = slots + np.asarray(index.dayofweek) * (SEASONS["day"] // bucket_size)
+    return slots
+
+class SeasonalModel:
+    """Robust baselines of bucketed counts per time of day or time of week.
+
+    For every series and slot (a bucket position within the day or week), the
+    expected count is the median of that slot over the days or weeks seen,
+    and the spread is the scaled median absolute deviation (at least one
+    entry). A daily ramp-up is therefore compared with earlier ramp-ups, not
+    with the quiet hour before it. Slots seen fewer than min_samples times
+    have no baseline and are never flagged.
+    """
+
+    def __init__(self, season: str = "day", bucket: str = "5min", min_samples: int = 3, workers: int = 1):
+        if season not in SEASONS:
+            raise ValueError(f"Unsupported season: {season}")
+        try:
+            bucket_size = pd.Timedelta(pd.tseries.frequencies.to_offset(bucket))
+        except ValueError:
+            raise ValueError(f"Invalid time bucket: {bucket}")
+        _check_season_bucket(season, bucket, bucket_size)
+        self.season = season
+        self.bucket = bucket
+        self.slot_count = int(SEASONS[season] // bucket_size)
+        self.min_samples = min_samples
+        self.workers = workers
+        self.columns = pd.Index([])
+        self.median = np.empty((self.slot_count, 0))
+        self.scale = np.empty((self.slot_count, 0))
+        self.fitted_buckets = 0
+
+    def _fit_columns(self, values: np.ndarray, slots: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        median = np.full((self.slot_count, values.shape[1]), np.nan)
+        scale = np.full_like(median, np.nan)
+        for slot in np.unique(slots):
+            rows = values[slots == slot]
+            if len(rows) < self.min_samples:
+                continue
+            median[slot] = np.median(rows, axis=0)
+            scale[slot] = np.maximum(MAD_SCALE * np.median(np.abs(rows - median[slot]), axis=0), 1.0)
+        return median, scale
+
+    def fit(self, counts: pd.DataFrame) -> "SeasonalModel":
+        """Build the baselines, fitting groups of series on worker threads."""
+        values = counts.to_numpy(dtype=float)
+        slots = season_slots(counts.index, self.season, self.bucket)
+        chunks = [chunk for chunk in np.array_split(np.arange(values.shape[1]), max(1, self.workers)) if len(chunk)]
+        if len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+                fitted = list(executor.map(lambda chunk: self._fit_columns(values[:, chunk], slots), chunks))
+        else:
+            fitted = [self._fit_columns(values, slots)]
+
+        self.columns = counts.columns
+        self.median = np.hstack([median for median, _ in fitted]) if fitted else self.median[:, :0]
+        self.scale = np.hstack([scale for _, scale in fitted]) if fitted else self.scale[:, :0]
+        self.fitted_buckets = len(counts)
+        return self
+
+    def score(self, counts: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Expected values and robust z-scores of buckets against the fitted baselines."""
+        positions = self.columns.get_indexer(counts.columns)
+        slots = season_slots(counts.index, self.season, self.bucket)
+        known = positions >= 0
+        expected = np.full(counts.shape, np.nan)
+        scale = np.full(counts.shape, np.nan)
+        expected[:, known] = self.median[slots][:, positions[known]]
+        scale[:, known] = self.scale[slots][:, positions[known]]
+        return expected, (counts.to_numpy(dtype=float) - expected) / scale
+
+class AnomalyScores:
+    """Z-scores of one set of bucketed series, filtered cheaply for any threshold."""
+
+    def __init__(self, counts: pd.DataFrame, by: Optional[str], window: int = 12,
+                 model: Optional[SeasonalModel] = None):
+        self.by = by
+        self.counts = counts
+        if counts.empty:
+            self.expected = self.deviation = np.empty((0, 0))
+        elif model is not None:
+            self.expected, self.deviation = model.score(counts)
+        else:
+            self.expected, self.deviation = score_counts(counts, window)
+
+    def anomalies(self, threshold: float) -> pd.DataFrame:
+        """Buckets whose count is more than threshold standard deviations above the expected value."""
+        columns = ["timestamp"] + ([self.by] if self.by else []) + ["log_count", "expected", "deviation"]
+        if self.counts.empty:
+            return pd.DataFrame(columns=columns)
+
+        rows, cols = np.nonzero(np.nan_to_num(self.deviation, nan=-np.inf) > threshold)
+        result = pd.DataFrame({
+            "timestamp": self.counts.index[rows],
+            "log_count": self.counts.to_numpy()[rows, cols],
+            "expected": self.expected[rows, cols],
+            "deviation": self.deviation[rows, cols],
+        })
+        if self.by:
+            result.insert(1, self.by, self.counts.columns[cols])
+        return result[columns]
+
+class AnomalyEngine:
+    """Cache of anomaly scores per data version, series grouping, bucket and window.
+
+    Scoring resamples and rolls over the whole frame; picking anomalies for a
+    threshold only filters the cached scores, so repeated requests with
+    different thresholds do not rescan the data.
+
+    Seasonal models are kept per baseline key (e.g. a dataset load) and
+    reused for later versions that only added buckets, until the new buckets
+    exceed refit_fraction of those the model was fitted on.
+    """
+
+    def __init__(self, max_entries: int = 32, refit_fraction: float = 0.1, workers: int = 4):
+        self.max_entries = max_entries
+        self.refit_fraction = refit_fraction
+        self.workers = workers
+        self._entries: "OrderedDict[Hashable, AnomalyScores]" = OrderedDict()
+        self._models: "OrderedDict[Hashable, SeasonalModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _model(self, counts: pd.DataFrame, key: Hashable, season: str, bucket: str) -> SeasonalModel:
+        with self._lock:
+            model = self._models.get(key)
+        if model is None or len(counts) - model.fitted_buckets > self.refit_fraction * model.fitted_buckets:
+            model = SeasonalModel(season, bucket, workers=self.workers).fit(counts)
+        with self._lock:
+            self._models[key] = model
+            self._models.move_to_end(key)
+            while len(self._models) > self.max_entries:
+                self._models.popitem(last=False)
+        return model
+
+    def scores(self, df: pd.DataFrame, version: Hashable, by: Optional[str] = None,
+               bucket: str = "5min", window: int = 12, method: str = "rolling",
+               season: str = "day", baseline: Optional[Hashable] = None) -> AnomalyScores:
+        """Return the scores of the data version, computing them on first use."""
+        if by is not None and by not in ANOMALY_GROUPS:
+            raise ValueError(f"Unsupported grouping: {by}")
+        if method not in ANOMALY_METHODS:
+            raise ValueError(f"Unsupported method: {method}")
+        if season not in SEASONS:
+            raise ValueError(f"Unsupported season: {season}")
+        try:
+            bucket_size = pd.Timedelta(pd.tseries.frequencies.to_offset(bucket))
+        except ValueError:
+            raise ValueError(f"Invalid time bucket: {bucket}")
+        if bucket_size < MIN_BUCKET:
+            raise ValueError(f"Time bucket must be at least {MIN_BUCKET}")
+        if method == "seasonal":
+            _check_season_bucket(season, bucket, bucket_size)
+        if not 2 <= window <= MAX_WINDOW:
+            raise ValueError(f"Window must be between 2 and {MAX_WINDOW} buckets")
+
+        key = (version, by, bucket, window if method == "rolling" else season, method)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        counts = bucket_counts(df, bucket, by)
+        model = None
+        if method == "seasonal" and not counts.empty:
+            model_key = (baseline if baseline is not None else version, by, bucket, season)
+            model = self._model(counts, model_key, season, bucket)
+        scores = AnomalyScores(counts, by, window, model)
+        with self._lock:
+            self._entries[key] = scores
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return scores
+
+    def detect(self, df: pd.DataFrame, version: Hashable, thresholds: Iterable[float], by: Optional[str] = None,
+               bucket: str = "5min", window: int = 12, method: str = "rolling", season: str = "day",
+               baseline: Optional[Hashable] = None) -> Dict[float, pd.DataFrame]:
+        """Return the anomalies for each threshold."""
+        scores = self.scores(df, version, by, bucket, window, method, season, baseline)
+        return {threshold: scores.anomalies(threshold) for threshold in thresholds}
+
+def parse_thresholds(value: str) -> List[float]:
+    """Parse a comma-separated list of thresholds."""
+    try:
+        thresholds = [float(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid thresholds: {value}")
+    if not thresholds:
+        raise ValueError("No thresholds given")
+    return thresholds
+
+def detect_seasonal_anomalies_from_counts(counts: pd.Series, threshold: float = 3.0,
+                                          season: str = "day") -> pd.DataFrame:
+    """Detect anomalies in a series of log counts against seasonal baselines."""
+    frame = counts.to_frame("total")
+    bucket = pd.infer_freq(counts.index) if len(counts) > 2 else None
+    model = SeasonalModel(season, bucket or "5min").fit(frame)
+    return AnomalyScores(frame, None, model=model).anomalies(threshold)
+
+def detect_seasonal_anomalies(df: pd.DataFrame, threshold: float = 3.0, season: str = "day",
+                              bucket: str = "5min") -> pd.DataFrame:
+    """Detect anomalies in log frequency against seasonal baselines."""
+    if "timestamp" not in df.columns:
+        return pd.DataFrame()
+    counts = bucket_counts(df, bucket)
+    return AnomalyScores(counts, None, model=SeasonalModel(season, bucket).fit(counts)).anomalies(threshold)
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .distributed import create_partial, write_partial
+
+def file_fingerprint(path: Path) -> Dict[str, Any]:
+    """Identify the current contents of a file by its path, size and modification time."""
+    stat = path.stat()
+    return {"path": str(path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+class CheckpointStore:
+    """Partial aggregates of finished input files, kept in a directory between runs.
+
+    Each input file has a partial file and a completion marker holding the
+    fingerprint of the input it was built from. The marker is written last
+    and both are renamed into place, so a run killed at any point leaves
+    either a complete checkpoint or none.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _stem(self, path: Path) -> str:
+        digest = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:16]
+        return f"{path.name}.{digest}"
+
+    def partial_path(self, path: Path) -> Path:
+        return self.directory / f"{self._stem(path)}.json.gz"
+
+    def marker_path(self, path: Path) -> Path:
+        return self.directory / f"{self._stem(path)}.done"
+
+    def completed(self, path: Path) -> Optional[Path]:
+        """Return the partial of a file if it was checkpointed and the file has not changed since."""
+        marker = self.marker_path(path)
+        partial = self.partial_path(path)
+        if not marker.exists() or not partial.exists():
+            return None
+        try:
+            recorded = json.loads(marker.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return partial if recorded == file_fingerprint(path) else None
+
+    def record(self, path: Path, partial: Dict[str, Any], fingerprint: Dict[str, Any]) -> Path:
+        """Save the partial of a finished file, then mark the file as done."""
+        target = self.partial_path(path)
+        temporary = target.with_name(target.name + ".tmp")
+        write_partial(partial, temporary)
+        os.replace(temporary, target)
+
+        marker = self.marker_path(path)
+        temporary = marker.with_name(marker.name + ".tmp")
+        temporary.write_text(json.dumps(fingerprint), encoding="utf-8")
+        os.replace(temporary, marker)
+        return target
+
+def _process_file(path: Path, log_format: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    # Fingerprint before reading, so a file that changes meanwhile is redone next time
+    fingerprint = file_fingerprint(path)
+    return create_partial([path], log_format), fingerprint
+
+def run_checkpointed(file_paths: List[Path], log_format: str, store: CheckpointStore, resume: bool = True,
+                     workers: int = 1, progress: Optional[Callable[[Path, bool], None]] = None) -> List[Path]:
+    """Build a partial per file, skipping files already checkpointed when resuming.
+
+    Partials are saved as each file finishes, so an interrupted run loses at
+    most the files in progress. Returns the partial paths in file order;
+    progress(path, skipped) is called once per file.
+    """
+    partials: Dict[Path, Path] = {}
+    pending = []
+    for path in file_paths:
+        done = store.completed(path) if resume else None
+        if done is not None:
+            partials[path] = done
+            if progress:
+                progress(path, True)
+        else:
+            pending.append(path)
+
+    if workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            futures = {executor.submit(_process_file, path, log_format): path for path in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                partials[path] = store.record(path, *future.result())
+                if progress:
+                    progress(path, False)
+    else:
+        for path in pending:
+            partials[path] = store.record(path, *_process_file(path, log_format))
+            if progress:
+                progress(path, False)
+
+    return [partials[path] for path in file_paths]
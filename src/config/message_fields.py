@@ -0,0 +1,35 @@
+"""Patterns for values extracted from log messages."""
+
+# High-cardinality fields tracked with sketches during ingestion. A field is
+# read from the parsed entry when present (e.g. "ip" for nginx/apache logs),
+# otherwise it is searched for in the message with the given pattern.
+SKETCH_FIELDS = {
+    "ip": r'\b(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})\b',
+    "user": r'\b(user_\d+)\b',
+    "endpoint": r'(/api/[\w/.-]+)',
+}
+
+# Latency values such as "Request processed successfully in 120ms". Shared by
+# the latency sketches and the latency_ms metric column.
+LATENCY_PATTERN = r'(?P<latency_ms>\d+(?:\.\d+)?)\s*ms\b'
+
+# Numeric metrics extracted from messages into typed columns. Each extractor
+# pattern uses named groups, one per output column, and is only run on rows
+# containing the literal "contains" so the regex touches as few rows as possible.
+METRIC_FIELDS = {
+    "latency": {
+        "contains": "ms",
+        "pattern": LATENCY_PATTERN,
+        "dtypes": {"latency_ms": "float32"},
+    },
+    "pool": {
+        "contains": "pool",
+        "pattern": r'[Pp]ool (?:status|approaching limit): (?P<pool_active>\d+)/(?P<pool_size>\d+)',
+        "dtypes": {"pool_active": "Int32", "pool_size": "Int32"},
+    },
+    "rows": {
+        "contains": "Rows affected",
+        "pattern": r'Rows affected: (?P<rows_affected>\d+)',
+        "dtypes": {"rows_affected": "Int32"},
+    },
+}
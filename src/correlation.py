@@ -0,0 +1,114 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Columns identifying one error series
+SERIES_FIELDS = ("source_file", "component")
+
+def error_matrix(df: pd.DataFrame, bucket: str = "1min", by: Sequence[str] = SERIES_FIELDS) -> pd.DataFrame:
+    """Count errors per time bucket (rows) for each series (columns), including empty buckets."""
+    by = [field for field in by if field in df.columns]
+    if df.empty or not by or "timestamp" not in df.columns or "is_error" not in df.columns:
+        return pd.DataFrame()
+
+    buckets = df["timestamp"].dt.floor(bucket)
+    errors = df["is_error"].to_numpy(dtype=bool)
+    full_range = pd.date_range(buckets.iloc[0], buckets.iloc[-1], freq=bucket)
+    if not errors.any():
+        return pd.DataFrame(index=full_range)
+    keys = [buckets[errors]] + [df.loc[errors, field] for field in by]
+    counts = pd.Series(1, index=buckets.index[errors]).groupby(keys, observed=True).size()
+    counts = counts.unstack(list(range(1, len(by) + 1)), fill_value=0)
+    return counts.reindex(full_range, fill_value=0)
+
+def _series_name(key) -> str:
+    return "/".join(str(part) for part in key) if isinstance(key, tuple) else str(key)
+
+def detect_incidents(df: pd.DataFrame, bucket: str = "1min", threshold: float = 3.0, min_series: int = 2,
+                     min_count: int = 2, merge_gap: int = 1, by: Sequence[str] = SERIES_FIELDS) -> pd.DataFrame:
+    """Find time windows in which several error series spike together, most widespread first."""
+    return detect_incidents_from_matrix(error_matrix(df, bucket, by), threshold, min_series, min_count, merge_gap)
+
+def detect_incidents_from_matrix(matrix: pd.DataFrame, threshold: float = 3.0, min_series: int = 2,
+                                 min_count: int = 2, merge_gap: int = 1) -> pd.DataFrame:
+    """Find co-occurring spikes in a matrix of error counts per bucket and series.
+
+    A series spikes in a bucket when its error count is at least min_count and
+    more than threshold standard deviations above its mean. Spiking buckets no
+    more than merge_gap buckets apart are swept into one window, and windows
+    in which at least min_series distinct series spiked are reported.
+    """
+    columns = ["window_start", "window_end", "series_count", "sources", "components", "series",
+               "error_count", "expected", "score"]
+    if matrix.empty or matrix.shape[1] == 0:
+        return pd.DataFrame(columns=columns)
+
+    values = matrix.to_numpy(dtype=np.float64)
+    mean = values.mean(axis=0)
+    std = values.std(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deviation = (values - mean) / std
+    spikes = (deviation > threshold) & (values >= min_count)
+    rows = np.flatnonzero(spikes.any(axis=1))
+    if len(rows) == 0:
+        return pd.DataFrame(columns=columns)
+
+    # Source and component of each series, when the matrix is keyed by them
+    levels = {}
+    for position, name in enumerate(matrix.columns.names):
+        levels[name] = np.asarray(matrix.columns.get_level_values(position)).astype(str)
+    names = np.array([_series_name(key) for key in matrix.columns])
+    bucket_size = pd.Timedelta(matrix.index.freq) if matrix.index.freq is not None else pd.Timedelta(0)
+
+    # Sweep the spiking buckets in time order, starting a window after each larger gap
+    window_ids = np.cumsum(np.r_[True, np.diff(rows) > merge_gap + 1])
+    incidents = []
+    for window_rows in np.split(rows, np.flatnonzero(np.diff(window_ids)) + 1):
+        cells = spikes[window_rows]
+        spiking = np.flatnonzero(cells.any(axis=0))
+        if len(spiking) < min_series:
+            continue
+        counts = values[window_rows]
+        incidents.append({
+            "window_start": matrix.index[window_rows[0]],
+            "window_end": matrix.index[window_rows[-1]] + bucket_size,
+            "series_count": len(spiking),
+            "sources": ",".join(sorted(set(levels["source_file"][spiking]))) if "source_file" in levels else "",
+            "components": ",".join(sorted(set(levels["component"][spiking]))) if "component" in levels else "",
+            "series": ",".join(names[spiking]),
+            "error_count": int(counts[cells].sum()),
+            "expected": float(np.broadcast_to(mean, counts.shape)[cells].sum()),
+            "score": float(deviation[window_rows][cells].sum()),
+        })
+
+    if not incidents:
+        return pd.DataFrame(columns=columns)
+    result = pd.DataFrame(incidents, columns=columns)
+    return result.sort_values(["series_count", "score"], ascending=False, kind="stable").reset_index(drop=True)
+
+def correlated_series(matrix: pd.DataFrame, min_correlation: float = 0.5, limit: int = 10) -> pd.DataFrame:
+    """Return the pairs of error series whose bucket counts are most correlated."""
+    columns = ["series_a", "series_b", "correlation"]
+    values = matrix.to_numpy(dtype=np.float64)
+    active = values.std(axis=0) > 0
+    if active.sum() < 2:
+        return pd.DataFrame(columns=columns)
+
+    names = [_series_name(key) for key, keep in zip(matrix.columns, active) if keep]
+    correlation = np.corrcoef(values[:, active], rowvar=False)
+    first, second = np.triu_indices(len(names), k=1)
+    scores = correlation[first, second]
+    keep = np.flatnonzero(scores >= min_correlation)
+    keep = keep[np.argsort(scores[keep], kind="stable")[::-1]][:limit]
+    return pd.DataFrame({
+        "series_a": [names[i] for i in first[keep]],
+        "series_b": [names[i] for i in second[keep]],
+        "correlation": scores[keep],
+    }, columns=columns)
+
+def incident_report(df: pd.DataFrame, bucket: str = "1min", threshold: float = 3.0,
+                    min_series: int = 2) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Return the ranked incidents and the most correlated series pairs."""
+    matrix = error_matrix(df, bucket)
+    return detect_incidents_from_matrix(matrix, threshold, min_series), correlated_series(matrix)
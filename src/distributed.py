@@ -0,0 +1,166 @@
+import gzip
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Iterable, Tuple
+
+import pandas as pd
+
+from .ingestion import load_log_files, track_sketches
+from .processing import process_logs
+from .analysis import entry_weights
+from .sketches import LogSketches
+
+PARTIAL_VERSION = 1
+
+# Bucket size of the series used for anomaly detection, as in detect_anomalies
+BUCKET_FREQ = "5min"
+
+def build_partial(df: pd.DataFrame, sketches: LogSketches) -> Dict[str, Any]:
+    """Reduce a processed DataFrame to mergeable aggregates."""
+    # Rows folded from repeated lines count once per line
+    weights = entry_weights(df)
+    if weights is None:
+        weights = pd.Series(1, index=df.index)
+    partial = {
+        "version": PARTIAL_VERSION,
+        "total_logs": int(weights.sum()),
+        "error_logs": int(weights[df["is_error"]].sum()) if "is_error" in df.columns else 0,
+        "component_counts": {},
+        "level_counts": {},
+        "hourly_counts": {},
+        "bucket_counts": {},
+        "sketches": sketches.to_dict(),
+    }
+    if df.empty:
+        return partial
+
+    if "component" in df.columns:
+        totals = weights.groupby(df["component"]).sum()
+        errors = (weights[df["is_error"]].groupby(df.loc[df["is_error"], "component"]).sum()
+                  if "is_error" in df.columns else pd.Series(dtype=int))
+        partial["component_counts"] = {
+            str(component): [int(total), int(errors.get(component, 0))]
+            for component, total in totals.items()
+        }
+    if "level" in df.columns:
+        level_counts = weights.groupby(df["level"]).sum()
+        partial["level_counts"] = {str(level): int(count) for level, count in level_counts.items()}
+    if "hour" in df.columns:
+        hourly_counts = weights.groupby(df["hour"]).sum()
+        partial["hourly_counts"] = {str(hour): int(count) for hour, count in hourly_counts.items()}
+    if "timestamp" in df.columns:
+        buckets = weights.groupby(df["timestamp"].dt.floor(BUCKET_FREQ)).sum()
+        partial["bucket_counts"] = {bucket.isoformat(): int(count) for bucket, count in buckets.items()}
+
+    return partial
+
+def _add_counts(target: Dict[str, int], source: Dict[str, int]):
+    for key, count in source.items():
+        target[key] = target.get(key, 0) + count
+
+def merge_partials(partials: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge partial aggregates from several nodes into one."""
+    merged = {
+        "version": PARTIAL_VERSION,
+        "total_logs": 0,
+        "error_logs": 0,
+        "component_counts": {},
+        "level_counts": {},
+        "hourly_counts": {},
+        "bucket_counts": {},
+    }
+    sketches = None
+    for partial in partials:
+        if partial.get("version") != PARTIAL_VERSION:
+            raise ValueError(f"Unsupported partial version: {partial.get('version')}")
+        merged["total_logs"] += partial["total_logs"]
+        merged["error_logs"] += partial["error_logs"]
+        for component, (total, errors) in partial["component_counts"].items():
+            current = merged["component_counts"].setdefault(component, [0, 0])
+            current[0] += total
+            current[1] += errors
+        _add_counts(merged["level_counts"], partial["level_counts"])
+        _add_counts(merged["hourly_counts"], partial["hourly_counts"])
+        _add_counts(merged["bucket_counts"], partial["bucket_counts"])
+
+        node_sketches = LogSketches.from_dict(partial["sketches"])
+        if sketches is None:
+            sketches = node_sketches
+        else:
+            sketches.merge(node_sketches)
+
+    merged["sketches"] = (sketches or LogSketches()).to_dict()
+    return merged
+
+def write_partial(partial: Dict[str, Any], path: Path):
+    """Write partial aggregates as compressed JSON."""
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        json.dump(partial, file, separators=(",", ":"))
+
+def read_partial(path: Path) -> Dict[str, Any]:
+    """Read partial aggregates written by write_partial."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        return json.load(file)
+
+def partial_error_rate(partial: Dict[str, Any]) -> float:
+    """Calculate the percentage of error logs, as get_error_rate."""
+    if not partial["total_logs"]:
+        return 0.0
+    return partial["error_logs"] / partial["total_logs"] * 100
+
+def partial_busiest_hour(partial: Dict[str, Any]) -> Tuple[int, int]:
+    """Find the hour with most log entries, as find_busiest_hour."""
+    if not partial["hourly_counts"]:
+        return (0, 0)
+    hour, count = max(partial["hourly_counts"].items(), key=lambda item: item[1])
+    return (int(hour), count)
+
+def partial_component_stats(partial: Dict[str, Any]) -> pd.DataFrame:
+    """Build the same table as get_component_stats."""
+    if not partial["component_counts"]:
+        return pd.DataFrame()
+    component_stats = pd.DataFrame.from_dict(
+        partial["component_counts"], orient="index", columns=["total_logs", "error_logs"]
+    )
+    component_stats = component_stats.sort_index()
+    component_stats.index.name = "component"
+    component_stats["error_rate"] = (component_stats["error_logs"] / component_stats["total_logs"]) * 100
+    return component_stats.sort_values("total_logs", ascending=False)
+
+def partial_bucket_counts(partial: Dict[str, Any]) -> pd.Series:
+    """Rebuild the log count series per bucket, including empty buckets."""
+    if not partial["bucket_counts"]:
+        return pd.Series(dtype="int64")
+    counts = pd.Series(partial["bucket_counts"])
+    counts.index = pd.to_datetime(counts.index)
+    counts = counts.sort_index()
+    full_range = pd.date_range(counts.index.min(), counts.index.max(), freq=BUCKET_FREQ)
+    return counts.reindex(full_range, fill_value=0)
+
+def create_partial(file_paths: List[Path], log_format: str = "standard") -> Dict[str, Any]:
+    """Ingest and analyse log files locally, returning partial aggregates."""
+    sketches = LogSketches()
+    df = process_logs(track_sketches(load_log_files(file_paths, log_format), sketches))
+    return build_partial(df, sketches)
+
+def _run_worker(file_paths: List[Path], log_format: str, output_path: Path) -> Path:
+    write_partial(create_partial(file_paths, log_format), output_path)
+    return output_path
+
+def run_local_workers(file_paths: List[Path], log_format: str, partial_dir: Path,
+                      workers: int = 2) -> List[Path]:
+    """Split files across worker processes standing in for nodes.
+
+    Each worker writes one partial file to partial_dir; the paths are returned
+    for merging by the coordinator.
+    """
+    partial_dir.mkdir(parents=True, exist_ok=True)
+    assignments = [file_paths[i::workers] for i in range(workers)]
+    assignments = [files for files in assignments if files]
+    with ProcessPoolExecutor(max_workers=len(assignments) or 1) as executor:
+        futures = [
+            executor.submit(_run_worker, files, log_format, partial_dir / f"node_{i}.json.gz")
+            for i, files in enumerate(assignments)
+        ]
+        return [future.result() for future in futures]
@@ -0,0 +1,128 @@
+from pathlib import Path
+from typing import Any, Dict, NamedTuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from .analysis import entry_weights
+from .distributed import partial_bucket_counts
+
+# Points per trace above which series are thinned before plotting
+MAX_POINTS = 20000
+
+class ReportData(NamedTuple):
+    """Aggregates an interactive report is drawn from; none of them grow with the number of rows."""
+    total_logs: float
+    error_rate: float
+    level_counts: pd.Series
+    hourly_counts: pd.Series
+    component_stats: pd.DataFrame
+    series: pd.DataFrame
+    anomalies: pd.DataFrame
+
+def level_series(df: pd.DataFrame, bucket: str = "5min") -> pd.DataFrame:
+    """Count entries per time bucket (rows) and level (columns), weighted like the CLI counts."""
+    if df.empty or "timestamp" not in df.columns:
+        return pd.DataFrame()
+    weights = entry_weights(df)
+    if weights is None:
+        weights = pd.Series(1, index=df.index)
+    keys = [df["timestamp"].dt.floor(bucket)]
+    if "level" in df.columns:
+        keys.append(df["level"])
+    counts = weights.groupby(keys, observed=True).sum()
+    counts = counts.unstack(fill_value=0) if "level" in df.columns else counts.to_frame("total")
+    full_range = pd.date_range(counts.index.min(), counts.index.max(), freq=bucket)
+    return counts.reindex(full_range, fill_value=0)
+
+def report_data_from_frame(df: pd.DataFrame, error_rate: float, component_stats: pd.DataFrame,
+                           anomalies: pd.DataFrame, bucket: str = "5min") -> ReportData:
+    """Collect report aggregates from a processed DataFrame and the statistics already computed for it."""
+    series = level_series(df, bucket)
+    weights = entry_weights(df)
+    if weights is None:
+        weights = pd.Series(1, index=df.index)
+    level_counts = weights.groupby(df["level"]).sum() if "level" in df.columns else pd.Series(dtype=float)
+    hourly_counts = weights.groupby(df["hour"]).sum() if "hour" in df.columns else pd.Series(dtype=float)
+    return ReportData(float(weights.sum()), error_rate, level_counts, hourly_counts, component_stats,
+                      series, anomalies)
+
+def report_data_from_partial(partial: Dict[str, Any], error_rate: float, component_stats: pd.DataFrame,
+                             anomalies: pd.DataFrame) -> ReportData:
+    """Collect report aggregates from merged partial results, which only count volume per 5 minutes."""
+    hourly_counts = pd.Series(partial["hourly_counts"], dtype=float)
+    hourly_counts.index = hourly_counts.index.astype(int)
+    return ReportData(float(partial["total_logs"]), error_rate, pd.Series(partial["level_counts"], dtype=float),
+                      hourly_counts, component_stats, partial_bucket_counts(partial).to_frame("total"), anomalies)
+
+def downsample(series: pd.Series, max_points: int = MAX_POINTS) -> pd.Series:
+    """Thin a series to about max_points, keeping the minimum and maximum of each stretch.
+
+    Spikes and dips survive, unlike with averaging or taking every n-th point.
+    """
+    if len(series) <= max_points:
+        return series
+    stretch = int(np.ceil(len(series) / (max_points // 2)))
+    values = series.to_numpy()
+    padded = np.pad(values.astype(np.float64), (0, -len(values) % stretch), constant_values=np.nan)
+    starts = np.arange(0, len(padded), stretch)
+    blocks = padded.reshape(-1, stretch)
+    keep = np.unique(np.concatenate([starts + np.nanargmin(blocks, axis=1), starts + np.nanargmax(blocks, axis=1)]))
+    return series.iloc[keep]
+
+def volume_figure(data: ReportData, max_points: int = MAX_POINTS) -> go.Figure:
+    """Volume per level and in total over time as WebGL traces, with anomalies marked and a range slider."""
+    figure = go.Figure()
+    series = data.series
+    if len(series.columns) > 1:
+        series = series.assign(total=series.sum(axis=1))
+    for column in series.columns:
+        points = downsample(series[column], max_points)
+        figure.add_trace(go.Scattergl(x=points.index, y=points.to_numpy(), mode="lines", name=str(column)))
+    if not data.anomalies.empty and {"timestamp", "log_count"} <= set(data.anomalies.columns):
+        figure.add_trace(go.Scattergl(
+            x=data.anomalies["timestamp"], y=data.anomalies["log_count"], mode="markers", name="anomaly",
+            marker={"color": "red", "size": 9, "symbol": "x"},
+            customdata=data.anomalies[["expected", "deviation"]],
+            hovertemplate="%{y} entries, expected %{customdata[0]:.0f} (%{customdata[1]:.1f} sd)<extra></extra>",
+        ))
+    figure.update_layout(title="Log Volume Over Time", xaxis={"rangeslider": {"visible": True}, "type": "date"},
+                         yaxis_title="Number of Logs", hovermode="x unified", height=500)
+    return figure
+
+def level_figure(data: ReportData) -> go.Figure:
+    figure = go.Figure(go.Pie(labels=data.level_counts.index.astype(str), values=data.level_counts.to_numpy()))
+    figure.update_layout(title="Log Level Distribution", height=400)
+    return figure
+
+def hourly_figure(data: ReportData) -> go.Figure:
+    hourly = data.hourly_counts.sort_index()
+    figure = go.Figure(go.Bar(x=hourly.index, y=hourly.to_numpy()))
+    figure.update_layout(title="Log Distribution by Hour", xaxis_title="Hour of Day", yaxis_title="Number of Logs",
+                         xaxis={"dtick": 1}, height=400)
+    return figure
+
+def component_figure(data: ReportData) -> go.Figure:
+    stats = data.component_stats
+    figure = go.Figure()
+    if not stats.empty:
+        stats = stats.sort_values("error_rate", ascending=False)
+        figure.add_trace(go.Bar(x=stats.index.astype(str), y=stats["error_rate"], customdata=stats[["total_logs"]],
+                                hovertemplate="%{x}: %{y:.2f}% of %{customdata[0]} entries<extra></extra>"))
+    figure.update_layout(title="Error Rate by Component", yaxis_title="Error Rate (%)", height=400)
+    return figure
+
+def write_html_report(data: ReportData, output_path: Path, title: str = "Log Analysis Report") -> Path:
+    """Write a self-contained interactive HTML report; plotly.js is embedded once so it works offline."""
+    figures = [volume_figure(data), level_figure(data), hourly_figure(data), component_figure(data)]
+    parts = [figure.to_html(full_html=False, include_plotlyjs=(index == 0))
+             for index, figure in enumerate(figures)]
+    summary = (f"{data.total_logs:,.0f} log entries, {data.error_rate:.2f}% errors, "
+               f"{len(data.anomalies)} anomalies")
+    html = (f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{title}</title>\n</head>\n"
+            f"<body style=\"font-family: sans-serif\">\n<h1>{title}</h1>\n<p>{summary}</p>\n"
+            + "\n".join(parts) + "\n</body>\n</html>\n")
+    path = output_path / "report.html"
+    path.write_text(html, encoding="utf-8")
+    return path
@@ -1,8 +1,14 @@
+import gzip
+import random
 import re
+import time
+import zlib
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Any, Generator, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Generator, Iterable, Optional
+from datetime import datetime, timedelta
 from .config.log_formats import LOG_FORMATS
+from .sketches import LogSketches
 
 class LogParser:
     def __init__(self, format_name: str = "standard"):
@@ -38,26 +44,386 @@ class LogParser:
         parsed["parsed"] = True
         return parsed
 
-def read_logs(file_path: Path, format_name: str = "standard") -> Generator[Dict[str, Any], None, None]:
-    """Read a log file and yield parsed log entries."""
-    parser = LogParser(format_name)
-    
+def find_log_files(directory: Path, archives: bool = False) -> List[Path]:
+    """Return the log files of a directory in name order, with gzipped ones (*.log.gz) if requested."""
+    file_paths = list(directory.glob('*.log'))
+    if archives:
+        file_paths += directory.glob('*.log.gz')
+    return sorted(file_paths)
+
+def _open_text(file_path: Path, encoding: str):
+    if file_path.suffix == '.gz':
+        return gzip.open(file_path, 'rt', encoding=encoding)
+    return open(file_path, 'r', encoding=encoding)
+
+def read_lines(file_path: Path) -> Generator[str, None, None]:
+    """Read the non-empty lines of a log file, decompressing gzipped files."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
+        with _open_text(file_path, 'utf-8') as file:
             for line in file:
                 if line.strip():  # Skip empty lines
-                    yield parser.parse_line(line)
+                    yield line
     except UnicodeDecodeError:
         # Try with a different encoding if UTF-8 fails
-        with open(file_path, 'r', encoding='latin-1') as file:
+        with _open_text(file_path, 'latin-1') as file:
             for line in file:
                 if line.strip():
-                    yield parser.parse_line(line)
+                    yield line
+
+# Unparsed lines that continue the previous entry, such as stack trace lines
+_CONTINUATION_PATTERN = re.compile(r'\s|Traceback \(|Caused by:|[\w.$]+(?:Error|Exception)\b|\.\.\. \d+ more')
+
+# Continuation lines attached to one entry at most; later ones are quarantined
+MAX_CONTINUATION_LINES = 500
+
+class Quarantine:
+    """Collects lines that could not be parsed, counted per file and optionally written to a file.
+    
+    Lines are written to the quarantine file (created on the first bad line)
+    as "<source file>\t<line>" as they are found, so the parsed entries never
+    carry them.
+    """
+    
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path is not None else None
+        self.counts: Dict[str, int] = {}
+        self._file = None
+    
+    def add(self, source_file: str, line: str):
+        self.counts[source_file] = self.counts.get(source_file, 0) + 1
+        if self.path is not None:
+            if self._file is None:
+                self._file = open(self.path, 'w', encoding='utf-8')
+            self._file.write(f"{source_file}\t{line.rstrip()}\n")
+    
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class EntryAssembler:
+    """Assembles the lines of one source into entries as they arrive.
+    
+    An entry is only complete once the next entry starts, since continuation
+    lines may still follow it; feed() returns the entry a new line completes
+    and flush() the entry still held.
+    """
+    
+    def __init__(self, parser: LogParser, source_file: Optional[str] = None,
+                 quarantine: Optional[Quarantine] = None):
+        self.parser = parser
+        self.source_file = source_file
+        self.quarantine = quarantine
+        self.pending: Optional[Dict[str, Any]] = None
+        self.continued = 0
+    
+    def feed(self, line: str) -> Optional[Dict[str, Any]]:
+        log_entry = self.parser.parse_line(line)
+        if log_entry["parsed"]:
+            completed = self.pending
+            self.pending = log_entry
+            self.continued = 0
+            if self.source_file is not None:
+                log_entry["source_file"] = self.source_file
+            return completed
+        
+        pending = self.pending
+        if (pending is not None and "message" in pending and self.continued < MAX_CONTINUATION_LINES
+                and _CONTINUATION_PATTERN.match(line)):
+            pending["message"] += "\n" + line.rstrip()
+            self.continued += 1
+        elif self.quarantine is not None:
+            self.quarantine.add(self.source_file or "", line)
+        return None
+    
+    def flush(self) -> Optional[Dict[str, Any]]:
+        completed, self.pending = self.pending, None
+        return completed
+
+def assemble_entries(lines: Iterable[str], parser: LogParser, source_file: Optional[str] = None,
+                     quarantine: Optional[Quarantine] = None) -> Generator[Dict[str, Any], None, None]:
+    """Parse lines into entries, attaching continuation lines to the entry before them.
+    
+    An unparsed line continues the previous entry when it is indented or
+    looks like part of a stack trace; it is appended to that entry's message.
+    Other unparsed lines go to the quarantine (or are dropped), so only
+    parsed entries are yielded.
+    """
+    assembler = EntryAssembler(parser, source_file, quarantine)
+    feed = assembler.feed
+    for line in lines:
+        log_entry = feed(line)
+        if log_entry is not None:
+            yield log_entry
+    
+    log_entry = assembler.flush()
+    if log_entry is not None:
+        yield log_entry
+
+def read_logs(file_path: Path, format_name: str = "standard",
+              quarantine: Optional[Quarantine] = None) -> Generator[Dict[str, Any], None, None]:
+    """Read a log file and yield parsed log entries, with multi-line entries assembled."""
+    parser = LogParser(format_name)
+    yield from assemble_entries(read_lines(file_path), parser, file_path.name, quarantine)
 
-def load_multiple_logs(directory: Path, format_name: str = "standard") -> Generator[Dict[str, Any], None, None]:
+def load_multiple_logs(directory: Path, format_name: str = "standard",
+                       quarantine: Optional[Quarantine] = None) -> Generator[Dict[str, Any], None, None]:
     """Process all log files in a directory."""
-    for file_path in directory.glob('*.log'):
-        for log_entry in read_logs(file_path, format_name):
-            # Add source file information
-            log_entry["source_file"] = file_path.name
+    yield from load_log_files(find_log_files(directory), format_name, quarantine)
+
+def load_log_files(file_paths: Iterable[Path], format_name: str = "standard",
+                   quarantine: Optional[Quarantine] = None) -> Generator[Dict[str, Any], None, None]:
+    """Process the given log files in order; entries carry their source file name."""
+    for file_path in file_paths:
+        yield from read_logs(file_path, format_name, quarantine)
+
+# Sampling strategies: a fixed-size uniform reservoir, a deterministic fraction
+# chosen by hashing a key, or a fraction of ordinary lines plus every error line
+SAMPLING_MODES = ("reservoir", "hash", "stratified")
+
+# Lines that stratified sampling always keeps, found without parsing the line
+_ERROR_MARKER = re.compile(r'\[(?:ERROR|CRITICAL|FATAL)\]')
+
+def _hash_fraction(value: str) -> float:
+    """Map a value to a stable number in [0, 1)."""
+    return zlib.crc32(value.encode('utf-8', errors='replace')) / 2**32
+
+def _line_groups(lines: Iterable[str]) -> Generator[List[str], None, None]:
+    """Group lines into an entry's first line and the continuation-like lines after it, without parsing."""
+    group: List[str] = []
+    for line in lines:
+        if group and not _CONTINUATION_PATTERN.match(line):
+            yield group
+            group = []
+        group.append(line)
+    if group:
+        yield group
+
+def sample_logs(directory: Path, format_name: str = "standard", mode: str = "hash", rate: float = 0.1,
+                size: int = 100000, key: Optional[str] = None, seed: int = 0,
+                quarantine: Optional[Quarantine] = None) -> Generator[Dict[str, Any], None, None]:
+    """Yield a sample of the parsed entries of a directory, each with a sample_weight.
+    
+    A sampled entry stands for sample_weight entries of the full data.
+    Entries are chosen by their first line, and continuation lines follow
+    that choice, so kept entries keep their stack traces. Lines are dropped
+    before parsing except when hashing by a parsed field, so a small sample
+    is read at close to the speed of the disk; unparsed lines that are kept
+    go to the quarantine.
+    
+    - reservoir: a uniform sample of at most size entries, parsed at the end
+    - hash: entries (or entries with the same value of key) whose hash falls
+      below rate, so repeated runs and related entries select alike
+    - stratified: every ERROR, CRITICAL or FATAL entry plus a hash sample of
+      the other entries at rate
+    """
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unsupported sampling mode: {mode}")
+    if mode != "reservoir" and not 0 < rate <= 1:
+        raise ValueError("Sampling rate must be in (0, 1]")
+    if mode == "reservoir" and size < 1:
+        raise ValueError("Sample size must be positive")
+    parser = LogParser(format_name)
+    file_paths = find_log_files(directory)
+    
+    if mode == "reservoir":
+        # Algorithm R: each entry seen so far is in the reservoir with equal probability
+        random_state = random.Random(seed)
+        reservoir: List[tuple] = []
+        seen = 0
+        for file_path in file_paths:
+            for group in _line_groups(read_lines(file_path)):
+                seen += 1
+                if len(reservoir) < size:
+                    reservoir.append((group, file_path.name))
+                else:
+                    slot = random_state.randrange(seen)
+                    if slot < size:
+                        reservoir[slot] = (group, file_path.name)
+        weight = seen / len(reservoir) if reservoir else 1.0
+        for group, source_file in reservoir:
+            for log_entry in assemble_entries(group, parser, source_file, quarantine):
+                log_entry["sample_weight"] = weight
+                yield log_entry
+        return
+    
+    for file_path in file_paths:
+        if mode == "hash" and key is not None:
+            for log_entry in read_logs(file_path, format_name, quarantine):
+                if _hash_fraction(str(log_entry.get(key, ""))) < rate:
+                    log_entry["sample_weight"] = 1 / rate
+                    yield log_entry
+            continue
+        
+        # The first line of an entry decides; continuation lines follow that decision
+        assembler = EntryAssembler(parser, file_path.name, quarantine)
+        weight = None
+        for line in read_lines(file_path):
+            if not _CONTINUATION_PATTERN.match(line):
+                if mode == "stratified" and _ERROR_MARKER.search(line):
+                    weight = 1.0
+                elif _hash_fraction(line) < rate:
+                    weight = 1 / rate
+                else:
+                    weight = None
+                    continue
+                previous = assembler.pending
+                log_entry = assembler.feed(line)
+                if assembler.pending is not previous:
+                    assembler.pending["sample_weight"] = weight
+            elif weight is not None:
+                log_entry = assembler.feed(line)
+            else:
+                continue
+            if log_entry is not None:
+                yield log_entry
+        log_entry = assembler.flush()
+        if log_entry is not None:
+            yield log_entry
+
+def track_sketches(logs: Iterable[Dict[str, Any]], sketches: LogSketches) -> Generator[Dict[str, Any], None, None]:
+    """Update sketches with each log entry as it passes through ingestion."""
+    for log_entry in logs:
+        sketches.update(log_entry)
+        yield log_entry
+
+# Ways repeated entries can be matched when collapsing them
+COLLAPSE_MODES = ("line", "template")
+
+# Variable parts of a message (numbers, hex values) masked to get its template
+_VARIABLE_PATTERN = re.compile(r'0x[0-9a-fA-F]+|\d+(?:\.\d+)*')
+
+def message_template(message: str) -> str:
+    """Replace the variable parts of a message with <*>."""
+    return _VARIABLE_PATTERN.sub("<*>", message)
+
+def collapse_repeats(logs: Iterable[Dict[str, Any]], window: float = 1.0, by: str = "line",
+                     max_pending: int = 10000) -> Generator[Dict[str, Any], None, None]:
+    """Fold repeated entries within window seconds into one entry with a repeat count.
+    
+    Entries repeat when every field but the timestamp is equal (by="line"), or
+    when only the variable parts of the message differ (by="template"), in
+    which case the first message is kept. A folded entry keeps the timestamp
+    of the first occurrence and gets repeat_count and last_timestamp fields.
+    At most max_pending distinct entries are held back at a time; the oldest
+    is released early when the limit is reached.
+    """
+    if by not in COLLAPSE_MODES:
+        raise ValueError(f"Unsupported collapse mode: {by}")
+    window = timedelta(seconds=window)
+    pending: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+    
+    for log_entry in logs:
+        timestamp = log_entry.get("timestamp")
+        if not log_entry.get("parsed", True) or not isinstance(timestamp, datetime):
             yield log_entry
+            continue
+        
+        # Release entries whose window has passed; they are held in order of first occurrence
+        while pending:
+            first = next(iter(pending.values()))
+            if timestamp - first["timestamp"] <= window:
+                break
+            yield pending.popitem(last=False)[1]
+        
+        fields = {name: value for name, value in log_entry.items() if name != "timestamp"}
+        if by == "template":
+            for name in ("message", "request"):
+                if isinstance(fields.get(name), str):
+                    fields[name] = message_template(fields[name])
+        key = tuple(sorted(fields.items()))
+        
+        folded = pending.get(key)
+        if folded is not None and timestamp >= folded["timestamp"]:
+            folded["repeat_count"] += 1
+            folded["last_timestamp"] = max(folded["last_timestamp"], timestamp)
+            continue
+        if folded is not None:
+            yield pending.pop(key)
+        elif len(pending) >= max_pending:
+            yield pending.popitem(last=False)[1]
+        log_entry["repeat_count"] = 1
+        log_entry["last_timestamp"] = timestamp
+        pending[key] = log_entry
+    
+    yield from pending.values()
+
+def log_file_offsets(directory: Path) -> Dict[Path, int]:
+    """Return the current size of each log file in a directory."""
+    return {file_path: file_path.stat().st_size for file_path in directory.glob('*.log')}
+
+def follow_logs(directory: Path, format_name: str = "standard", offsets: Optional[Dict[Path, int]] = None,
+                poll_interval: float = 1.0, max_batch: int = 10000,
+                quarantine: Optional[Quarantine] = None,
+                continuation_wait: float = 1.0) -> Generator[List[Dict[str, Any]], None, None]:
+    """Tail the log files in a directory, yielding batches of newly appended entries.
+
+    Reading starts at the given offsets (the current end of each file by
+    default); files that appear later are read from the start and files that
+    shrink are assumed to have been rotated. Only complete lines are consumed.
+    The last entry of each file is held until the next entry starts or the
+    file has had no new lines for continuation_wait seconds, so a stack
+    trace written after its entry is still attached to it.
+    """
+    # Offsets are taken now, not when iteration starts
+    parser = LogParser(format_name)
+    offsets = dict(log_file_offsets(directory) if offsets is None else offsets)
+    return _follow(directory, parser, offsets, poll_interval, max_batch, quarantine, continuation_wait)
+
+def _follow(directory: Path, parser: LogParser, offsets: Dict[Path, int], poll_interval: float, max_batch: int,
+            quarantine: Optional[Quarantine], continuation_wait: float) -> Generator[List[Dict[str, Any]], None, None]:
+    # One assembler per file, with the time it last received lines
+    assemblers: Dict[Path, EntryAssembler] = {}
+    updated: Dict[Path, float] = {}
+    while True:
+        batch = []
+        touched = set()
+        for file_path in find_log_files(directory):
+            size = file_path.stat().st_size
+            offset = offsets.get(file_path, 0)
+            if size < offset:
+                offset = 0
+                # A rotated file starts new entries
+                if file_path in assemblers:
+                    held = assemblers[file_path].flush()
+                    if held is not None:
+                        batch.append(held)
+            if size == offset:
+                continue
+            
+            with open(file_path, 'rb') as file:
+                file.seek(offset)
+                data = file.read(size - offset)
+            complete = data.rfind(b'\n') + 1
+            offsets[file_path] = offset + complete
+            if not complete:
+                continue
+            
+            assembler = assemblers.get(file_path)
+            if assembler is None:
+                assembler = assemblers[file_path] = EntryAssembler(parser, file_path.name, quarantine)
+            for line in data[:complete].decode('utf-8', errors='replace').splitlines():
+                if line.strip():
+                    log_entry = assembler.feed(line)
+                    if log_entry is not None:
+                        batch.append(log_entry)
+            touched.add(file_path)
+            updated[file_path] = time.monotonic()
+            if len(batch) >= max_batch:
+                break
+        
+        # Entries of files that went quiet cannot gain more continuation lines
+        now = time.monotonic()
+        for file_path, assembler in assemblers.items():
+            if (assembler.pending is not None and file_path not in touched
+                    and now - updated[file_path] >= continuation_wait):
+                batch.append(assembler.flush())
+        
+        if batch:
+            yield batch
+        else:
+            time.sleep(poll_interval)
@@ -1,106 +1,514 @@
 from pathlib import Path
-import pandas as pd
-import matplotlib.pyplot as plt
 import argparse
+from typing import Any, Dict, List
 import sys
 import time
 
-from src.ingestion import load_multiple_logs
-from src.processing import logs_to_dataframe, preprocess_dataframe, enrich_data
-from src.analysis import get_error_rate, find_busiest_hour, get_component_stats, detect_anomalies
-from src.visualization import create_log_level_distribution, create_hourly_distribution, create_component_error_chart, create_time_series_plot
-from src.web.app import run_server
+# Heavy dependencies (pandas, matplotlib, Flask) are imported by the commands that use them,
+# so --help and light commands start quickly.
 
-def main():
-    # Parse command line arguments
-    parser = argparse.ArgumentParser(description='Analyze log files and generate insights.')
-    parser.add_argument('--log-dir', type=str, default='./data', 
-                        help='Directory containing log files')
-    parser.add_argument('--output-dir', type=str, default='./output', 
-                        help='Directory to save output files')
-    parser.add_argument('--anomaly-threshold', type=float, default=3.0, 
-                        help='Threshold for anomaly detection (standard deviations)')
-    parser.add_argument('--log-format', type=str, default='standard',
-                        choices=['standard', 'nginx', 'apache'],
-                        help='Log format to parse')
-    parser.add_argument('--verbose', action='store_true', 
-                        help='Print verbose output')
-    parser.add_argument('--web', action='store_true',
-                    help='Start the web interface')
-    parser.add_argument('--web-debug', action='store_true',
-                    help='Run web interface in debug mode')
+LOG_FORMATS = ['standard', 'nginx', 'apache']
+COMMANDS = ('analyze', 'web', 'query', 'grep')
+
+def print_basic_report(error_rate: float, busiest_hour: int, count: int,
+                       component_stats: "pd.DataFrame", anomalies: "pd.DataFrame"):
+    """Print overall, component and anomaly statistics."""
+    print("\n--- Basic Statistics ---")
+    print(f"Overall error rate: {error_rate:.2f}%")
+    print(f"Busiest hour: {busiest_hour}:00 with {count:.0f} entries")
+    
+    # Component analysis
+    print("\n--- Top Components by Volume ---")
+    print(component_stats.head().to_string())
     
-    args = parser.parse_args()
+    # Anomaly detection
+    print("\n--- Anomaly Detection ---")
+    if not anomalies.empty:
+        print(f"Detected {len(anomalies)} anomalies")
+        print(anomalies.head().to_string() if len(anomalies) > 5 else anomalies.to_string())
+    else:
+        print("No anomalies detected")
+
+def print_sketch_report(sketches: "LogSketches"):
+    """Print approximate statistics from ingestion sketches."""
+    from src.analysis import get_distinct_counts, get_latency_percentiles
+    
+    print("\n--- Approximate Field Statistics ---")
+    for field, distinct in get_distinct_counts(sketches).items():
+        print(f"Distinct {field} values: ~{distinct}")
+    percentiles = get_latency_percentiles(sketches)
+    if percentiles["p50"] is not None:
+        print("Latency: " + ", ".join(f"{name}={value:.0f}ms" for name, value in percentiles.items()))
+
+def merge_and_report(partial_paths: List[Path], output_dir: Path, threshold: float, charts: bool = True,
+                     anomaly_method: str = "rolling", season: str = "day", html: bool = False):
+    """Merge partial aggregates from several nodes and print the report."""
+    from src.distributed import read_partial, merge_partials
     
+    try:
+        print(f"Merging {len(partial_paths)} partial results...")
+        partial = merge_partials(read_partial(path) for path in partial_paths)
+        print(f"Merged statistics for {partial['total_logs']} log entries")
+    except Exception as e:
+        print(f"Error reading partial results: {e}")
+        sys.exit(1)
+    
+    report_partial(partial, output_dir, threshold, charts, anomaly_method, season, html)
+
+def report_partial(partial: Dict[str, Any], output_dir: Path, threshold: float, charts: bool = True,
+                   anomaly_method: str = "rolling", season: str = "day", html: bool = False):
+    """Print the report and write the outputs that can be built from partial aggregates."""
+    import pandas as pd
+    from src.analysis import detect_anomalies_from_counts, get_component_latency_percentiles
+    from src.sketches import LogSketches
+    from src.distributed import (
+        partial_error_rate, partial_busiest_hour, partial_component_stats, partial_bucket_counts,
+    )
+    
+    try:
+        busiest_hour, count = partial_busiest_hour(partial)
+        component_stats = partial_component_stats(partial)
+        if anomaly_method == "seasonal":
+            from src.anomaly import detect_seasonal_anomalies_from_counts
+            anomalies = detect_seasonal_anomalies_from_counts(partial_bucket_counts(partial), threshold, season)
+        else:
+            anomalies = detect_anomalies_from_counts(partial_bucket_counts(partial), threshold)
+        print_basic_report(partial_error_rate(partial), busiest_hour, count, component_stats, anomalies)
+        
+        # Gap detection needs raw timestamps, so it is only reported per node
+        sketches = LogSketches.from_dict(partial["sketches"])
+        latency_stats = get_component_latency_percentiles(sketches)
+        if not latency_stats.empty:
+            print("\n--- Latency by Component (ms, approximate) ---")
+            print(latency_stats.round(1).to_string())
+        
+        print_sketch_report(sketches)
+        
+        print(f"\nSaving outputs to {output_dir}...")
+        component_stats.to_csv(output_dir / "component_stats.csv")
+        if not anomalies.empty:
+            anomalies.to_csv(output_dir / "anomalies.csv")
+        
+        if html:
+            from src.html_report import report_data_from_partial, write_html_report
+            report_data = report_data_from_partial(partial, partial_error_rate(partial), component_stats, anomalies)
+            print(f"Interactive report written to {write_html_report(report_data, output_dir)}")
+        
+        if not charts:
+            return
+        
+        # Charts that can be drawn from the merged counts
+        from src.visualization import (
+            plot_level_counts, plot_hourly_counts, plot_component_error_rates, plot_volume_series,
+        )
+        print("Creating visualizations...")
+        if partial["level_counts"]:
+            plot_level_counts(pd.Series(partial["level_counts"]), output_dir)
+        if partial["hourly_counts"]:
+            hourly = pd.Series(partial["hourly_counts"])
+            hourly.index = hourly.index.astype(int)
+            plot_hourly_counts(hourly, output_dir)
+        if not component_stats.empty:
+            plot_component_error_rates(component_stats["error_rate"], output_dir)
+        buckets = partial_bucket_counts(partial)
+        if not buckets.empty:
+            plot_volume_series(buckets.resample("15min").sum(), output_dir)
+    except Exception as e:
+        print(f"Error analyzing partial results: {e}")
+        sys.exit(1)
+
+def read_log_dir(log_dir: Path, args, quarantine: "Quarantine" = None) -> "Iterable[Dict[str, Any]]":
+    """Parsed entries of a log directory, or a sample of them when --sample is given."""
+    from src.ingestion import load_multiple_logs, sample_logs
+    
+    if not args.sample:
+        return load_multiple_logs(log_dir, args.log_format, quarantine)
+    return sample_logs(log_dir, args.log_format, args.sample, args.sample_rate, args.sample_size, args.sample_key,
+                       quarantine=quarantine)
+
+def print_quarantine_report(quarantine: "Quarantine"):
+    """Print how many lines of each file could not be parsed."""
+    if not quarantine.total:
+        return
+    print("\n--- Unparsed Lines ---")
+    for source_file, count in sorted(quarantine.counts.items(), key=lambda item: -item[1]):
+        print(f"{source_file}: {count}")
+    if quarantine.path is not None:
+        print(f"Written to {quarantine.path}")
+
+def print_sampling_report(df: "pd.DataFrame"):
+    """Print totals estimated from a sampled run, with 95% margins."""
+    from src.analysis import get_sampling_error
+    
+    estimate = get_sampling_error(df)
+    if not estimate:
+        return
+    print("\n--- Sampling ---")
+    print(f"Counts are estimated from {estimate['sampled_rows']} sampled entries")
+    print(f"Estimated entries: {estimate['total_logs']:.0f} ± {estimate['total_logs_margin']:.0f}")
+    print(f"Estimated error rate: {estimate['error_rate']:.2f}% ± {estimate['error_rate_margin']:.2f}%")
+
+def run_query_command(args):
+    """Run an ad-hoc aggregation query over a log directory and print the result."""
+    import json
+    from src.ingestion import Quarantine, collapse_repeats
+    from src.processing import process_logs
+    from src.query import DEFAULT_LIMIT, Query, execute_query, query_records
+    
+    filters = {}
+    try:
+        for spec in args.filter:
+            field, sep, values = spec.partition(':')
+            if not sep or not field:
+                raise ValueError(f"Invalid filter '{spec}', expected FIELD:VALUE[|VALUE...]")
+            filters.setdefault(field, []).extend(values.split('|'))
+        query = Query(group_by=[field for value in args.group_by for field in value.split(',') if field],
+                      aggregates=[agg for value in args.agg for agg in value.split(',') if agg] or ["count"],
+                      bucket=args.bucket, filters=filters, start=args.start, end=args.end,
+                      order_by=args.order, limit=args.limit if args.limit is not None else DEFAULT_LIMIT)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    log_dir = Path(args.log_dir)
+    if not log_dir.exists() or not log_dir.is_dir():
+        print(f"Error: Log directory '{log_dir}' does not exist or is not a directory")
+        sys.exit(1)
+    
+    try:
+        quarantine = Quarantine(Path(args.quarantine) if args.quarantine else None)
+        logs = read_log_dir(log_dir, args, quarantine)
+        if args.collapse_repeats:
+            logs = collapse_repeats(logs, args.collapse_repeats, args.collapse_by)
+        df = process_logs(logs)
+        quarantine.close()
+        result, total_groups = execute_query(df, query)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error running query: {e}")
+        sys.exit(1)
+    
+    if args.format == 'csv':
+        print(result.to_csv(index=False), end='')
+    elif args.format == 'json':
+        print(json.dumps(query_records(result), indent=2))
+    else:
+        print(result.to_string(index=False) if not result.empty else "No matching log entries")
+        if total_groups > len(result):
+            print(f"\n{len(result)} of {total_groups} groups shown")
+
+def run_grep_command(args):
+    """Print the log lines matching any of the patterns, merged across files in timestamp order."""
+    import json
+    from src.ingestion import find_log_files
+    from src.search import grep_logs, parse_time
+    
+    patterns = list(args.pattern) + args.regexp
+    try:
+        if args.patterns_file:
+            with open(args.patterns_file, 'r', encoding='utf-8') as file:
+                patterns += [line.rstrip('\n') for line in file if line.strip()]
+        since = parse_time(args.since) if args.since else None
+        until = parse_time(args.until) if args.until else None
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if not patterns:
+        print("Error: No patterns given")
+        sys.exit(1)
+    
+    log_dir = Path(args.log_dir)
+    if not log_dir.exists() or not log_dir.is_dir():
+        print(f"Error: Log directory '{log_dir}' does not exist or is not a directory")
+        sys.exit(1)
+    
+    try:
+        matches = grep_logs(find_log_files(log_dir, archives=not args.no_archives), patterns, args.log_format,
+                            args.ignore_case, since, until, args.workers, args.line_numbers)
+        for count, match in enumerate(matches, start=1):
+            if args.format == 'json':
+                timestamp = match["timestamp"]
+                print(json.dumps({**match, "timestamp": timestamp.isoformat() if timestamp else None}))
+            else:
+                # Lines in files bisected with --since are located by byte offset
+                location = match['line_number'] if match['line_number'] is not None else f"@{match['offset']}"
+                print(f"{match['source_file']}:{location}: {match['line']}")
+            if args.limit and count >= args.limit:
+                break
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    except BrokenPipeError:
+        # Output piped into a command that stopped reading, such as head
+        sys.stderr.close()
+
+def load_alerts(path: str) -> "AlertEngine":
+    """Load alert rules, exiting with an error message if the file is invalid."""
+    from src.alerts import load_alert_config
+    
+    try:
+        return load_alert_config(Path(path))
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Error loading alert rules: {e}")
+        sys.exit(1)
+
+def run_web_command(args):
+    """Start the dashboard server."""
+    from src.web.datasets import parse_dataset_spec
+    from src.web.app import run_server
+    
+    log_dir = Path(args.log_dir)
+    if not log_dir.exists() or not log_dir.is_dir():
+        print(f"Error: Log directory '{log_dir}' does not exist or is not a directory")
+        sys.exit(1)
+    
+    try:
+        extra_datasets = [parse_dataset_spec(spec) for spec in args.dataset]
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    memory_budget = args.dataset_memory_mb * 1024 * 1024 if args.dataset_memory_mb else None
+    alerts = load_alerts(args.alert_rules) if args.alert_rules else None
+    
+    # Network receivers append to the default dataset like followed files
+    listen = {}
+    for protocol in ('syslog-udp', 'syslog-tcp', 'ndjson-tcp'):
+        port = getattr(args, protocol.replace('-', '_'))
+        if port is not None:
+            if not 0 <= port <= 65535:
+                print(f"Error: Invalid port for --{protocol}: {port}")
+                sys.exit(1)
+            listen[protocol] = port
+    run_server(log_dir, args.log_format, args.web_debug, args.follow, extra_datasets, memory_budget, alerts,
+               listen, args.listen_host, args.host, args.port)
+
+def report_spilled(spilled: "SpilledLogs", sketches: "LogSketches", quarantine: "Quarantine", output_dir: Path,
+                   args, charts: bool):
+    """Report on data that outgrew the memory budget from aggregates of its chunks."""
+    from src.distributed import write_partial
+    
+    with spilled:
+        print(f"Processing complete: {spilled.rows} valid log entries")
+        print(f"Memory budget exceeded: spilled {len(spilled.spilled)} chunks "
+              f"({spilled.spilled_bytes / 1024 / 1024:.0f} MB) to {spilled.directory}")
+        try:
+            partial = spilled.to_partial(sketches)
+        except Exception as e:
+            print(f"Error aggregating spilled logs: {e}")
+            sys.exit(1)
+    
+    if args.emit_partial:
+        try:
+            write_partial(partial, Path(args.emit_partial))
+            print(f"Partial results written to {args.emit_partial}")
+        except Exception as e:
+            print(f"Error writing partial results: {e}")
+            sys.exit(1)
+        return
+    
+    # Gaps, metrics, incidents and alerts need the rows in memory, so only aggregates are reported
+    print("Reporting from per-chunk aggregates")
+    print_ignored_options(args, ['incidents', 'alert_rules'], "data spilled to disk")
+    report_partial(partial, output_dir, args.anomaly_threshold, charts, args.anomaly_method, args.season,
+                   args.html_report)
+    print_quarantine_report(quarantine)
+
+# Options that need the parsed rows in one process, which reports from partial results do not have
+ROW_OPTIONS = {
+    'sample': '--sample',
+    'collapse_repeats': '--collapse-repeats',
+    'quarantine': '--quarantine',
+    'memory_budget_mb': '--memory-budget-mb',
+    'incidents': '--incidents',
+    'alert_rules': '--alert-rules',
+    'emit_partial': '--emit-partial',
+}
+
+def print_ignored_options(args, names: List[str], mode: str):
+    """Print the given row-level options that were set but do not apply in this mode."""
+    ignored = [ROW_OPTIONS[name] for name in names if getattr(args, name, None)]
+    if ignored:
+        print(f"Ignoring {', '.join(ignored)}: not supported with {mode}")
+
+def run_analysis(args):
+    """Analyze a log directory and write the report, charts and CSV outputs."""
     # Convert to Path objects
     log_dir = Path(args.log_dir)
     output_dir = Path(args.output_dir)
     output_dir.mkdir(exist_ok=True)
+    charts = not args.no_charts
+    
+    # Coordinator mode works from partial results only
+    if args.merge_partials:
+        print_ignored_options(args, list(ROW_OPTIONS), "--merge-partials")
+        merge_and_report([Path(path) for path in args.merge_partials], output_dir, args.anomaly_threshold, charts,
+                         args.anomaly_method, args.season, args.html_report)
+        return
     
     # Validate input directory
     if not log_dir.exists() or not log_dir.is_dir():
         print(f"Error: Log directory '{log_dir}' does not exist or is not a directory")
         sys.exit(1)
-        
+    
     print(f"Processing logs from {log_dir}...")
     start_time = time.time()
-
-    if args.web:
-        run_server(log_dir, args.log_format, args.web_debug)
     
-    # Ingest data
+    # Checkpointed runs keep a partial per finished file and merge them at the end
+    if args.checkpoint_dir or args.resume:
+        print_ignored_options(args, list(ROW_OPTIONS), "checkpointed runs")
+        from src.checkpoint import CheckpointStore, run_checkpointed
+        from src.ingestion import find_log_files
+        checkpoint_dir = Path(args.checkpoint_dir) if args.checkpoint_dir else output_dir / "checkpoints"
+        file_paths = find_log_files(log_dir)
+        
+        def progress(path: Path, skipped: bool):
+            print(f"{'Skipped' if skipped else 'Checkpointed'} {path.name}")
+        
+        try:
+            partial_paths = run_checkpointed(file_paths, args.log_format, CheckpointStore(checkpoint_dir),
+                                             args.resume, args.local_workers or 1, progress)
+        except Exception as e:
+            print(f"Error processing logs: {e}")
+            sys.exit(1)
+        merge_and_report(partial_paths, output_dir, args.anomaly_threshold, charts,
+                         args.anomaly_method, args.season, args.html_report)
+        print(f"\nProcessing complete in {time.time() - start_time:.2f} seconds")
+        return
+    
+    if args.local_workers:
+        from src.distributed import run_local_workers
+        from src.ingestion import find_log_files
+        print_ignored_options(args, list(ROW_OPTIONS), "--local-workers")
+        print(f"Running {args.local_workers} local workers...")
+        partial_paths = run_local_workers(find_log_files(log_dir), args.log_format,
+                                          output_dir / "partials", args.local_workers)
+        merge_and_report(partial_paths, output_dir, args.anomaly_threshold, charts,
+                         args.anomaly_method, args.season, args.html_report)
+        print(f"\nProcessing complete in {time.time() - start_time:.2f} seconds")
+        return
+    
+    alerts = load_alerts(args.alert_rules) if args.alert_rules else None
+    
+    from src.ingestion import Quarantine, track_sketches, collapse_repeats
+    from src.processing import process_logs
+    from src.sketches import LogSketches
+    
+    # Ingest and process data in a single streaming pass
     try:
-        logs = list(load_multiple_logs(log_dir, args.log_format))
-        if not logs:
+        print("Loading and processing logs...")
+        sketches = LogSketches()
+        quarantine = Quarantine(Path(args.quarantine) if args.quarantine else output_dir / "quarantine.log")
+        logs = track_sketches(read_log_dir(log_dir, args, quarantine), sketches)
+        if args.collapse_repeats:
+            logs = collapse_repeats(logs, args.collapse_repeats, args.collapse_by)
+        if args.memory_budget_mb:
+            from src.spill import SpilledLogs, process_logs_within_budget
+            spill_dir = Path(args.spill_dir) if args.spill_dir else None
+            df = process_logs_within_budget(logs, args.memory_budget_mb * 1024 * 1024, spill_dir)
+            if isinstance(df, SpilledLogs):
+                quarantine.close()
+                report_spilled(df, sketches, quarantine, output_dir, args, charts)
+                print(f"\nProcessing complete in {time.time() - start_time:.2f} seconds")
+                return
+        else:
+            df = process_logs(logs)
+        quarantine.close()
+        if df.empty:
             print(f"No log entries found in {log_dir}. Make sure the directory contains .log files.")
             sys.exit(1)
-            
-        print(f"Loaded {len(logs)} log entries from {log_dir}")
+        
+        print(f"Processing complete: {len(df)} valid log entries")
+        if "repeat_count" in df.columns:
+            print(f"Collapsed {int(df['repeat_count'].sum())} lines into {len(df)} rows")
     except ValueError as e:
         print(f"Error: {e}")
         sys.exit(1)
-    except Exception as e:
-        print(f"Error loading logs: {e}")
-        sys.exit(1)
-    
-    # Process data
-    try:
-        print("Converting logs to DataFrame...")
-        df = logs_to_dataframe(logs)
-        
-        print("Preprocessing data...")
-        df = preprocess_dataframe(df)
-        
-        print("Enriching data...")
-        df = enrich_data(df)
-        
-        print(f"Processing complete: {len(df)} valid log entries")
     except Exception as e:
         print(f"Error processing logs: {e}")
         sys.exit(1)
     
+    # Node mode writes partial results for a coordinator to merge
+    if args.emit_partial:
+        from src.distributed import build_partial, write_partial
+        try:
+            write_partial(build_partial(df, sketches), Path(args.emit_partial))
+            print(f"Partial results written to {args.emit_partial}")
+        except Exception as e:
+            print(f"Error writing partial results: {e}")
+            sys.exit(1)
+        return
+    
+    from src.analysis import (
+        get_error_rate, find_busiest_hour, get_component_stats, detect_anomalies, get_metric_stats, detect_gaps,
+    )
+    
     # Generate basic statistics
     try:
-        print("\n--- Basic Statistics ---")
         error_rate = get_error_rate(df)
-        print(f"Overall error rate: {error_rate:.2f}%")
-        
         busiest_hour, count = find_busiest_hour(df)
-        print(f"Busiest hour: {busiest_hour}:00 with {count} entries")
-        
-        # Component analysis
         component_stats = get_component_stats(df)
-        print("\n--- Top Components by Volume ---")
-        print(component_stats.head().to_string())
+        if args.anomaly_method == "seasonal":
+            from src.anomaly import detect_seasonal_anomalies
+            anomalies = detect_seasonal_anomalies(df, args.anomaly_threshold, args.season)
+        else:
+            anomalies = detect_anomalies(df, threshold=args.anomaly_threshold)
+        print_basic_report(error_rate, busiest_hour, count, component_stats, anomalies)
+        print_sampling_report(df)
+        print_quarantine_report(quarantine)
         
-        # Anomaly detection
-        print("\n--- Anomaly Detection ---")
-        anomalies = detect_anomalies(df, threshold=args.anomaly_threshold)
-        if not anomalies.empty:
-            print(f"Detected {len(anomalies)} anomalies")
-            print(anomalies.head().to_string() if len(anomalies) > 5 else anomalies.to_string())
+        # Silences, alert thresholds and (unless every error was kept) incidents need every line
+        sampled = "sample_weight" in df.columns
+        errors_sampled = sampled and bool((df.loc[df["is_error"], "sample_weight"] != 1).any())
+        skipped = []
+        
+        # Silent periods per component
+        if sampled:
+            skipped.append("component silences")
         else:
-            print("No anomalies detected")
+            gaps = detect_gaps(df)
+            if not gaps.empty:
+                print("\n--- Longest Component Silences ---")
+                print(gaps.head().to_string())
+        
+        # Metrics extracted from messages
+        latency_stats = get_metric_stats(df, "latency_ms")
+        if not latency_stats.empty:
+            print("\n--- Latency by Component (ms) ---")
+            print(latency_stats.round(1).to_string())
+        
+        print_sketch_report(sketches)
+        
+        # Error bursts shared by several files and components
+        incidents = None
+        if args.incidents and errors_sampled:
+            skipped.append("incidents")
+        elif args.incidents:
+            from src.correlation import incident_report
+            incidents, correlations = incident_report(df)
+            print("\n--- Correlated Error Incidents ---")
+            if not incidents.empty:
+                print(f"Detected {len(incidents)} incidents")
+                print(incidents.drop(columns=["series"]).head(10).round(1).to_string())
+            else:
+                print("No incidents detected")
+            if not correlations.empty:
+                print("\nMost correlated error series:")
+                print(correlations.round(2).to_string(index=False))
+        
+        # Replay the data through the alert rules, as if it had been followed
+        if alerts is not None and sampled:
+            skipped.append("alerts")
+        elif alerts is not None:
+            print("\n--- Alerts ---")
+            raised = alerts.evaluate(df)
+            firing = alerts.firing()
+            print(f"{sum(alert.state == 'firing' for alert in raised)} alerts raised"
+                  + (f", still firing: {', '.join(firing)}" if firing else ""))
+        
+        if skipped:
+            print(f"\nNot reported for a sample: {', '.join(skipped)}")
     except Exception as e:
         print(f"Error analyzing logs: {e}")
         sys.exit(1)
@@ -112,13 +520,25 @@ def main():
         component_stats.to_csv(output_dir / "component_stats.csv")
         if not anomalies.empty:
             anomalies.to_csv(output_dir / "anomalies.csv")
+        if incidents is not None and not incidents.empty:
+            incidents.to_csv(output_dir / "incidents.csv", index=False)
+        
+        if args.html_report:
+            from src.html_report import report_data_from_frame, write_html_report
+            report_data = report_data_from_frame(df, error_rate, component_stats, anomalies)
+            print(f"Interactive report written to {write_html_report(report_data, output_dir)}")
         
         # Generate visualizations
-        print("Creating visualizations...")
-        create_log_level_distribution(df, output_dir)
-        create_hourly_distribution(df, output_dir)
-        create_component_error_chart(df, output_dir)
-        create_time_series_plot(df, output_dir)
+        if charts:
+            from src.visualization import (
+                create_log_level_distribution, create_hourly_distribution, create_component_error_chart,
+                create_time_series_plot,
+            )
+            print("Creating visualizations...")
+            create_log_level_distribution(df, output_dir)
+            create_hourly_distribution(df, output_dir)
+            create_component_error_chart(df, output_dir)
+            create_time_series_plot(df, output_dir)
         
         processing_time = time.time() - start_time
         print(f"\nProcessing complete in {processing_time:.2f} seconds")
@@ -127,5 +547,151 @@ def main():
         print(f"Error saving outputs: {e}")
         sys.exit(1)
 
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser with one subcommand per mode."""
+    # Options shared by every subcommand
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--log-dir', type=str, default='./data',
+                        help='Directory containing log files')
+    common.add_argument('--log-format', type=str, default='standard',
+                        choices=LOG_FORMATS,
+                        help='Log format to parse')
+    common.add_argument('--verbose', action='store_true',
+                        help='Print verbose output')
+    
+    # Options of commands that read the log files in one pass
+    ingest = argparse.ArgumentParser(add_help=False)
+    ingest.add_argument('--collapse-repeats', type=float, metavar='SECONDS',
+                        help='Fold entries repeated within this many seconds into one row with a repeat count')
+    ingest.add_argument('--quarantine', type=str, metavar='PATH',
+                        help='Append lines that cannot be parsed to this file (analyze default: OUTPUT_DIR/quarantine.log)')
+    ingest.add_argument('--sample', choices=['reservoir', 'hash', 'stratified'],
+                        help='Analyze a sample: a uniform reservoir, a hash-selected fraction, '
+                             'or a fraction of lines plus every error line')
+    ingest.add_argument('--sample-rate', type=float, default=0.1,
+                        help='Fraction of lines kept by hash and stratified sampling')
+    ingest.add_argument('--sample-size', type=int, default=100000,
+                        help='Number of lines kept by reservoir sampling')
+    ingest.add_argument('--sample-key', type=str, metavar='FIELD',
+                        help='With --sample hash, keep or drop all entries with the same value of this field')
+    ingest.add_argument('--collapse-by', choices=['line', 'template'], default='line',
+                        help='Fold identical entries, or entries whose messages differ only in numbers')
+    
+    # Options of the dashboard server
+    server = argparse.ArgumentParser(add_help=False)
+    server.add_argument('--follow', action='store_true',
+                        help='Stream lines appended to the log files to the dashboard')
+    server.add_argument('--dataset', action='append', default=[], metavar='NAME=DIR[:FORMAT]',
+                        help='Serve another log directory selected with ?dataset=NAME (repeatable)')
+    server.add_argument('--dataset-memory-mb', type=int, metavar='MB',
+                        help='Unload least recently used datasets above this memory use')
+    server.add_argument('--alert-rules', type=str, metavar='PATH',
+                        help='JSON file of alert rules and sinks, evaluated on every ingested batch')
+    server.add_argument('--syslog-udp', type=int, metavar='PORT',
+                        help='Receive syslog messages over UDP on this port')
+    server.add_argument('--syslog-tcp', type=int, metavar='PORT',
+                        help='Receive newline-delimited syslog messages over TCP on this port')
+    server.add_argument('--ndjson-tcp', type=int, metavar='PORT',
+                        help='Receive newline-delimited JSON entries over TCP on this port')
+    server.add_argument('--listen-host', type=str, default='127.0.0.1',
+                        help='Address the log receiver listens on')
+    server.add_argument('--host', type=str, default='127.0.0.1', help='Address the dashboard listens on')
+    server.add_argument('--port', type=int, default=5000, help='Port the dashboard listens on')
+    
+    parser = argparse.ArgumentParser(description='Analyze log files and generate insights.',
+                                     epilog='Without a command, arguments are passed to "analyze".')
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    
+    analyze = subparsers.add_parser('analyze', parents=[common, ingest, server],
+                                    help='Analyze log files and write a report (default)')
+    analyze.add_argument('--output-dir', type=str, default='./output',
+                         help='Directory to save output files')
+    analyze.add_argument('--anomaly-threshold', type=float, default=3.0,
+                         help='Threshold for anomaly detection (standard deviations)')
+    analyze.add_argument('--anomaly-method', choices=['rolling', 'seasonal'], default='rolling',
+                         help='Compare buckets with the previous hour (rolling) or with the same time on other days (seasonal)')
+    analyze.add_argument('--season', choices=['day', 'week'], default='day',
+                         help='With --anomaly-method seasonal, baseline per time of day or per time of week')
+    analyze.add_argument('--incidents', action='store_true',
+                         help='Report time windows in which several files and components had error bursts together')
+    analyze.add_argument('--html-report', action='store_true',
+                         help='Also write report.html with interactive charts of the aggregated data')
+    analyze.add_argument('--no-charts', action='store_true',
+                         help='Print statistics and write CSV outputs without drawing charts')
+    analyze.add_argument('--emit-partial', type=str, metavar='PATH',
+                         help='Write mergeable partial results for this node instead of a full report')
+    analyze.add_argument('--merge-partials', type=str, nargs='+', metavar='PATH',
+                         help='Merge partial results from several nodes into one report')
+    analyze.add_argument('--local-workers', type=int, metavar='N',
+                         help='Split log files across N local worker processes and merge their partial results')
+    analyze.add_argument('--memory-budget-mb', type=int, metavar='MB',
+                         help='Spill processed chunks to disk above this memory use and report from aggregates')
+    analyze.add_argument('--spill-dir', type=str, metavar='DIR',
+                         help='Directory for spilled chunks (default: the system temporary directory)')
+    analyze.add_argument('--checkpoint-dir', type=str, metavar='DIR',
+                         help='Save partial results per finished file here and merge them into the report')
+    analyze.add_argument('--resume', action='store_true',
+                         help='Skip files already checkpointed and unchanged since (default DIR: OUTPUT_DIR/checkpoints)')
+    analyze.add_argument('--web', action='store_true',
+                         help='Start the web interface (same as the web command)')
+    analyze.add_argument('--web-debug', action='store_true',
+                         help='Run web interface in debug mode')
+    
+    web = subparsers.add_parser('web', parents=[common, server], help='Start the web dashboard')
+    web.add_argument('--debug', dest='web_debug', action='store_true',
+                     help='Run the server in debug mode')
+    
+    query = subparsers.add_parser('query', parents=[common, ingest], help='Run an ad-hoc aggregation and print the result')
+    query.add_argument('--group-by', action='append', default=[], metavar='FIELD[,FIELD...]',
+                       help='Fields to group by, e.g. component,level')
+    query.add_argument('--bucket', type=str, help='Time bucket to group by, e.g. 5min or 1h')
+    query.add_argument('--agg', action='append', default=[], metavar='AGG[,AGG...]',
+                       help='Aggregates: count, errors, error_rate or FUNC:FIELD (sum, mean, median, min, max, std)')
+    query.add_argument('--filter', action='append', default=[], metavar='FIELD:VALUE[|VALUE...]',
+                       help='Keep entries whose field has one of the values (repeatable)')
+    query.add_argument('--start', type=str, help='Keep entries at or after this time')
+    query.add_argument('--end', type=str, help='Keep entries at or before this time')
+    query.add_argument('--order', type=str, help='Result column to sort by, prefixed with - for descending')
+    query.add_argument('--limit', type=int, help='Maximum number of rows (defaults to the query API limit)')
+    query.add_argument('--format', choices=['table', 'csv', 'json'], default='table',
+                       help='Output format')
+    
+    grep = subparsers.add_parser('grep', parents=[common],
+                                 help='Print lines matching any of several regular expressions')
+    grep.add_argument('pattern', nargs='*', help='Regular expression to search for')
+    grep.add_argument('-e', '--regexp', action='append', default=[], metavar='PATTERN',
+                      help='Another regular expression (repeatable)')
+    grep.add_argument('-f', '--patterns-file', type=str, metavar='PATH',
+                      help='File with one regular expression per line')
+    grep.add_argument('-i', '--ignore-case', action='store_true', help='Match case-insensitively')
+    grep.add_argument('--since', type=str, help='Only lines at or after this time (YYYY-MM-DD HH:MM or HH:MM today)')
+    grep.add_argument('--until', type=str, help='Only lines at or before this time')
+    grep.add_argument('-n', '--line-numbers', action='store_true',
+                      help='Count line numbers in files skipped into with --since (reads the skipped part)')
+    grep.add_argument('--workers', type=int, default=1, metavar='N',
+                      help='Search files in N processes (matches are printed once all files are searched)')
+    grep.add_argument('--no-archives', action='store_true', help='Skip gzipped log files (*.log.gz)')
+    grep.add_argument('--limit', type=int, help='Stop after this many matches')
+    grep.add_argument('--format', choices=['text', 'json'], default='text',
+                      help='Print FILE:LINE: text, or JSON lines with the parsed fields and byte offsets')
+    
+    return parser
+
+def main(argv: List[str] = None):
+    # Parse command line arguments; plain options keep working as the analyze command
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv = ['analyze'] + argv
+    args = build_parser().parse_args(argv)
+    
+    if args.command == 'query':
+        run_query_command(args)
+    elif args.command == 'grep':
+        run_grep_command(args)
+    elif args.command == 'web' or args.web:
+        run_web_command(args)
+    else:
+        run_analysis(args)
+
 if __name__ == "__main__":
     main()
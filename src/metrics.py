@@ -0,0 +1,261 @@
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .analysis import entry_weights
+
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Upper bounds (seconds) of the batch processing time buckets
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Metric(ABC):
+    """A named metric with one value per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Sample lines in the text exposition format."""
+
+class Counter(Metric):
+    """A value per label combination that only goes up."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, *label_values):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def inc_many(self, amounts: Mapping[Tuple, float]):
+        """Add to several label combinations at once, e.g. the result of a groupby."""
+        with self._lock:
+            for label_values, amount in amounts.items():
+                self._values[label_values] = self._values.get(label_values, 0.0) + float(amount)
+
+    def remove(self, predicate: Callable[[Tuple], bool]):
+        """Drop the label combinations matching predicate, e.g. those of a reloaded dataset."""
+        with self._lock:
+            self._values = {key: value for key, value in self._values.items() if not predicate(key)}
+
+    def value(self, *label_values) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+class Gauge(Metric):
+    """A value per label combination that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, *label_values):
+        with self._lock:
+            self._values[label_values] = float(value)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+class Collected(Metric):
+    """A counter or gauge read from a callback when scraped, for state kept elsewhere."""
+
+    def __init__(self, name: str, help_text: str, kind: str, labels: Sequence[str],
+                 callback: Callable[[], Mapping[Tuple, float]]):
+        super().__init__(name, help_text, labels)
+        if kind not in ("counter", "gauge"):
+            raise ValueError(f"Unsupported metric type: {kind}")
+        self.kind = kind
+        self.callback = callback
+
+    def samples(self) -> List[str]:
+        values = sorted(self.callback().items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+class Histogram(Metric):
+    """Counts of observations per bucket, with their sum, per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self.bounds = np.asarray(sorted(buckets), dtype=np.float64)
+        # Per label combination: counts per bucket (the last one above every bound) and the sum
+        self._counts: Dict[Tuple, np.ndarray] = {}
+        self._sums: Dict[Tuple, float] = {}
+
+    def observe(self, values, *label_values, weights=None):
+        """Record an array of observations in one call; NaN values are ignored."""
+        values = np.asarray(values, dtype=np.float64)
+        keep = ~np.isnan(values)
+        values = values[keep]
+        weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=np.float64)[keep]
+        if not len(values):
+            return
+        # A value equal to a bound belongs to that bound's bucket (le)
+        counts = np.bincount(np.searchsorted(self.bounds, values, side="left"), weights=weights,
+                             minlength=len(self.bounds) + 1)
+        with self._lock:
+            current = self._counts.get(label_values)
+            self._counts[label_values] = counts if current is None else current + counts
+            self._sums[label_values] = self._sums.get(label_values, 0.0) + float(values @ weights)
+
+    def remove(self, predicate: Callable[[Tuple], bool]):
+        with self._lock:
+            for key in [key for key in self._counts if predicate(key)]:
+                del self._counts[key]
+                del self._sums[key]
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, counts.copy(), self._sums[key]) for key, counts in self._counts.items())
+        lines = []
+        for key, counts, total in series:
+            cumulative = np.cumsum(counts)
+            for bound, count in zip(list(self.bounds) + [math.inf], cumulative):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {_format_value(count)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {_format_value(cumulative[-1])}")
+        return lines
+
+class MetricsRegistry:
+    """Metrics rendered together in the text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+class LogMetrics:
+    """Counters and histograms of ingested entries, updated once per loaded or appended batch.
+
+    Updates cost a groupby over the new rows only, and rendering depends on
+    the number of label combinations, not on the number of entries. Loading a
+    dataset again replaces its series instead of adding to them.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        register = self.registry.register
+        self.entries = register(Counter("log_entries_total", "Log entries ingested.",
+                                        ("dataset", "component", "level")))
+        self.errors = register(Counter("log_errors_total", "Log entries at an error level.",
+                                       ("dataset", "component")))
+        self.latency = register(Histogram("log_latency_ms", "Latency extracted from log messages, in milliseconds.",
+                                          LATENCY_BUCKETS, ("dataset", "component")))
+        self.lines_parsed = register(Counter("log_lines_parsed_total", "Log entries parsed by the pipeline.",
+                                             ("dataset",)))
+        self.parse_failures = register(Counter("log_parse_failures_total", "Log lines that could not be parsed.",
+                                               ("dataset", "source_file")))
+        self.parse_seconds = register(Counter("log_parse_seconds_total", "Time spent parsing and processing logs.",
+                                              ("dataset",)))
+        self.parse_rate = register(Gauge("log_parse_lines_per_second",
+                                         "Entries per second of the most recent load or batch.", ("dataset",)))
+        self.batch_duration = register(Histogram("log_batch_duration_seconds",
+                                                 "Time to parse and process one batch of entries.",
+                                                 DURATION_BUCKETS, ("dataset",)))
+        self.last_entry = register(Gauge("log_last_entry_timestamp_seconds",
+                                         "Timestamp of the latest ingested entry.", ("dataset",)))
+
+    def reset(self, dataset: str):
+        """Forget the counts of a dataset before it is loaded again or once it is removed."""
+        for metric in (self.entries, self.errors, self.latency, self.lines_parsed, self.parse_failures):
+            metric.remove(lambda key: key[0] == dataset)
+
+    def observe_failures(self, dataset: str, failures: Mapping[str, int]):
+        """Count unparsed lines per source file, such as the counts of a Quarantine."""
+        for source_file, count in failures.items():
+            if count:
+                self.parse_failures.inc(count, dataset, source_file)
+
+    def observe(self, dataset: str, df: pd.DataFrame, seconds: Optional[float] = None):
+        """Count a processed batch (or a whole loaded dataset) and the time it took."""
+        if seconds is not None:
+            self.parse_seconds.inc(seconds, dataset)
+            self.batch_duration.observe([seconds], dataset)
+            if seconds > 0:
+                self.parse_rate.set(len(df) / seconds, dataset)
+        if df.empty:
+            return
+
+        self.lines_parsed.inc(len(df), dataset)
+        weights = entry_weights(df)
+        if weights is None:
+            weights = pd.Series(1, index=df.index)
+        components = df["component"] if "component" in df.columns else pd.Series("", index=df.index)
+        levels = df["level"] if "level" in df.columns else pd.Series("", index=df.index)
+        counts = weights.groupby([components, levels], observed=True).sum()
+        self.entries.inc_many({(dataset, str(component), str(level)): count
+                               for (component, level), count in counts.items()})
+        if "is_error" in df.columns:
+            errors = weights[df["is_error"]].groupby(components[df["is_error"]], observed=True).sum()
+            self.errors.inc_many({(dataset, str(component)): count for component, count in errors.items()})
+        if "latency_ms" in df.columns:
+            has_latency = df["latency_ms"].notna()
+            for component, rows in df.loc[has_latency, "latency_ms"].groupby(components[has_latency], observed=True):
+                self.latency.observe(rows.to_numpy(), dataset, str(component),
+                                     weights=weights[rows.index].to_numpy())
+        if "timestamp" in df.columns:
+            latest = df["timestamp"].max()
+            if pd.notna(latest):
+                # Naive timestamps are local time, like the log files
+                self.last_entry.set(latest.to_pydatetime().timestamp(), dataset)
+
+    def render(self) -> str:
+        return self.registry.render()
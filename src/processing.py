@@ -1,6 +1,11 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
+
+from .config.message_fields import METRIC_FIELDS
+
+ERROR_LEVELS = ["ERROR", "CRITICAL", "FATAL"]
 
 def logs_to_dataframe(logs: List[Dict[str, Any]]) -> pd.DataFrame:
     """Convert log dictionaries to a pandas DataFrame."""
@@ -27,17 +32,207 @@ def preprocess_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     
     return result
 
-def enrich_data(df: pd.DataFrame) -> pd.DataFrame:
+def extract_metrics(df: pd.DataFrame, metric_fields: Optional[Dict[str, Dict[str, Any]]] = None) -> pd.DataFrame:
+    """Extract numeric fields from messages into typed columns."""
+    metric_fields = METRIC_FIELDS if metric_fields is None else metric_fields
+    if "message" not in df.columns:
+        return df
+    
+    messages = df["message"].astype(str)
+    for name, spec in metric_fields.items():
+        # Only run the regex on rows containing the extractor's literal
+        candidates = messages
+        if spec.get("contains"):
+            candidates = messages[messages.str.contains(spec["contains"], regex=False)]
+        extracted = candidates.str.extract(spec["pattern"])
+        
+        for column, dtype in spec["dtypes"].items():
+            values = pd.to_numeric(extracted[column], errors="coerce")
+            df[column] = values.reindex(df.index).astype(dtype)
+    
+    return df
+
+def enrich_data(df: pd.DataFrame, metric_fields: Optional[Dict[str, Dict[str, Any]]] = None) -> pd.DataFrame:
     """Add derived features to the DataFrame."""
     result = df.copy()
     
     # Calculate time differences between log entries
     if "timestamp" in result.columns:
-        result = result.sort_values("timestamp")
-        result["time_delta"] = result["timestamp"].diff().dt.total_seconds()
+        result = sort_by_time(result)
+        result["time_delta"] = time_deltas(result)
     
     # Add error flag
     if "level" in result.columns:
-        result["is_error"] = result["level"].isin(["ERROR", "CRITICAL", "FATAL"])
+        result["is_error"] = result["level"].isin(ERROR_LEVELS)
+    
+    # Pull numeric metrics out of the message text
+    result = extract_metrics(result, metric_fields)
     
     return result
+
+def time_deltas(df: pd.DataFrame, by: Optional[str] = "source_file") -> pd.Series:
+    """Seconds since the previous entry from the same group (source file by default).
+
+    Expects rows ordered by timestamp. Deltas over the merged stream would mix
+    interleaved files, so they are only taken globally when there is no group
+    column.
+    """
+    if by and by in df.columns:
+        deltas = df.groupby(by, sort=False)["timestamp"].diff()
+    else:
+        deltas = df["timestamp"].diff()
+    return deltas.dt.total_seconds()
+
+def _merge_two_runs(values: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Merge two sorted runs of row positions, keeping left rows first on ties."""
+    a, b = values[left], values[right]
+    merged = np.empty(len(left) + len(right), dtype=np.intp)
+    merged[np.arange(len(a)) + np.searchsorted(b, a, side="left")] = left
+    merged[np.arange(len(b)) + np.searchsorted(a, b, side="right")] = right
+    return merged
+
+def merge_sorted_runs(values: np.ndarray, run_starts: np.ndarray) -> np.ndarray:
+    """Return the row order that merges consecutive runs of values.
+
+    Runs start at the given positions. Each run that is already sorted (the
+    normal case for a single log file) is used as-is; the rest are sorted
+    stably. Runs are then merged pairwise, O(n log k) for k runs.
+    """
+    bounds = list(run_starts) + [len(values)]
+    runs = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        run = np.arange(start, end, dtype=np.intp)
+        if not np.all(values[start + 1:end] >= values[start:end - 1]):
+            run = run[np.argsort(values[start:end], kind="stable")]
+        runs.append(run)
+    
+    if not runs:
+        return np.arange(0, dtype=np.intp)
+    while len(runs) > 1:
+        merged = [_merge_two_runs(values, runs[i], runs[i + 1]) for i in range(0, len(runs) - 1, 2)]
+        if len(runs) % 2:
+            merged.append(runs[-1])
+        runs = merged
+    return runs[0]
+
+def sort_by_time(df: pd.DataFrame) -> pd.DataFrame:
+    """Order rows by timestamp, merging per-file runs instead of a global sort."""
+    timestamps = df["timestamp"]
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        return df.sort_values("timestamp", kind="stable")
+    
+    values = timestamps.values.view("i8")
+    if np.all(values[1:] >= values[:-1]):
+        return df
+    
+    if "source_file" in df.columns:
+        sources = df["source_file"].values
+        run_starts = np.flatnonzero(np.r_[True, sources[1:] != sources[:-1]])
+        # Interleaved files give many short runs; merging them is slower than a sort
+        if len(run_starts) > 4 * df["source_file"].nunique():
+            return df.take(np.argsort(values, kind="stable"))
+    else:
+        run_starts = np.array([0], dtype=np.intp)
+    
+    return df.take(merge_sorted_runs(values, run_starts))
+
+def last_timestamps(df: pd.DataFrame, by: Optional[str] = "source_file") -> Dict[Any, pd.Timestamp]:
+    """Latest timestamp per group, the state append_sorted needs for time deltas."""
+    if df is None or df.empty or "timestamp" not in df.columns:
+        return {}
+    if by and by in df.columns:
+        return df.groupby(by, sort=False, observed=True)["timestamp"].max().to_dict()
+    return {None: df["timestamp"].max()}
+
+def append_sorted(df: Optional[pd.DataFrame], batch: pd.DataFrame, last_seen: Dict[Any, pd.Timestamp],
+                  by: Optional[str] = "source_file") -> pd.DataFrame:
+    """Add a processed batch to a frame ordered by timestamp.
+
+    Batches at or after the end of df are concatenated and their time deltas
+    taken from last_seen, so the existing rows are never rescanned. Older
+    batches are merged into the tail of df only, and deltas recomputed for the
+    groups they touch. last_seen is updated in place.
+    """
+    batch = sort_by_time(batch).reset_index(drop=True)
+    group = by if by and by in batch.columns else None
+    if df is None or df.empty:
+        batch["time_delta"] = time_deltas(batch, group)
+        last_seen.update(last_timestamps(batch, group))
+        return batch
+    
+    position = df["timestamp"].searchsorted(batch["timestamp"].iloc[0], side="right")
+    if position == len(df):
+        # In-order batch: only the first row of each group looks back into df
+        batch["time_delta"] = time_deltas(batch, group)
+        if group:
+            first = ~batch[group].duplicated()
+            previous = pd.to_datetime(batch.loc[first, group].map(last_seen))
+        else:
+            first = batch.index == 0
+            previous = last_seen.get(None, pd.NaT)
+        batch.loc[first, "time_delta"] = (batch.loc[first, "timestamp"] - previous).dt.total_seconds()
+        combined = pd.concat([df, batch], ignore_index=True)
+    else:
+        tail = sort_by_time(pd.concat([df.iloc[position:], batch], ignore_index=True))
+        combined = pd.concat([df.iloc[:position], tail], ignore_index=True)
+        if group:
+            touched = combined[group].isin(batch[group].unique())
+            combined.loc[touched, "time_delta"] = time_deltas(combined[touched], group)
+        else:
+            combined["time_delta"] = time_deltas(combined, None)
+    
+    for key, latest in last_timestamps(batch, group).items():
+        if key not in last_seen or latest > last_seen[key]:
+            last_seen[key] = latest
+    return combined
+
+def process_logs(logs: Iterable[Dict[str, Any]], metric_fields: Optional[Dict[str, Dict[str, Any]]] = None,
+                 chunk_size: int = 20000) -> pd.DataFrame:
+    """Convert, clean and enrich log entries in a single pass.
+
+    Equivalent to logs_to_dataframe, preprocess_dataframe and enrich_data but
+    builds the frame in chunks, so the list of parsed dictionaries never has to
+    be held in memory at once, and adds derived columns in place.
+    """
+    chunks = []
+    batch = []
+    for log_entry in logs:
+        batch.append(log_entry)
+        if len(batch) >= chunk_size:
+            chunks.append(_parsed_frame(batch))
+            batch = []
+    if batch or not chunks:
+        chunks.append(_parsed_frame(batch))
+    del batch
+    
+    df = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+    del chunks
+    
+    if "timestamp" in df.columns:
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        df = sort_by_time(df)
+        timestamps = df["timestamp"].dt
+        df["hour"] = timestamps.hour
+        df["date"] = timestamps.date
+        df["time_delta"] = time_deltas(df)
+    
+    if "level" in df.columns:
+        df["is_error"] = df["level"].isin(ERROR_LEVELS)
+    
+    # Sampled entries stand for sample_weight entries of the full data
+    if "sample_weight" in df.columns:
+        df["sample_weight"] = df["sample_weight"].fillna(1.0).astype("float64")
+    
+    # Collapsed repeats: entries that were not folded stand for one line
+    if "repeat_count" in df.columns:
+        df["repeat_count"] = df["repeat_count"].fillna(1).astype("int64")
+        df["last_timestamp"] = pd.to_datetime(df["last_timestamp"]).fillna(df.get("timestamp"))
+    
+    return extract_metrics(df, metric_fields)
+
+def _parsed_frame(batch: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Build a DataFrame from a batch of entries, dropping unparsed lines."""
+    chunk = pd.DataFrame(batch)
+    if "parsed" in chunk.columns:
+        chunk = chunk[chunk["parsed"] == True]
+    return chunk.reset_index(drop=True)
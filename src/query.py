@@ -0,0 +1,282 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .analysis import entry_weights
+
+# Aggregates computed over whole rows, and functions applied to a numeric field as func:field
+ROW_AGGREGATES = ("count", "errors", "error_rate")
+FIELD_AGGREGATES = ("sum", "mean", "median", "min", "max", "std")
+
+# Field aggregates that change when a row stands for several log lines
+WEIGHTED_AGGREGATES = ("sum", "mean", "median", "std")
+
+# Query-time limits
+MAX_GROUP_FIELDS = 4
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10000
+MIN_BUCKET = pd.Timedelta(minutes=1)
+
+def _split(values: Optional[Iterable[str]]) -> List[str]:
+    """Flatten repeated and comma-separated arguments."""
+    items = []
+    for value in values or []:
+        items.extend(item.strip() for item in str(value).split(",") if item.strip())
+    return items
+
+class Query:
+    """An aggregation over log entries: filters, group-by fields, time bucket and aggregates."""
+
+    def __init__(self, group_by: Sequence[str] = (), aggregates: Sequence[str] = ("count",),
+                 bucket: Optional[str] = None, filters: Optional[Dict[str, Sequence[str]]] = None,
+                 start: Optional[str] = None, end: Optional[str] = None,
+                 order_by: Optional[str] = None, limit: int = DEFAULT_LIMIT):
+        self.group_by = list(group_by)
+        self.aggregates = list(aggregates) or ["count"]
+        self.bucket = bucket or None
+        self.filters = {field: [str(value) for value in values] for field, values in (filters or {}).items()}
+        self.start = pd.to_datetime(start) if start else None
+        self.end = pd.to_datetime(end) if end else None
+        self.order_by = order_by or None
+        self.limit = int(limit)
+        self._validate()
+
+    @classmethod
+    def from_args(cls, args) -> "Query":
+        """Build a query from request arguments (a Flask MultiDict)."""
+        filters: Dict[str, List[str]] = {}
+        for spec in args.getlist('filter'):
+            field, sep, values = spec.partition(':')
+            if not sep or not field:
+                raise ValueError(f"Invalid filter '{spec}', expected FIELD:VALUE[|VALUE...]")
+            filters.setdefault(field, []).extend(values.split('|'))
+        return cls(
+            group_by=_split(args.getlist('group_by')),
+            aggregates=_split(args.getlist('agg')) or ["count"],
+            bucket=args.get('bucket'),
+            filters=filters,
+            start=args.get('start'),
+            end=args.get('end'),
+            order_by=args.get('order'),
+            limit=args.get('limit', DEFAULT_LIMIT),
+        )
+
+    def _validate(self):
+        if len(self.group_by) > MAX_GROUP_FIELDS:
+            raise ValueError(f"At most {MAX_GROUP_FIELDS} group-by fields are allowed")
+        if not 1 <= self.limit <= MAX_LIMIT:
+            raise ValueError(f"Limit must be between 1 and {MAX_LIMIT}")
+        for aggregate in self.aggregates:
+            func, sep, field = aggregate.partition(':')
+            if sep and (func not in FIELD_AGGREGATES or not field):
+                raise ValueError(f"Unsupported aggregate: {aggregate}")
+            if not sep and func not in ROW_AGGREGATES:
+                raise ValueError(f"Unsupported aggregate: {aggregate}")
+        if self.bucket is not None:
+            try:
+                bucket = pd.Timedelta(pd.tseries.frequencies.to_offset(self.bucket))
+            except ValueError:
+                raise ValueError(f"Invalid time bucket: {self.bucket}")
+            if bucket < MIN_BUCKET:
+                raise ValueError(f"Time bucket must be at least {MIN_BUCKET}")
+        if self.order_by is not None and self.order_by.lstrip('-') not in self.columns:
+            raise ValueError(f"Cannot order by {self.order_by}")
+
+    @property
+    def columns(self) -> List[str]:
+        """Names of the result columns."""
+        keys = self.group_by + (["bucket"] if self.bucket else [])
+        return keys + [aggregate.replace(':', '_') for aggregate in self.aggregates]
+
+    @property
+    def fields(self) -> List[str]:
+        """Frame columns the query reads."""
+        fields = list(self.group_by) + list(self.filters)
+        fields += [aggregate.partition(':')[2] for aggregate in self.aggregates if ':' in aggregate]
+        if any(aggregate in ("errors", "error_rate") for aggregate in self.aggregates):
+            fields.append("is_error")
+        if self.bucket or self.start is not None or self.end is not None:
+            fields.append("timestamp")
+        return list(dict.fromkeys(fields))
+
+    @property
+    def uses_weights(self) -> bool:
+        """Whether the result depends on how many log lines each row stands for."""
+        return any(aggregate in ROW_AGGREGATES or aggregate.partition(':')[0] in WEIGHTED_AGGREGATES
+                   for aggregate in self.aggregates)
+
+    @property
+    def key(self) -> Tuple:
+        """Canonical form, equal for queries that give the same result."""
+        return (
+            tuple(self.group_by), tuple(self.aggregates), self.bucket,
+            tuple(sorted((field, tuple(sorted(values))) for field, values in self.filters.items())),
+            self.start, self.end, self.order_by, self.limit,
+        )
+
+def _filter_mask(df: pd.DataFrame, query: Query) -> Optional[pd.Series]:
+    mask = None
+    for field, values in query.filters.items():
+        column = df[field]
+        if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            values = pd.to_numeric(values, errors="coerce")
+        elif pd.api.types.is_bool_dtype(column):
+            values = [value.lower() in ("1", "true", "yes") for value in values]
+        condition = column.isin(values)
+        mask = condition if mask is None else mask & condition
+    if query.start is not None:
+        condition = df["timestamp"] >= query.start
+        mask = condition if mask is None else mask & condition
+    if query.end is not None:
+        condition = df["timestamp"] <= query.end
+        mask = condition if mask is None else mask & condition
+    return mask
+
+def _weighted_median_marker(rows: pd.DataFrame, field: str, keys: List[str]) -> np.ndarray:
+    """The field value at each group's weighted median row and NaN elsewhere, so "max" picks the median.
+
+    The median is the lower one, as in get_metric_stats: the first value in
+    order at which the cumulative weight reaches half of the group's total.
+    """
+    values = rows[field].to_numpy(dtype=np.float64)
+    marker = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if not len(valid):
+        return marker
+    groups = (rows.groupby(keys, observed=True, sort=False, dropna=False).ngroup().to_numpy()
+              if keys else np.zeros(len(values), dtype=np.int64))
+    order = valid[np.lexsort((values[valid], groups[valid]))]
+    cumulative = np.cumsum(rows["_weight"].to_numpy(dtype=np.float64)[order])
+    ordered_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, ordered_groups[1:] != ordered_groups[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+    before = np.r_[0.0, cumulative[ends[:-1] - 1]]
+    half = before + (cumulative[ends - 1] - before) / 2
+    picks = np.minimum(np.searchsorted(cumulative, half, side="left"), ends - 1)
+    marker[order[picks]] = values[order[picks]]
+    return marker
+
+def execute_query(df: pd.DataFrame, query: Query) -> Tuple[pd.DataFrame, int]:
+    """Run a query as one filtered groupby; returns the limited rows and the number of groups."""
+    missing = [field for field in query.fields if field not in df.columns]
+    if missing:
+        raise ValueError(f"Unknown field: {', '.join(missing)}")
+    for aggregate in query.aggregates:
+        field = aggregate.partition(':')[2]
+        if field and not pd.api.types.is_numeric_dtype(df[field]):
+            raise ValueError(f"Field {field} is not numeric")
+
+    # Read only the columns the query needs; collapsed and sampled rows count once per line they stand for
+    mask = _filter_mask(df, query)
+    weights = entry_weights(df) if query.uses_weights else None
+    weighted = weights is not None
+    columns = query.fields or [df.columns[0]]
+    rows = df.loc[mask, columns] if mask is not None else df[columns]
+    if weighted:
+        rows = rows.assign(_weight=weights[rows.index])
+        if "is_error" in columns:
+            rows = rows.assign(_errors=rows["is_error"] * rows["_weight"])
+    errors = ("_errors" if weighted else "is_error", "sum")
+
+    keys = list(query.group_by)
+    if query.bucket:
+        rows = rows.assign(bucket=rows["timestamp"].dt.floor(query.bucket))
+        keys.append("bucket")
+
+    named = {}
+    for aggregate in query.aggregates:
+        func, _, field = aggregate.partition(':')
+        if field and weighted and func in WEIGHTED_AGGREGATES:
+            # Weighted sums of x, x squared and the weights of non-missing values
+            values = rows[field].astype("float64")
+            rows = rows.assign(**{f"_wx_{field}": values * rows["_weight"],
+                                  f"_wxx_{field}": values * values * rows["_weight"],
+                                  f"_wn_{field}": rows["_weight"].where(values.notna(), 0)})
+            named.update({f"_wx_{field}": (f"_wx_{field}", "sum"), f"_wxx_{field}": (f"_wxx_{field}", "sum"),
+                          f"_wn_{field}": (f"_wn_{field}", "sum")})
+            if func == "median":
+                rows = rows.assign(**{f"_median_{field}": _weighted_median_marker(rows, field, keys)})
+                named[f"median_{field}"] = (f"_median_{field}", "max")
+        elif field:
+            named[f"{func}_{field}"] = (field, func)
+        elif func == "count":
+            named["count"] = ("_weight", "sum") if weighted else (columns[0], "size")
+        else:
+            named["errors"] = errors
+    if "error_rate" in query.aggregates:
+        named.setdefault("count", ("_weight", "sum") if weighted else (columns[0], "size"))
+        named.setdefault("errors", errors)
+
+    if keys:
+        result = rows.groupby(keys, observed=True, sort=False, dropna=False).agg(**named).reset_index()
+    else:
+        result = rows.assign(_all=0).groupby("_all").agg(**named).reset_index(drop=True)
+        if rows.empty:
+            result = pd.DataFrame({name: [0 if how in ("size", "sum") else None] for name, (_, how) in named.items()})
+
+    if "error_rate" in query.aggregates:
+        result["error_rate"] = (result["errors"] / result["count"] * 100).where(result["count"] > 0)
+    if weighted:
+        for aggregate in query.aggregates:
+            func, _, field = aggregate.partition(':')
+            if not field or func not in ("sum", "mean", "std"):
+                continue
+            total, squares, count = result[f"_wx_{field}"], result[f"_wxx_{field}"], result[f"_wn_{field}"]
+            if func == "sum":
+                result[f"sum_{field}"] = total
+            elif func == "mean":
+                result[f"mean_{field}"] = (total / count).where(count > 0)
+            else:
+                # Sample standard deviation of the values repeated by their weights
+                variance = ((squares - total * total / count) / (count - 1)).where(count > 1)
+                result[f"std_{field}"] = np.sqrt(variance.clip(lower=0))
+    if "errors" in result.columns:
+        result["errors"] = result["errors"].round().astype(int)
+    result = result[query.columns]
+
+    # Time series read best in time order, other results by their first aggregate
+    if query.order_by:
+        column = query.order_by.lstrip('-')
+        result = result.sort_values(column, ascending=not query.order_by.startswith('-'), kind="stable")
+    elif query.bucket:
+        result = result.sort_values(keys[::-1], kind="stable")
+    else:
+        result = result.sort_values(query.columns[len(keys)], ascending=False, kind="stable")
+
+    return result.head(query.limit).reset_index(drop=True), len(result)
+
+def query_records(result: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert a query result into JSON-serialisable records."""
+    result = result.copy()
+    for column in result.columns:
+        if pd.api.types.is_datetime64_any_dtype(result[column]):
+            result[column] = result[column].dt.strftime('%Y-%m-%d %H:%M:%S')
+        elif result[column].dtype == object:
+            result[column] = result[column].map(lambda value: value if value is None else str(value))
+    result = result.astype(object).where(result.notna(), None)
+    return result.to_dict('records')
+
+class QueryCache:
+    """Bounded LRU cache of query results keyed by data version and query."""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def execute(self, df: pd.DataFrame, query: Query, version: Hashable) -> Tuple[pd.DataFrame, int]:
+        """Return a cached result for this data version, running the query on a miss."""
+        key = (version, query.key)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        result = execute_query(df, query)
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
@@ -0,0 +1,241 @@
+import asyncio
+import json
+import logging
+import re
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .ingestion import LogParser
+
+logger = logging.getLogger(__name__)
+
+# Levels for syslog severities 0-7, named like the levels of the standard format
+SYSLOG_LEVELS = ["CRITICAL", "CRITICAL", "CRITICAL", "ERROR", "WARNING", "INFO", "INFO", "DEBUG"]
+
+# RFC 5424 and RFC 3164 (BSD) message headers
+_RFC5424 = re.compile(r'<(\d{1,3})>1 (\S+) (\S+) (\S+) \S+ \S+ (?:-|(?:\[.*?\])+) ?(.*)', re.S)
+_RFC3164 = re.compile(r'<(\d{1,3})>(\w{3} [ \d]\d \d\d:\d\d:\d\d) (\S+) ([^:\[\s]+)(?:\[\d+\])?: ?(.*)', re.S)
+
+# Protocols the receiver can listen on
+PROTOCOLS = ("syslog-udp", "syslog-tcp", "ndjson-tcp")
+
+def _local_time(value: datetime) -> datetime:
+    """Naive local time, like the timestamps parsed from log files."""
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo is not None else value
+
+def _parse_iso(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp in local time; "Z" is read as UTC on all Python versions."""
+    if value.endswith(("Z", "z")):
+        value = value[:-1] + "+00:00"
+    return _local_time(datetime.fromisoformat(value))
+
+def parse_syslog(line: str, parser: LogParser) -> Dict[str, Any]:
+    """Parse a syslog message; the message body may itself be a line in the parser's format.
+
+    Messages with a syslog header are attributed to the sending host.
+    """
+    line = line.strip()
+    header = _RFC5424.match(line)
+    if header:
+        priority, timestamp, host, app, body = header.groups()
+        try:
+            timestamp = _parse_iso(timestamp)
+        except ValueError:
+            timestamp = datetime.now()
+    else:
+        header = _RFC3164.match(line)
+        if header:
+            priority, timestamp, host, app, body = header.groups()
+            try:
+                # BSD syslog timestamps have no year
+                timestamp = datetime.strptime(f"{datetime.now().year} {timestamp}", "%Y %b %d %H:%M:%S")
+            except ValueError:
+                timestamp = datetime.now()
+        else:
+            body = line
+
+    log_entry = parser.parse_line(body)
+    if not header:
+        return log_entry
+    if not log_entry["parsed"]:
+        log_entry = {
+            "timestamp": timestamp,
+            "level": SYSLOG_LEVELS[int(priority) % 8],
+            "component": app,
+            "message": body,
+            "parsed": True,
+        }
+    log_entry["source_file"] = host
+    return log_entry
+
+def parse_ndjson(line: str) -> Dict[str, Any]:
+    """Parse one JSON object per line; timestamps are ISO 8601 strings."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return {"raw": line, "parsed": False}
+    if not isinstance(record, dict) or "timestamp" not in record:
+        return {"raw": line, "parsed": False}
+    try:
+        record["timestamp"] = _parse_iso(str(record["timestamp"]))
+    except ValueError:
+        return {"raw": line, "parsed": False}
+    record["parsed"] = True
+    return record
+
+class _SyslogDatagram(asyncio.DatagramProtocol):
+    def __init__(self, receiver: "LogReceiver"):
+        self.receiver = receiver
+
+    def datagram_received(self, data: bytes, addr):
+        source = f"syslog-udp:{addr[0]}"
+        for line in data.decode("utf-8", errors="replace").splitlines():
+            if line.strip():
+                # Datagrams cannot be pushed back on, so they are dropped when the queue is full
+                try:
+                    self.receiver.queue.put_nowait(("syslog", line, source))
+                    self.receiver.stats["received"] += 1
+                except asyncio.QueueFull:
+                    self.receiver.stats["dropped"] += 1
+
+class LogReceiver:
+    """Receives log lines over the network and delivers them in parsed batches.
+
+    Listens for syslog over UDP and TCP (one message per line) and for
+    newline-delimited JSON over TCP. Lines wait in a bounded queue; one
+    consumer parses and delivers them in batches of up to batch_size, or
+    after flush_interval seconds, on a worker thread. When delivery falls
+    behind and the queue is full, TCP connections stop being read, which
+    slows senders through TCP flow control, and UDP datagrams are dropped
+    and counted.
+    """
+
+    def __init__(self, deliver: Callable[[List[Dict[str, Any]]], Any], log_format: str = "standard",
+                 batch_size: int = 1000, flush_interval: float = 0.5, max_queue: int = 10000,
+                 max_line: int = 65536):
+        self.deliver = deliver
+        self.parser = LogParser(log_format)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.max_line = max_line
+        self.stats = {"received": 0, "delivered": 0, "unparsed": 0, "dropped": 0, "connections": 0}
+        self.queue: Optional[asyncio.Queue] = None
+        self._servers: List[Any] = []
+        self._consumer: Optional[asyncio.Task] = None
+
+    async def start(self, host: str = "127.0.0.1", ports: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """Start listening; ports maps protocol names to ports (0 picks a free one). Returns the bound ports."""
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._consumer = loop.create_task(self._consume())
+        bound = {}
+        for protocol, port in (ports or {}).items():
+            if protocol not in PROTOCOLS:
+                raise ValueError(f"Unsupported protocol: {protocol}")
+            if protocol == "syslog-udp":
+                transport, _ = await loop.create_datagram_endpoint(lambda: _SyslogDatagram(self),
+                                                                   local_addr=(host, port))
+                self._servers.append(transport)
+                bound[protocol] = transport.get_extra_info("sockname")[1]
+            else:
+                kind = "syslog" if protocol == "syslog-tcp" else "ndjson"
+                server = await asyncio.start_server(
+                    lambda reader, writer, kind=kind, protocol=protocol: self._handle(reader, writer, kind, protocol),
+                    host, port, limit=self.max_line, backlog=1024)
+                self._servers.append(server)
+                bound[protocol] = server.sockets[0].getsockname()[1]
+        return bound
+
+    async def stop(self):
+        """Stop listening and deliver the lines already queued."""
+        for server in self._servers:
+            server.close()
+        self._servers = []
+        if self.queue is not None:
+            await self.queue.join()
+        if self._consumer is not None:
+            self._consumer.cancel()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, kind: str, protocol: str):
+        peer = writer.get_extra_info("peername")
+        source = f"{protocol}:{peer[0] if peer else 'unknown'}"
+        self.stats["connections"] += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    logger.warning(f"Closing {source}: line longer than {self.max_line} bytes")
+                    break
+                if not line:
+                    break
+                text = line.decode("utf-8", errors="replace")
+                if text.strip():
+                    # Waits while the queue is full, so this connection is not read meanwhile
+                    await self.queue.put((kind, text, source))
+                    self.stats["received"] += 1
+        except ConnectionError:
+            pass
+        finally:
+            self.stats["connections"] -= 1
+            writer.close()
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                # Parsing and delivery run off the event loop, so connections keep being served
+                await loop.run_in_executor(None, self._process, batch)
+            except Exception as e:
+                logger.error(f"Error delivering received logs: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _process(self, batch: List[Tuple[str, str, str]]):
+        entries = []
+        for kind, line, source in batch:
+            log_entry = parse_syslog(line, self.parser) if kind == "syslog" else parse_ndjson(line)
+            if not log_entry["parsed"]:
+                self.stats["unparsed"] += 1
+                continue
+            log_entry.setdefault("source_file", source)
+            entries.append(log_entry)
+        if entries:
+            self.deliver(entries)
+            self.stats["delivered"] += len(entries)
+
+def start_receiver_thread(receiver: LogReceiver, host: str, ports: Dict[str, int]) -> Dict[str, int]:
+    """Run a receiver on its own event loop in a daemon thread; returns the bound ports."""
+    started = threading.Event()
+    result: Dict[str, Any] = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            result["ports"] = loop.run_until_complete(receiver.start(host, ports))
+        except Exception as e:
+            result["error"] = e
+            started.set()
+            return
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="log-receiver", daemon=True).start()
+    started.wait()
+    if "error" in result:
+        raise result["error"]
+    return result["ports"]
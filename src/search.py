@@ -0,0 +1,295 @@
+import gzip
+import heapq
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Generator, Iterable, List, Optional, Sequence
+
+from .ingestion import LogParser, _CONTINUATION_PATTERN
+
+# Optional Aho-Corasick automaton for the literal prefilter
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Lines between timestamp checks when scanning up to an end time
+_UNTIL_PROBE_INTERVAL = 1024
+
+# Byte range below which the start offset search reads forward instead of bisecting
+_SEEK_BLOCK = 64 * 1024
+
+def required_literal(pattern: str) -> str:
+    """Return the longest literal that every match of a regex contains, or "" if none is found.
+
+    Only the top level of the pattern is inspected: groups, classes, anchors
+    and escapes other than escaped punctuation end a literal, and a top-level
+    alternation means no single literal is required.
+    """
+    best, run = "", ""
+    depth = 0
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        literal = None
+        if char == "\\" and i + 1 < n:
+            if not pattern[i + 1].isalnum():
+                literal = pattern[i + 1]
+            i += 2
+        elif char == "[":
+            # Skip the class, where "]" may come first and characters may be escaped
+            i += 1
+            if i < n and pattern[i] == "^":
+                i += 1
+            if i < n and pattern[i] == "]":
+                i += 1
+            while i < n and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+        elif char == "{":
+            # Skip a repetition count
+            closing = pattern.find("}", i)
+            i = closing + 1 if closing != -1 else n
+        else:
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            elif char == "|" and depth == 0:
+                return ""
+            elif char not in ".^$*+?{}|" and depth == 0:
+                literal = char
+            i += 1
+
+        if literal is None:
+            run = ""
+            continue
+        quantifier = pattern[i] if i < n else ""
+        if quantifier in ("*", "?", "{"):
+            # The character may be absent, so the literal ends before it
+            run = ""
+            continue
+        run += literal
+        if len(run) > len(best):
+            best = run
+        if quantifier == "+":
+            run = ""
+    return best
+
+class PatternSet:
+    """Several regular expressions matched in one pass, behind a literal prefilter.
+
+    Each pattern contributes the longest literal its matches must contain. A
+    line is only run through the patterns whose literal it contains (plus
+    those without one), found with an Aho-Corasick automaton when
+    pyahocorasick is installed and with one combined regex otherwise.
+    """
+
+    def __init__(self, patterns: Sequence[str], ignore_case: bool = False):
+        if not patterns:
+            raise ValueError("At least one pattern is required")
+        flags = re.IGNORECASE if ignore_case else 0
+        try:
+            self.regexes = [re.compile(pattern, flags) for pattern in patterns]
+        except re.error as e:
+            raise ValueError(f"Invalid pattern: {e}")
+        self.patterns = list(patterns)
+
+        # Literals are compared with the lowered line when any pattern ignores case
+        self.fold = any(regex.flags & re.IGNORECASE for regex in self.regexes)
+        self.literals: Dict[str, List[int]] = {}
+        self.always: List[int] = []
+        for index, regex in enumerate(self.regexes):
+            literal = "" if regex.flags & re.VERBOSE else required_literal(regex.pattern)
+            if self.fold:
+                literal = literal.lower()
+            if literal:
+                self.literals.setdefault(literal, []).append(index)
+            else:
+                self.always.append(index)
+
+        self._automaton = None
+        self._any_literal = None
+        if self.literals and ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for literal, indexes in self.literals.items():
+                self._automaton.add_word(literal, indexes)
+            self._automaton.make_automaton()
+        elif self.literals:
+            alternatives = sorted(self.literals, key=len, reverse=True)
+            self._any_literal = re.compile("|".join(re.escape(literal) for literal in alternatives))
+
+    def candidates(self, line: str) -> List[int]:
+        """Indexes of the patterns that can match the line, by the prefilter."""
+        if not self.literals:
+            return self.always
+        text = line.lower() if self.fold else line
+        if self._automaton is not None:
+            found = {index for _, indexes in self._automaton.iter(text) for index in indexes}
+        elif self._any_literal.search(text) is None:
+            return self.always
+        else:
+            found = {index for literal, indexes in self.literals.items() if literal in text for index in indexes}
+        return sorted(found.union(self.always)) if found else self.always
+
+    def match(self, line: str) -> List[int]:
+        """Indexes of the patterns that match the line."""
+        return [index for index in self.candidates(line) if self.regexes[index].search(line)]
+
+def parse_time(value: str, today: Optional[datetime] = None) -> datetime:
+    """Parse an ISO 8601 date and time, or a time of day on the current date."""
+    try:
+        return _naive(datetime.fromisoformat(value))
+    except ValueError:
+        pass
+    try:
+        time_of_day = datetime.strptime(value, "%H:%M:%S" if value.count(":") == 2 else "%H:%M").time()
+    except ValueError:
+        raise ValueError(f"Invalid time '{value}', expected YYYY-MM-DD[ HH:MM[:SS]] or HH:MM[:SS]")
+    return datetime.combine((today or datetime.now()).date(), time_of_day)
+
+def _naive(value: datetime) -> datetime:
+    # Timestamps with an offset (such as nginx ones) are compared in local time
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo is not None else value
+
+def _timestamp(parser: LogParser, line: str) -> Optional[datetime]:
+    log_entry = parser.parse_line(line)
+    timestamp = log_entry.get("timestamp") if log_entry["parsed"] else None
+    return _naive(timestamp) if isinstance(timestamp, datetime) else None
+
+def _open(path: Path):
+    return gzip.open(path, "rb") if path.suffix == ".gz" else open(path, "rb")
+
+def _first_timestamp_after(file, offset: int, parser: LogParser, lines: int = 50) -> Optional[datetime]:
+    file.seek(offset)
+    if offset:
+        file.readline()
+    for _ in range(lines):
+        raw = file.readline()
+        if not raw:
+            return None
+        timestamp = _timestamp(parser, raw.decode("utf-8", errors="replace"))
+        if timestamp is not None:
+            return timestamp
+    return None
+
+def start_offset(file, size: int, parser: LogParser, since: datetime) -> int:
+    """Bisect a time-ordered file for an offset at or before its first line at or after since."""
+    low, high = 0, size
+    while high - low > _SEEK_BLOCK:
+        middle = (low + high) // 2
+        timestamp = _first_timestamp_after(file, middle, parser)
+        if timestamp is None or timestamp >= since:
+            high = middle
+        else:
+            low = middle
+    return low
+
+def _line_count(file, end: int) -> int:
+    file.seek(0)
+    count = 0
+    while file.tell() < end:
+        chunk = file.read(min(1 << 20, end - file.tell()))
+        if not chunk:
+            break
+        count += chunk.count(b"\n")
+    return count
+
+def grep_file(path: Path, patterns: PatternSet, format_name: str = "standard", since: Optional[datetime] = None,
+              until: Optional[datetime] = None, line_numbers: bool = False) -> Generator[Dict[str, Any], None, None]:
+    """Yield the lines of one log file that match any pattern, in file order.
+
+    Matches carry the fields parsed from the line and its byte offset. A
+    matching continuation line, such as a stack trace line, gets the
+    timestamp, level and component of the entry it belongs to. Files are
+    assumed to be in time order: with since, plain files are bisected to skip
+    earlier lines, and with until, reading stops once a sampled line is later.
+    Line numbers are unknown (None) after a skip unless line_numbers is set,
+    which reads the skipped part to count them.
+    """
+    parser = LogParser(format_name)
+    with _open(path) as file:
+        line_number = 0
+        position = 0
+        if since is not None and path.suffix != ".gz":
+            size = os.fstat(file.fileno()).st_size
+            offset = start_offset(file, size, parser, since)
+            if offset:
+                # Skip the rest of the line the offset falls in, which is earlier than since
+                line_number = _line_count(file, offset) + 1 if line_numbers else None
+                file.seek(offset)
+                position = offset + len(file.readline())
+
+        # Last line that starts an entry, parsed only when a continuation line matches
+        owner = None
+        for lines_read, raw in enumerate(file, start=1):
+            if line_number is not None:
+                line_number += 1
+            line_offset = position
+            position += len(raw)
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            if until is not None and lines_read % _UNTIL_PROBE_INTERVAL == 0:
+                timestamp = _timestamp(parser, line)
+                if timestamp is not None and timestamp > until:
+                    break
+            matched = patterns.match(line)
+            continuation = _CONTINUATION_PATTERN.match(line) is not None
+            if not continuation:
+                owner = line
+            if not matched:
+                continue
+
+            log_entry = parser.parse_line(line)
+            if not log_entry["parsed"]:
+                log_entry = parser.parse_line(owner) if continuation and owner is not None else {"parsed": False}
+                log_entry.pop("message", None)
+            timestamp = log_entry.get("timestamp")
+            timestamp = _naive(timestamp) if isinstance(timestamp, datetime) else None
+            if (since is not None or until is not None) and timestamp is None:
+                continue
+            if (since is not None and timestamp < since) or (until is not None and timestamp > until):
+                continue
+
+            fields = {key: value for key, value in log_entry.items() if key not in ("timestamp", "raw", "parsed")}
+            yield {
+                "timestamp": timestamp,
+                "source_file": path.name,
+                "line_number": line_number,
+                "offset": line_offset,
+                "line": line,
+                "patterns": [patterns.patterns[index] for index in matched],
+                **fields,
+            }
+
+def _grep_file_list(path: Path, patterns: Sequence[str], ignore_case: bool, format_name: str,
+                    since: Optional[datetime], until: Optional[datetime], line_numbers: bool) -> List[Dict[str, Any]]:
+    # Worker entry point; the pattern set is rebuilt because automatons do not pickle
+    return list(grep_file(path, PatternSet(patterns, ignore_case), format_name, since, until, line_numbers))
+
+def _merge_key(match: Dict[str, Any]):
+    return match["timestamp"] or datetime.min
+
+def grep_logs(file_paths: Iterable[Path], patterns: Sequence[str], format_name: str = "standard",
+              ignore_case: bool = False, since: Optional[datetime] = None, until: Optional[datetime] = None,
+              workers: int = 1, line_numbers: bool = False) -> Generator[Dict[str, Any], None, None]:
+    """Yield the matching lines of several log files merged in timestamp order.
+
+    With one worker, files are read together and matches stream as they are
+    found. With more, each file is searched in a separate process and the
+    results are merged once all files are done. See grep_file for when line
+    numbers are counted.
+    """
+    file_paths = list(file_paths)
+    pattern_set = PatternSet(patterns, ignore_case)
+    if workers > 1 and len(file_paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(file_paths))) as executor:
+            futures = [executor.submit(_grep_file_list, path, patterns, ignore_case, format_name, since, until,
+                                       line_numbers)
+                       for path in file_paths]
+            results = [future.result() for future in futures]
+        yield from heapq.merge(*results, key=_merge_key)
+    else:
+        yield from heapq.merge(*(grep_file(path, pattern_set, format_name, since, until, line_numbers)
+                                 for path in file_paths), key=_merge_key)
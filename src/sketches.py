@@ -0,0 +1,346 @@
+import base64
+import hashlib
+import heapq
+import math
+import re
+from typing import Dict, Any, List, Tuple, Optional
+
+import numpy as np
+
+from .config.message_fields import SKETCH_FIELDS, LATENCY_PATTERN
+
+def hash64(value: str) -> int:
+    """Hash a string to a stable 64-bit integer.
+
+    The built-in hash() is salted per process, so it cannot be used for
+    sketches that are merged across processes or hosts.
+    """
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+class HyperLogLog:
+    """Distinct-count estimator using 2**precision one-byte registers."""
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"Invalid HyperLogLog precision: {precision}")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str):
+        """Add a value to the sketch."""
+        h = hash64(value)
+        index = h >> (64 - self.precision)
+        # Rank is the position of the leftmost 1-bit in the remaining bits
+        rest = (h << self.precision) & 0xFFFFFFFFFFFFFFFF
+        rank = min(64 - rest.bit_length(), 64 - self.precision) + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        """Estimate the number of distinct values added."""
+        m = len(self.registers)
+        registers = np.frombuffer(bytes(self.registers), dtype=np.uint8)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.ldexp(1.0, -registers.astype(np.int32)).sum()
+
+        # Small range correction (linear counting)
+        zeros = int((registers == 0).sum())
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def merge(self, other: "HyperLogLog"):
+        """Merge another sketch with the same precision into this one."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        merged = np.maximum(
+            np.frombuffer(bytes(self.registers), dtype=np.uint8),
+            np.frombuffer(bytes(other.registers), dtype=np.uint8),
+        )
+        self.registers = bytearray(merged.tobytes())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(bytes(self.registers)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        sketch = cls(data["precision"])
+        sketch.registers = bytearray(base64.b64decode(data["registers"]))
+        return sketch
+
+class CountMinSketch:
+    """Frequency estimator with one-sided (over-counting) error."""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self._rows = np.arange(depth)
+
+    def _indices(self, value: str) -> np.ndarray:
+        # Double hashing derives all row indices from one 64-bit hash
+        h = hash64(value)
+        h1, h2 = h & 0xFFFFFFFF, h >> 32
+        return (h1 + self._rows * h2) % self.width
+
+    def add(self, value: str, count: int = 1) -> int:
+        """Add a value and return its updated frequency estimate."""
+        indices = self._indices(value)
+        self.table[self._rows, indices] += count
+        return int(self.table[self._rows, indices].min())
+
+    def estimate(self, value: str) -> int:
+        """Estimate how many times a value was added."""
+        return int(self.table[self._rows, self._indices(value)].min())
+
+    def merge(self, other: "CountMinSketch"):
+        """Merge another sketch with the same dimensions into this one."""
+        if self.table.shape != other.table.shape:
+            raise ValueError("Cannot merge Count-Min sketches with different dimensions")
+        self.table += other.table
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "width": self.width,
+            "depth": self.depth,
+            "table": base64.b64encode(self.table.astype("<i8").tobytes()).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CountMinSketch":
+        sketch = cls(data["width"], data["depth"])
+        table = np.frombuffer(base64.b64decode(data["table"]), dtype="<i8")
+        sketch.table = table.reshape(sketch.depth, sketch.width).astype(np.int64)
+        return sketch
+
+class TopK:
+    """Heavy-hitter tracker: a Count-Min sketch plus a bounded candidate set."""
+
+    def __init__(self, k: int = 10, capacity: Optional[int] = None,
+                 width: int = 2048, depth: int = 4):
+        self.k = k
+        self.capacity = capacity or k * 10
+        self.counts = CountMinSketch(width, depth)
+        self.candidates: Dict[str, int] = {}
+        # Min-heap of (estimate, value); entries whose estimate is out of date are skipped
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, value: str, count: int = 1):
+        """Add a value, keeping it as a candidate if it is frequent enough."""
+        estimate = self.counts.add(value, count)
+        if value in self.candidates or len(self.candidates) < self.capacity:
+            self.candidates[value] = estimate
+            heapq.heappush(self._heap, (estimate, value))
+            if len(self._heap) > 4 * self.capacity:
+                self._rebuild_heap()
+        elif estimate > self._weakest()[0]:
+            # Replace the least frequent candidate
+            _, weakest = heapq.heappop(self._heap)
+            del self.candidates[weakest]
+            self.candidates[value] = estimate
+            heapq.heappush(self._heap, (estimate, value))
+
+    def _weakest(self) -> Tuple[int, str]:
+        # Drop heap entries for evicted values or counts that have grown since
+        while self._heap and self.candidates.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0]
+
+    def _rebuild_heap(self):
+        self._heap = [(estimate, value) for value, estimate in self.candidates.items()]
+        heapq.heapify(self._heap)
+
+    def top(self, k: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Return the k most frequent values with their estimated counts."""
+        ranked = sorted(self.candidates.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:k or self.k]
+
+    def merge(self, other: "TopK"):
+        """Merge another tracker into this one."""
+        self.counts.merge(other.counts)
+        values = set(self.candidates) | set(other.candidates)
+        estimates = {value: self.counts.estimate(value) for value in values}
+        ranked = sorted(estimates.items(), key=lambda item: -item[1])[:self.capacity]
+        self.candidates = dict(ranked)
+        self._rebuild_heap()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "k": self.k,
+            "capacity": self.capacity,
+            "counts": self.counts.to_dict(),
+            "candidates": self.candidates,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TopK":
+        sketch = cls(data["k"], data["capacity"])
+        sketch.counts = CountMinSketch.from_dict(data["counts"])
+        sketch.candidates = dict(data["candidates"])
+        sketch._rebuild_heap()
+        return sketch
+
+class DDSketch:
+    """Quantile estimator with bounded relative error (positive values)."""
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, count: int = 1):
+        """Add a value to the sketch."""
+        self.count += count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 0:
+            self.zero_count += count
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        # Fold the lowest buckets together so memory stays bounded
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        folded = sum(self.buckets.pop(key) for key in keys[:excess])
+        target = keys[excess]
+        self.buckets[target] += folded
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-quantile (0 <= q <= 1) of the added values."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def merge(self, other: "DDSketch"):
+        """Merge another sketch with the same accuracy into this one."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge DDSketches with different accuracy")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "buckets": {str(key): count for key, count in self.buckets.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DDSketch":
+        sketch = cls(data["relative_accuracy"], data["max_buckets"])
+        sketch.buckets = {int(key): count for key, count in data["buckets"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+class LogSketches:
+    """Mergeable sketches maintained over a stream of parsed log entries."""
+
+    def __init__(self, fields: Optional[Dict[str, str]] = None, top_k: int = 10):
+        self.fields = dict(SKETCH_FIELDS if fields is None else fields)
+        self._patterns = {name: re.compile(pattern) for name, pattern in self.fields.items()}
+        self._latency_pattern = re.compile(LATENCY_PATTERN)
+        self.distinct = {name: HyperLogLog() for name in self.fields}
+        self.top = {name: TopK(top_k) for name in self.fields}
+        self.latency = DDSketch()
+        self.component_latency: Dict[str, DDSketch] = {}
+
+    def update(self, entry: Dict[str, Any]):
+        """Update all sketches with a single parsed log entry."""
+        if not entry.get("parsed", True):
+            return
+        message = entry.get("message") or ""
+
+        for name, pattern in self._patterns.items():
+            value = entry.get(name)
+            if value is None:
+                match = pattern.search(message)
+                if not match:
+                    continue
+                value = match.group(1)
+            self.distinct[name].add(value)
+            self.top[name].add(value)
+
+        # Track latencies overall and per component
+        match = self._latency_pattern.search(message)
+        if match:
+            latency = float(match.group(1))
+            self.latency.add(latency)
+            component = entry.get("component")
+            if component is not None:
+                if component not in self.component_latency:
+                    self.component_latency[component] = DDSketch()
+                self.component_latency[component].add(latency)
+
+    def merge(self, other: "LogSketches"):
+        """Merge sketches built from another part of the stream."""
+        for name in other.fields:
+            if name in self.distinct:
+                self.distinct[name].merge(other.distinct[name])
+                self.top[name].merge(other.top[name])
+        self.latency.merge(other.latency)
+        for component, sketch in other.component_latency.items():
+            if component in self.component_latency:
+                self.component_latency[component].merge(sketch)
+            else:
+                self.component_latency[component] = DDSketch.from_dict(sketch.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fields": self.fields,
+            "distinct": {name: sketch.to_dict() for name, sketch in self.distinct.items()},
+            "top": {name: sketch.to_dict() for name, sketch in self.top.items()},
+            "latency": self.latency.to_dict(),
+            "component_latency": {
+                component: sketch.to_dict()
+                for component, sketch in self.component_latency.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LogSketches":
+        sketches = cls(data["fields"])
+        sketches.distinct = {name: HyperLogLog.from_dict(d) for name, d in data["distinct"].items()}
+        sketches.top = {name: TopK.from_dict(d) for name, d in data["top"].items()}
+        sketches.latency = DDSketch.from_dict(data["latency"])
+        sketches.component_latency = {
+            component: DDSketch.from_dict(d)
+            for component, d in data["component_latency"].items()
+        }
+        return sketches
@@ -0,0 +1,122 @@
+import shutil
+import tempfile
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Generator, Iterable, List, Optional, Union
+
+import pandas as pd
+
+from .distributed import build_partial, merge_partials
+from .processing import process_logs, sort_by_time, time_deltas
+from .sketches import LogSketches
+
+# Parquet needs pyarrow; without it chunks are pickled, which keeps the columns as they are
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """Resident size of a DataFrame in bytes, including the strings it holds."""
+    return int(df.memory_usage(deep=True).sum())
+
+class SpilledLogs:
+    """A processed dataset held as chunks, the oldest moved to disk beyond a memory budget.
+
+    Chunks are kept in memory until their total size exceeds memory_budget
+    bytes; then the oldest are written to files in a temporary directory
+    (Parquet when pyarrow is installed) until the rest fits. chunks() reads
+    the spilled chunks back one at a time, followed by the in-memory tail.
+    """
+
+    def __init__(self, memory_budget: int, directory: Optional[Path] = None):
+        if memory_budget <= 0:
+            raise ValueError("Memory budget must be positive")
+        self.memory_budget = memory_budget
+        self.directory = Path(tempfile.mkdtemp(prefix="log-spill-", dir=directory))
+        self.spilled: List[Path] = []
+        self.spilled_bytes = 0
+        self.tail: List[pd.DataFrame] = []
+        self.memory = 0
+        self.rows = 0
+
+    def add(self, chunk: pd.DataFrame):
+        """Keep a processed chunk, spilling the oldest chunks if the budget is exceeded."""
+        if chunk.empty:
+            return
+        self.tail.append(chunk)
+        self.memory += frame_memory(chunk)
+        self.rows += len(chunk)
+        while self.memory > self.memory_budget and self.tail:
+            self._spill(self.tail.pop(0))
+
+    def _spill(self, chunk: pd.DataFrame):
+        size = frame_memory(chunk)
+        path = self.directory / f"chunk-{len(self.spilled):06d}"
+        if pyarrow is not None:
+            path = path.with_suffix(".parquet")
+            chunk.to_parquet(path, index=False)
+        else:
+            path = path.with_suffix(".pkl")
+            chunk.to_pickle(path)
+        self.spilled.append(path)
+        self.spilled_bytes += size
+        self.memory -= size
+
+    def chunks(self) -> Generator[pd.DataFrame, None, None]:
+        """Yield every chunk in the order added, reading spilled ones back from disk."""
+        for path in self.spilled:
+            yield pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_pickle(path)
+        yield from self.tail
+
+    def to_frame(self) -> pd.DataFrame:
+        """Combine the chunks into one DataFrame ordered by time, as process_logs returns."""
+        chunks = list(self.chunks())
+        if not chunks:
+            return process_logs([])
+        df = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+        if "timestamp" in df.columns:
+            df = sort_by_time(df).reset_index(drop=True)
+            df["time_delta"] = time_deltas(df)
+        return df
+
+    def to_partial(self, sketches: LogSketches) -> Dict[str, Any]:
+        """Aggregate the chunks one at a time into the partial results of distributed analysis."""
+        partial = merge_partials(build_partial(chunk, LogSketches()) for chunk in self.chunks())
+        partial["sketches"] = sketches.to_dict()
+        return partial
+
+    def close(self):
+        """Delete the spilled chunk files."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.spilled = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def process_logs_within_budget(logs: Iterable[Dict[str, Any]], memory_budget: int, directory: Optional[Path] = None,
+                               chunk_size: int = 20000,
+                               metric_fields: Optional[Dict[str, Dict[str, Any]]] = None
+                               ) -> Union[pd.DataFrame, SpilledLogs]:
+    """Process entries chunk by chunk, spilling chunks to disk beyond memory_budget bytes.
+
+    Returns the same DataFrame as process_logs when everything fits, and the
+    SpilledLogs otherwise; the caller closes it. Time deltas of spilled data
+    are taken within each chunk.
+    """
+    spilled = SpilledLogs(memory_budget, directory)
+    logs = iter(logs)
+    while True:
+        batch = list(islice(logs, chunk_size))
+        if not batch:
+            break
+        spilled.add(process_logs(batch, metric_fields, chunk_size))
+
+    if spilled.spilled:
+        return spilled
+    df = spilled.to_frame()
+    spilled.close()
+    return df
@@ -3,13 +3,23 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 
+from .analysis import entry_weights
+
+def _weighted_counts(df: pd.DataFrame, column: str) -> pd.Series:
+    """Count rows per value of a column, weighted like the report counts of collapsed or sampled rows."""
+    weights = entry_weights(df)
+    return df[column].value_counts() if weights is None else weights.groupby(df[column]).sum()
+
 def create_log_level_distribution(df: pd.DataFrame, output_path: Path):
     """Create a pie chart showing distribution of log levels."""
     if "level" not in df.columns:
         return
         
+    plot_level_counts(_weighted_counts(df, "level"), output_path)
+
+def plot_level_counts(level_counts: pd.Series, output_path: Path):
+    """Create the log level pie chart from counts per level."""
     plt.figure(figsize=(10, 6))
-    level_counts = df["level"].value_counts()
     plt.pie(level_counts, labels=level_counts.index, autopct='%1.1f%%')
     plt.title("Log Level Distribution")
     plt.savefig(output_path / "level_distribution.png")
@@ -20,8 +30,12 @@ def create_hourly_distribution(df: pd.DataFrame, output_path: Path):
     if "hour" not in df.columns:
         return
         
+    plot_hourly_counts(_weighted_counts(df, "hour"), output_path)
+
+def plot_hourly_counts(hourly: pd.Series, output_path: Path):
+    """Create the hourly bar chart from counts per hour of day."""
+    hourly = hourly.sort_index()
     plt.figure(figsize=(12, 6))
-    hourly = df["hour"].value_counts().sort_index()
     sns.barplot(x=hourly.index, y=hourly.values)
     plt.title("Log Distribution by Hour")
     plt.xlabel("Hour of Day")
@@ -32,12 +46,16 @@ def create_hourly_distribution(df: pd.DataFrame, output_path: Path):
 
 def create_component_error_chart(df: pd.DataFrame, output_path: Path):
     """Create a bar chart showing error rates by component."""
-    component_stats = df.groupby("component").agg(
-        total=("component", "count"),
-        errors=("is_error", "sum")
-    )
+    weights = entry_weights(df)
+    if weights is None:
+        weights = pd.Series(1, index=df.index)
+    component_stats = pd.DataFrame({"total": weights, "errors": weights * df["is_error"]}).groupby(df["component"]).sum()
     component_stats["error_rate"] = (component_stats["errors"] / component_stats["total"]) * 100
-    component_stats = component_stats.sort_values("error_rate", ascending=False)
+    plot_component_error_rates(component_stats["error_rate"], output_path)
+
+def plot_component_error_rates(error_rates: pd.Series, output_path: Path):
+    """Create the component error rate bar chart from error rates per component."""
+    component_stats = error_rates.sort_values(ascending=False).to_frame("error_rate")
     
     plt.figure(figsize=(12, 6))
     sns.barplot(x=component_stats.index, y=component_stats["error_rate"])
@@ -55,22 +73,16 @@ def create_time_series_plot(df: pd.DataFrame, output_path: Path):
         return
     
     # Resample to 15-minute intervals
-    time_series = df.set_index("timestamp")
-    counts = time_series.resample("15T").size()
-    
-    plt.figure(figsize=(15, 6))
-    counts.plot()
-    plt.title("Log Volume Over Time")
-    plt.xlabel("Time")
-    plt.ylabel("Number of Logs")
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig(output_path / "time_series.png")
-    plt.close()
+    weights = entry_weights(df)
+    if weights is None:
+        weights = pd.Series(1, index=df.index)
+    weights = pd.Series(weights.to_numpy(), index=df["timestamp"])
+    counts = weights.resample("15min").sum()
+    plot_volume_series(counts, output_path)
     
     # Also plot error counts if available
     if "is_error" in df.columns:
-        error_series = time_series[time_series["is_error"]].resample("15T").size()
+        error_series = weights[df["is_error"].to_numpy()].resample("15min").sum()
         
         plt.figure(figsize=(15, 6))
         plt.plot(counts.index, counts.values, label="All Logs")
@@ -82,4 +94,16 @@ def create_time_series_plot(df: pd.DataFrame, output_path: Path):
         plt.grid(True)
         plt.tight_layout()
         plt.savefig(output_path / "error_time_series.png")
-        plt.close()
\ No newline at end of file
+        plt.close()
+
+def plot_volume_series(counts: pd.Series, output_path: Path):
+    """Create the log volume chart from counts per time bucket."""
+    plt.figure(figsize=(15, 6))
+    counts.plot()
+    plt.title("Log Volume Over Time")
+    plt.xlabel("Time")
+    plt.ylabel("Number of Logs")
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(output_path / "time_series.png")
+    plt.close()
@@ -1,35 +1,144 @@
 # src/web/app.py
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, g, render_template, jsonify, request, stream_with_context
 from pathlib import Path
 import pandas as pd
 from datetime import datetime, timedelta
 import json
 import logging
+import threading
+import time
+import copy
+from typing import Dict, List, Optional, Tuple
 
-from ..ingestion import load_multiple_logs
-from ..processing import logs_to_dataframe, preprocess_dataframe, enrich_data
-from ..analysis import get_error_rate, find_busiest_hour, get_component_stats, detect_anomalies
+from ..ingestion import Quarantine, track_sketches, log_file_offsets, follow_logs
+from ..processing import process_logs, append_sorted
+from ..analysis import (
+    get_error_rate, find_busiest_hour, get_component_stats, detect_anomalies,
+    get_distinct_counts, get_top_values, get_latency_percentiles, get_metric_stats,
+    get_inter_arrival_stats, detect_gaps, detect_bursts, GapTracker,
+)
+from .responses import FastJSONProvider, ResponseCache, cached_api
+from ..sketches import LogSketches
+from ..query import Query, QueryCache, query_records
+from ..anomaly import AnomalyEngine, parse_thresholds
+from .events import EventBroadcaster, BatchEvent, Filters
+from .datasets import DEFAULT_DATASET, DatasetRegistry, UnknownDataset
+from ..alerts import AlertEngine
+from ..receiver import LogReceiver, start_receiver_thread
+from ..metrics import CONTENT_TYPE, Collected, LogMetrics
+from ..correlation import error_matrix, detect_incidents_from_matrix, correlated_series
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 
-# Global variable to store the DataFrame
-df = None
+# Counters and histograms of ingested entries, served at /metrics
+log_metrics = LogMetrics()
+
+# Named log directories, loaded on first request and evicted under a memory budget
+datasets = DatasetRegistry(metrics=log_metrics)
+log_metrics.registry.register(Collected(
+    "log_dataset_memory_bytes", "Memory used by the loaded data of each dataset.", "gauge", ("dataset",),
+    lambda: {(dataset['name'],): dataset['memory_bytes'] for dataset in datasets.describe() if dataset['loaded']},
+))
+
+# Serialised responses keyed by data version, so entries of old versions just age out
+response_cache = ResponseCache()
+
+# Results of ad-hoc queries, shared by requests that differ only in argument order
+query_cache = QueryCache()
+
+# Anomaly scores per data version, filtered for each requested threshold
+anomaly_engine = AnomalyEngine()
+
+# Live stream of entries appended to the default dataset
+broadcaster = EventBroadcaster()
+following = False
+
+# Alert rules evaluated on every batch appended to the default dataset
+alert_engine: Optional[AlertEngine] = None
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def load_data(log_dir: Path, log_format: str = "standard"):
+def load_data(log_dir: Path, log_format: str = "standard", name: str = DEFAULT_DATASET):
     """Load and process log data."""
-    global df
-    logger.debug(f"Loading data from {log_dir} with format {log_format}")
-    logs = list(load_multiple_logs(log_dir, log_format))
-    logger.debug(f"Loaded {len(logs)} log entries")
-    df = logs_to_dataframe(logs)
-    df = preprocess_dataframe(df)
-    df = enrich_data(df)
-    logger.debug(f"Processed DataFrame shape: {df.shape}")
-    return df
+    datasets.register(name, log_dir, log_format, pinned=(name == DEFAULT_DATASET))
+    return datasets.snapshot(name).df
+
+def current_snapshot():
+    """Return the snapshot of the requested dataset, the same one for the whole request."""
+    if 'snapshot' not in g:
+        g.snapshot = datasets.snapshot(request.args.get('dataset') or DEFAULT_DATASET)
+    return g.snapshot
+
+def current_version():
+    """Return the version of the requested data, or None when nothing is loaded."""
+    return current_snapshot().etag_version
+
+api_cache = cached_api(response_cache, current_version)
+
+@app.errorhandler(UnknownDataset)
+def unknown_dataset(e):
+    return jsonify({"error": f"Unknown dataset: {e.args[0]}"}), 404
+
+def append_logs(entries, anomaly_threshold: float = 3.0, name: str = DEFAULT_DATASET) -> pd.DataFrame:
+    """Add newly ingested entries to a loaded dataset and notify stream subscribers."""
+    dataset = datasets.get(name)
+    start = time.perf_counter()
+    batch_sketches = LogSketches()
+    batch = process_logs(track_sketches(entries, batch_sketches))
+    log_metrics.observe(name, batch, time.perf_counter() - start)
+    if batch.empty:
+        return batch
+    
+    with dataset.write_lock:
+        # Build the next snapshot from copies; the published one stays untouched
+        current = dataset.snapshot
+        df = current.df
+        last_seen = dict(current.last_seen)
+        in_order = df.empty or batch["timestamp"].min() >= df["timestamp"].iloc[-1]
+        combined = append_sorted(df, batch, last_seen)
+        
+        sketches = copy.deepcopy(current.sketches)
+        sketches.merge(batch_sketches)
+        
+        # Late entries can split gaps already recorded, so those rebuild the tracker
+        if in_order:
+            gap_tracker = copy.deepcopy(current.gap_tracker)
+            gaps = gap_tracker.update(batch)
+        else:
+            gap_tracker = GapTracker()
+            gaps = gap_tracker.update(combined)
+        
+        # Only buckets touched by the batch (plus the rolling window) need rescoring
+        first_bucket = batch["timestamp"].min().floor("5min")
+        start = combined["timestamp"].searchsorted(first_bucket - pd.Timedelta(minutes=60))
+        anomalies = detect_anomalies(combined.iloc[start:], anomaly_threshold)
+        if not anomalies.empty:
+            anomalies = anomalies[anomalies["timestamp"] >= first_bucket]
+        
+        dataset.snapshot = current._replace(
+            df=combined, sketches=sketches, gap_tracker=gap_tracker, last_seen=last_seen,
+            version=current.version + 1, memory=current.memory + int(batch.memory_usage(deep=True).sum()),
+        )
+    
+    if name == DEFAULT_DATASET:
+        broadcaster.publish(BatchEvent(batch, anomalies, gaps if in_order else None))
+        if alert_engine is not None:
+            alert_engine.evaluate(batch)
+    logger.debug(f"Appended {len(batch)} entries to {name}, DataFrame shape: {combined.shape}")
+    return batch
+
+def parse_filters(args) -> Filters:
+    """Read the entry filters shared by /api/logs and /api/stream."""
+    dates = {}
+    for name in ('start_date', 'end_date'):
+        dates[name] = None
+        if args.get(name):
+            try:
+                dates[name] = pd.to_datetime(args.get(name))
+            except Exception as e:
+                logger.error(f"Error parsing {name}: {e}")
+    return Filters(args.get('level'), args.get('component'), dates['start_date'], dates['end_date'])
 
 @app.route('/')
 def index():
@@ -37,9 +146,11 @@ def index():
     return render_template('index.html')
 
 @app.route('/api/stats')
+@api_cache
 def get_stats():
     """Get overall statistics."""
     logger.debug("Received request for stats")
+    df = current_snapshot().df
     if df is None:
         logger.error("No data loaded")
         return jsonify({"error": "No data loaded"}), 400
@@ -75,7 +186,8 @@ def get_stats():
             'total_logs': int(total_logs),
             'error_rate': float(error_rate),
             'busiest_hour': (int(busiest_hour[0]), int(busiest_hour[1])),
-            'components': component_stats
+            'components': component_stats,
+            'following': following and (request.args.get('dataset') or DEFAULT_DATASET) == DEFAULT_DATASET
         }
         
         logger.debug(f"Returning stats: {stats}")
@@ -85,43 +197,26 @@ def get_stats():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/logs')
+@api_cache
 def get_logs():
     """Get paginated log entries with filtering."""
     logger.debug("Received request for logs")
+    df = current_snapshot().df
     if df is None:
         logger.error("No data loaded")
         return jsonify({"error": "No data loaded"}), 400
     
     try:
         # Get filter parameters
-        level = request.args.get('level')
-        component = request.args.get('component')
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
+        filters = parse_filters(request.args)
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
         
-        logger.debug(f"Filter params: level={level}, component={component}, page={page}")
-        logger.debug(f"Date params: start={start_date}, end={end_date}")
+        logger.debug(f"Filter params: level={filters.level}, component={filters.component}, page={page}")
+        logger.debug(f"Date params: start={filters.start_date}, end={filters.end_date}")
         
         # Apply filters
-        filtered_df = df.copy()
-        if level:
-            filtered_df = filtered_df[filtered_df['level'] == level]
-        if component:
-            filtered_df = filtered_df[filtered_df['component'] == component]
-        if start_date:
-            try:
-                start_date = pd.to_datetime(start_date)
-                filtered_df = filtered_df[filtered_df['timestamp'] >= start_date]
-            except Exception as e:
-                logger.error(f"Error parsing start_date: {e}")
-        if end_date:
-            try:
-                end_date = pd.to_datetime(end_date)
-                filtered_df = filtered_df[filtered_df['timestamp'] <= end_date]
-            except Exception as e:
-                logger.error(f"Error parsing end_date: {e}")
+        filtered_df = filters.apply(df)
         
         # Paginate
         total = len(filtered_df)
@@ -161,18 +256,38 @@ def get_logs():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/anomalies')
+@api_cache
 def get_anomalies():
-    """Get detected anomalies."""
+    """Get detected anomalies for one threshold, or for each of a comma-separated list of thresholds."""
+    snapshot = current_snapshot()
+    df = snapshot.df
     if df is None:
         return jsonify({"error": "No data loaded"}), 400
     
-    threshold = float(request.args.get('threshold', 3.0))
-    anomalies = detect_anomalies(df, threshold)
-    return jsonify(anomalies.to_dict('records'))
+    try:
+        by = request.args.get('by') or None
+        bucket = request.args.get('bucket', '5min')
+        window = int(request.args.get('window', 12))
+        method = request.args.get('method', 'rolling')
+        season = request.args.get('season', 'day')
+        if request.args.get('thresholds'):
+            thresholds = parse_thresholds(request.args['thresholds'])
+        else:
+            thresholds = [float(request.args.get('threshold', 3.0))]
+        results = anomaly_engine.detect(df, snapshot.etag_version, thresholds, by, bucket, window,
+                                        method, season, baseline=snapshot.token)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if request.args.get('thresholds'):
+        return jsonify({str(threshold): anomalies.to_dict('records') for threshold, anomalies in results.items()})
+    return jsonify(results[thresholds[0]].to_dict('records'))
 
 @app.route('/api/time-series')
+@api_cache
 def get_time_series():
     """Get error rate time series data."""
+    df = current_snapshot().df
     if df is None:
         return jsonify({"error": "No data loaded"}), 400
     
@@ -196,8 +311,10 @@ def get_time_series():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/hourly-distribution')
+@api_cache
 def get_hourly_distribution():
     """Get hourly log distribution."""
+    df = current_snapshot().df
     if df is None:
         return jsonify({"error": "No data loaded"}), 400
     
@@ -220,8 +337,10 @@ def get_hourly_distribution():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/component-stats')
+@api_cache
 def get_component_stats():
     """Get component-wise statistics."""
+    df = current_snapshot().df
     if df is None:
         return jsonify({"error": "No data loaded"}), 400
     
@@ -251,8 +370,10 @@ def get_component_stats():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/level-distribution')
+@api_cache
 def get_level_distribution():
     """Get log level distribution."""
+    df = current_snapshot().df
     if df is None:
         return jsonify({"error": "No data loaded"}), 400
     
@@ -274,10 +395,311 @@ def get_level_distribution():
         logger.error(f"Error getting level distribution: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-def run_server(log_dir: Path, log_format: str = "standard", debug: bool = False):
-    """Run the Flask server."""
+@app.route('/api/gaps')
+@api_cache
+def get_gaps():
+    """Get inter-arrival statistics, silent periods and bursts per group."""
+    df = current_snapshot().df
+    if df is None:
+        return jsonify({"error": "No data loaded"}), 400
+    
+    by = request.args.get('by', 'component')
+    if by not in ('component', 'source_file'):
+        return jsonify({"error": f"Unsupported grouping: {by}"}), 400
+    
+    try:
+        min_gap = float(request.args.get('min_gap', 600))
+        window = request.args.get('window', '1min')
+        threshold = float(request.args.get('threshold', 3.0))
+        
+        stats = get_inter_arrival_stats(df, by)
+        # The tracker covers the default grouping; other parameters need a full scan
+        gap_tracker = current_snapshot().gap_tracker
+        if gap_tracker is not None and not df.empty and by == gap_tracker.by and min_gap == gap_tracker.min_gap:
+            gaps = gap_tracker.gaps(df['timestamp'].iloc[-1])
+        else:
+            gaps = detect_gaps(df, min_gap, by)
+        bursts = detect_bursts(df, window, threshold, by)
+        
+        data = {
+            'stats': [
+                {
+                    by: str(key),
+                    'intervals': int(row['intervals']),
+                    'mean': float(row['mean']),
+                    'median': float(row['median']),
+                    'p95': float(row['p95']),
+                    'max': float(row['max'])
+                }
+                for key, row in stats.iterrows()
+            ],
+            'gaps': [
+                {
+                    by: str(row[by]),
+                    'gap_start': row['gap_start'].strftime('%Y-%m-%d %H:%M:%S'),
+                    'gap_end': row['gap_end'].strftime('%Y-%m-%d %H:%M:%S'),
+                    'duration_seconds': float(row['duration_seconds']),
+                    'ongoing': bool(row['ongoing'])
+                }
+                for _, row in gaps.iterrows()
+            ],
+            'bursts': [
+                {
+                    by: str(row[by]),
+                    'window_start': row['window_start'].strftime('%Y-%m-%d %H:%M:%S'),
+                    'log_count': int(row['log_count']),
+                    'expected': float(row['expected']),
+                    'deviation': float(row['deviation'])
+                }
+                for _, row in bursts.iterrows()
+            ]
+        }
+        return jsonify(data)
+    except Exception as e:
+        logger.error(f"Error getting gaps: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/incidents')
+@api_cache
+def get_incidents():
+    """Get time windows in which error series of several files and components spiked together."""
+    df = current_snapshot().df
+    if df is None:
+        return jsonify({"error": "No data loaded"}), 400
+    
+    try:
+        bucket = request.args.get('bucket', '1min')
+        threshold = float(request.args.get('threshold', 3.0))
+        min_series = int(request.args.get('min_series', 2))
+        limit = int(request.args.get('limit', 20))
+        if pd.Timedelta(pd.tseries.frequencies.to_offset(bucket)) < pd.Timedelta(minutes=1):
+            raise ValueError("Time bucket must be at least 1 minute")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        matrix = error_matrix(df, bucket)
+        incidents = detect_incidents_from_matrix(matrix, threshold, min_series)
+        correlations = correlated_series(matrix)
+        
+        data = {
+            'total': len(incidents),
+            'incidents': [
+                {
+                    'window_start': row['window_start'].strftime('%Y-%m-%d %H:%M:%S'),
+                    'window_end': row['window_end'].strftime('%Y-%m-%d %H:%M:%S'),
+                    'series_count': int(row['series_count']),
+                    'sources': row['sources'].split(',') if row['sources'] else [],
+                    'components': row['components'].split(',') if row['components'] else [],
+                    'series': row['series'].split(','),
+                    'error_count': int(row['error_count']),
+                    'expected': float(row['expected']),
+                    'score': float(row['score'])
+                }
+                for _, row in incidents.head(limit).iterrows()
+            ],
+            'correlations': [
+                {
+                    'series_a': row['series_a'],
+                    'series_b': row['series_b'],
+                    'correlation': float(row['correlation'])
+                }
+                for _, row in correlations.iterrows()
+            ]
+        }
+        return jsonify(data)
+    except Exception as e:
+        logger.error(f"Error getting incidents: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/metric-stats')
+@api_cache
+def get_metric_statistics():
+    """Get aggregates of a numeric metric extracted from messages."""
+    df = current_snapshot().df
+    if df is None:
+        return jsonify({"error": "No data loaded"}), 400
+    
+    metric = request.args.get('metric', 'latency_ms')
+    by = request.args.get('by', 'component')
+    if metric not in df.columns:
+        return jsonify({"error": f"Unknown metric: {metric}"}), 400
+    
+    try:
+        stats = get_metric_stats(df, metric, by)
+        data = [
+            {
+                by: str(key),
+                'count': int(row['count']),
+                'mean': float(row['mean']),
+                'median': float(row['median']),
+                'p95': float(row['p95']),
+                'max': float(row['max'])
+            }
+            for key, row in stats.iterrows()
+        ]
+        return jsonify(data)
+    except Exception as e:
+        logger.error(f"Error getting metric stats: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/cardinality')
+@api_cache
+def get_cardinality():
+    """Get approximate distinct counts of high-cardinality fields."""
+    sketches = current_snapshot().sketches
+    if sketches is None:
+        return jsonify({"error": "No data loaded"}), 400
+    
+    return jsonify(get_distinct_counts(sketches))
+
+@app.route('/api/top-values')
+@api_cache
+def get_top_field_values():
+    """Get approximate most frequent values of a field."""
+    sketches = current_snapshot().sketches
+    if sketches is None:
+        return jsonify({"error": "No data loaded"}), 400
+    
+    field = request.args.get('field', 'ip')
+    k = int(request.args.get('k', 10))
+    try:
+        data = [
+            {'value': value, 'count': int(count)}
+            for value, count in get_top_values(sketches, field, k)
+        ]
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/latency-percentiles')
+@api_cache
+def get_latency():
+    """Get approximate latency percentiles extracted from messages."""
+    sketches = current_snapshot().sketches
+    if sketches is None:
+        return jsonify({"error": "No data loaded"}), 400
+    
+    component = request.args.get('component')
+    return jsonify(get_latency_percentiles(sketches, component=component))
+
+@app.route('/api/query')
+@api_cache
+def run_query():
+    """Run an ad-hoc aggregation: group_by, bucket, filter, agg, start, end, order and limit."""
+    snapshot = current_snapshot()
+    try:
+        query = Query.from_args(request.args)
+        result, total_groups = query_cache.execute(snapshot.df, query, snapshot.etag_version)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        return jsonify({
+            'columns': query.columns,
+            'rows': query_records(result),
+            'total_groups': int(total_groups),
+            'truncated': total_groups > len(result)
+        })
+    except Exception as e:
+        logger.error(f"Error running query: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/datasets')
+def get_datasets():
+    """List the datasets the server can serve and which of them are loaded."""
+    return jsonify({
+        'datasets': datasets.describe(),
+        'memory_bytes': datasets.memory_usage(),
+        'memory_budget': datasets.memory_budget
+    })
+
+@app.route('/api/alerts')
+def get_alerts():
+    """Return recent alerts and the rules currently firing."""
+    if alert_engine is None:
+        return jsonify({'enabled': False, 'firing': [], 'alerts': []})
+    return jsonify({
+        'enabled': True,
+        'firing': alert_engine.firing(),
+        'alerts': [alert.to_dict() for alert in reversed(alert_engine.recent)]
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Log-derived counters and pipeline metrics in the Prometheus text format."""
+    try:
+        return Response(log_metrics.render(), content_type=CONTENT_TYPE)
+    except Exception as e:
+        logger.error(f"Error rendering metrics: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/stream')
+def stream():
+    """Stream newly ingested entries, stat deltas and anomalies as server-sent events."""
+    subscription = broadcaster.subscribe(parse_filters(request.args))
+    response = Response(stream_with_context(broadcaster.stream(subscription)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def start_follower(log_dir: Path, log_format: str, offsets) -> threading.Thread:
+    """Tail log files in a background thread, appending new entries as they arrive."""
+    def follow():
+        quarantine = Quarantine()
+        for entries in follow_logs(log_dir, log_format, offsets, quarantine=quarantine):
+            failures, quarantine.counts = quarantine.counts, {}
+            log_metrics.observe_failures(DEFAULT_DATASET, failures)
+            try:
+                append_logs(entries)
+            except Exception as e:
+                logger.error(f"Error appending logs: {str(e)}")
+    
+    thread = threading.Thread(target=follow, name="log-follower", daemon=True)
+    thread.start()
+    return thread
+
+def run_server(log_dir: Path, log_format: str = "standard", debug: bool = False, follow: bool = False,
+               extra_datasets: Optional[List[Tuple[str, Path, str]]] = None,
+               memory_budget: Optional[int] = None, alerts: Optional[AlertEngine] = None,
+               listen: Optional[Dict[str, int]] = None, listen_host: str = "127.0.0.1",
+               host: str = "127.0.0.1", port: int = 5000):
+    """Run the Flask server.
+    
+    listen maps receiver protocols (syslog-udp, syslog-tcp, ndjson-tcp) to
+    ports; entries received on them are appended like followed lines.
+    """
+    global following, alert_engine
+    # Configured here rather than on import, so importing the app leaves logging alone
+    logging.basicConfig(level=logging.DEBUG if debug else logging.INFO)
+    
+    # Other datasets are loaded on their first request
+    datasets.memory_budget = memory_budget
+    for name, dataset_dir, dataset_format in extra_datasets or []:
+        datasets.register(name, dataset_dir, dataset_format)
+    
     # Load data before starting the server
     load_data(log_dir, log_format)
     
+    # Follow from the current end of each file
+    following = follow or bool(listen)
+    alert_engine = alerts
+    if following and alerts is not None:
+        alerts.prime(datasets.snapshot().df)
+    if follow:
+        start_follower(log_dir, log_format, log_file_offsets(log_dir))
+    if listen:
+        receiver = LogReceiver(append_logs, log_format)
+        log_metrics.registry.register(Collected(
+            "log_receiver_lines_total", "Lines received over the network, by outcome.", "counter", ("outcome",),
+            lambda: {(outcome,): receiver.stats[outcome] for outcome in ("received", "delivered", "unparsed", "dropped")},
+        ))
+        log_metrics.registry.register(Collected(
+            "log_receiver_connections", "Open receiver TCP connections.", "gauge", (),
+            lambda: {(): receiver.stats["connections"]},
+        ))
+        for protocol, bound_port in start_receiver_thread(receiver, listen_host, listen).items():
+            logger.info(f"Receiving {protocol} on {listen_host}:{bound_port}")
+    
     # Run the Flask app
-    app.run(debug=debug)
\ No newline at end of file
+    app.run(host=host, port=port, debug=debug, threaded=True)
\ No newline at end of file
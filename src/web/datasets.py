@@ -0,0 +1,230 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from ..ingestion import Quarantine, load_multiple_logs, track_sketches
+from ..processing import process_logs, last_timestamps
+from ..analysis import GapTracker
+from ..sketches import LogSketches
+from ..metrics import LogMetrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATASET = "default"
+LOG_FORMATS = ("standard", "nginx", "apache")
+
+class UnknownDataset(KeyError):
+    """Raised when a request names a dataset that is not registered."""
+
+class Snapshot(NamedTuple):
+    """One immutable version of a dataset's data.
+
+    Nothing in a published snapshot is modified afterwards. Writers build the
+    next snapshot from copies and publish it with a single assignment, so a
+    request that read the reference sees a consistent frame, sketches and
+    version without taking a lock.
+    """
+    df: pd.DataFrame
+    sketches: LogSketches
+    gap_tracker: GapTracker
+    last_seen: Dict[Any, Any]
+    token: str
+    version: int
+    memory: int
+
+    @property
+    def etag_version(self) -> str:
+        """Identifier of this version, unique across loads and processes."""
+        return f"{self.token}-{self.version}"
+
+class Dataset:
+    """A named log directory served by the dashboard, loaded on first use."""
+
+    def __init__(self, name: str, log_dir: Path, log_format: str = "standard", pinned: bool = False,
+                 metrics: Optional[LogMetrics] = None):
+        self.name = name
+        self.log_dir = Path(log_dir)
+        self.log_format = log_format
+        self.pinned = pinned
+        self.metrics = metrics
+        self.snapshot: Optional[Snapshot] = None
+        # Serialises writers; readers only read the snapshot reference
+        self.write_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.snapshot is not None
+
+    @property
+    def memory(self) -> int:
+        snapshot = self.snapshot
+        return snapshot.memory if snapshot is not None else 0
+
+    def load(self):
+        """Read and process the dataset's log files, then swap them in."""
+        logger.debug(f"Loading dataset {self.name} from {self.log_dir} with format {self.log_format}")
+        start = time.perf_counter()
+        sketches = LogSketches()
+        quarantine = Quarantine()
+        df = process_logs(track_sketches(load_multiple_logs(self.log_dir, self.log_format, quarantine), sketches))
+        gap_tracker = GapTracker()
+        if not df.empty:
+            gap_tracker.update(df)
+        last_seen = last_timestamps(df)
+        memory = int(df.memory_usage(deep=True).sum())
+        logger.debug(f"Dataset {self.name} loaded, DataFrame shape: {df.shape}")
+        if self.metrics is not None:
+            self.metrics.reset(self.name)
+            self.metrics.observe(self.name, df, time.perf_counter() - start)
+            self.metrics.observe_failures(self.name, quarantine.counts)
+
+        # Readers keep the previous snapshot until this point
+        with self.write_lock:
+            self.snapshot = Snapshot(df, sketches, gap_tracker, last_seen, uuid.uuid4().hex[:12], 1, memory)
+
+    def unload(self):
+        """Drop the loaded data; it is read again on next access."""
+        with self.write_lock:
+            self.snapshot = None
+
+class DatasetRegistry:
+    """Named datasets loaded lazily and evicted least recently used first.
+
+    Each dataset has its own load lock, so a load or reload never holds up
+    requests for other datasets, and requests for a dataset that is being
+    reloaded keep reading its previous data. When the loaded data exceeds the
+    memory budget (bytes), the least recently used unpinned datasets are
+    unloaded. Loaded data is counted in metrics, when given.
+    """
+
+    def __init__(self, memory_budget: Optional[int] = None, metrics: Optional[LogMetrics] = None):
+        self.memory_budget = memory_budget
+        self.metrics = metrics
+        self._datasets: Dict[str, Dataset] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._loaded: "OrderedDict[str, Dataset]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, name: str, log_dir: Path, log_format: str = "standard", pinned: bool = False) -> Dataset:
+        """Add a dataset, replacing any earlier one with the same name."""
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"Unsupported log format: {log_format}")
+        dataset = Dataset(name, log_dir, log_format, pinned, self.metrics)
+        with self._lock:
+            self._datasets[name] = dataset
+            self._load_locks.setdefault(name, threading.Lock())
+            self._loaded.pop(name, None)
+        return dataset
+
+    def unregister(self, name: str):
+        """Remove a dataset and drop its data and metrics."""
+        dataset, load_lock = self._registered(name)
+        with self._lock:
+            del self._datasets[name]
+            self._loaded.pop(name, None)
+        with load_lock:
+            dataset.unload()
+        if self.metrics is not None:
+            self.metrics.reset(name)
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._datasets)
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Return the name, source and load state of each dataset."""
+        with self._lock:
+            datasets = list(self._datasets.values())
+        return [
+            {
+                'name': dataset.name,
+                'log_dir': str(dataset.log_dir),
+                'log_format': dataset.log_format,
+                'loaded': dataset.loaded,
+                'memory_bytes': dataset.memory,
+            }
+            for dataset in datasets
+        ]
+
+    def _registered(self, name: str) -> Tuple[Dataset, threading.Lock]:
+        with self._lock:
+            if name not in self._datasets:
+                raise UnknownDataset(name)
+            return self._datasets[name], self._load_locks[name]
+
+    def get(self, name: str = DEFAULT_DATASET) -> Dataset:
+        """Return a dataset, loading it first if needed."""
+        with self._lock:
+            dataset = self._datasets.get(name)
+            if dataset is not None and name in self._loaded and dataset.loaded:
+                self._loaded.move_to_end(name)
+                return dataset
+
+        dataset, load_lock = self._registered(name)
+        with load_lock:
+            if not dataset.loaded:
+                dataset.load()
+        self._track(dataset)
+        return dataset
+
+    def snapshot(self, name: str = DEFAULT_DATASET) -> Snapshot:
+        """Return the current snapshot of a dataset, loading it if needed."""
+        while True:
+            snapshot = self.get(name).snapshot
+            # None only if the dataset was evicted in between
+            if snapshot is not None:
+                return snapshot
+
+    def reload(self, name: str = DEFAULT_DATASET) -> Dataset:
+        """Read a dataset's files again while requests keep using the old data."""
+        dataset, load_lock = self._registered(name)
+        with load_lock:
+            dataset.load()
+        self._track(dataset)
+        return dataset
+
+    def memory_usage(self) -> int:
+        with self._lock:
+            return sum(dataset.memory for dataset in self._loaded.values())
+
+    def _track(self, dataset: Dataset):
+        """Mark a dataset as most recently used and unload others over budget."""
+        with self._lock:
+            if self._datasets.get(dataset.name) is not dataset:
+                return
+            self._loaded[dataset.name] = dataset
+            self._loaded.move_to_end(dataset.name)
+            evicted = []
+            if self.memory_budget is not None:
+                total = sum(loaded.memory for loaded in self._loaded.values())
+                for name, loaded in list(self._loaded.items()):
+                    if total <= self.memory_budget:
+                        break
+                    if loaded is dataset or loaded.pinned:
+                        continue
+                    del self._loaded[name]
+                    total -= loaded.memory
+                    evicted.append(name)
+
+        for name in evicted:
+            evicted_dataset, load_lock = self._registered(name)
+            with load_lock:
+                if name not in self._loaded:
+                    logger.debug(f"Evicting dataset {name}")
+                    evicted_dataset.unload()
+
+def parse_dataset_spec(spec: str) -> Tuple[str, Path, str]:
+    """Parse a NAME=DIR[:FORMAT] dataset argument."""
+    name, sep, location = spec.partition("=")
+    if not sep or not name or not location:
+        raise ValueError(f"Invalid dataset '{spec}', expected NAME=DIR[:FORMAT]")
+    log_dir, sep, log_format = location.rpartition(":")
+    if not sep or log_format not in LOG_FORMATS:
+        log_dir, log_format = location, "standard"
+    return name, Path(log_dir), log_format
@@ -0,0 +1,185 @@
+import json
+import queue
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+class Filters:
+    """Entry filters accepted by /api/logs and /api/stream."""
+
+    def __init__(self, level: Optional[str] = None, component: Optional[str] = None,
+                 start_date: Optional[pd.Timestamp] = None, end_date: Optional[pd.Timestamp] = None):
+        self.level = level or None
+        self.component = component or None
+        self.start_date = start_date
+        self.end_date = end_date
+
+    @property
+    def key(self) -> Tuple:
+        return (self.level, self.component, self.start_date, self.end_date)
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return the rows of df matching the filters."""
+        mask = pd.Series(True, index=df.index)
+        if self.level:
+            mask &= df["level"] == self.level
+        if self.component:
+            mask &= df["component"] == self.component
+        if self.start_date is not None:
+            mask &= df["timestamp"] >= self.start_date
+        if self.end_date is not None:
+            mask &= df["timestamp"] <= self.end_date
+        return df if mask.all() else df[mask]
+
+class BatchEvent:
+    """A newly ingested batch, serialised at most once per distinct filter."""
+
+    def __init__(self, batch: pd.DataFrame, anomalies: pd.DataFrame, gaps: Optional[pd.DataFrame] = None):
+        self.batch = batch
+        self.anomalies = anomalies
+        self.gaps = gaps
+        self._payloads: Dict[Tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def payload(self, filters: Filters) -> str:
+        """Return the SSE messages for subscribers with the given filters."""
+        with self._lock:
+            if filters.key not in self._payloads:
+                self._payloads[filters.key] = self._render(filters)
+            return self._payloads[filters.key]
+
+    def _render(self, filters: Filters) -> str:
+        rows = filters.apply(self.batch)
+        if rows.empty:
+            return ""
+        entries = [
+            {
+                'timestamp': ts.strftime('%Y-%m-%d %H:%M:%S'),
+                'level': str(level),
+                'component': str(component),
+                'message': str(message)
+            }
+            for ts, level, component, message in zip(rows['timestamp'], rows['level'],
+                                                     rows['component'], rows['message'])
+        ]
+        # Counts per 5-minute bucket, component and level added by this batch
+        deltas = rows.groupby([rows['timestamp'].dt.floor('5min'), 'component', 'level']).size()
+        stats = [
+            {
+                'bucket': bucket.strftime('%Y-%m-%d %H:%M:%S'),
+                'component': str(component),
+                'level': str(level),
+                'count': int(count)
+            }
+            for (bucket, component, level), count in deltas.items()
+        ]
+        messages = [
+            format_event('entries', entries),
+            format_event('stats', stats),
+        ]
+        if not self.anomalies.empty:
+            anomalies = [
+                {
+                    'timestamp': row['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
+                    'log_count': int(row['log_count']),
+                    'expected': float(row['expected']),
+                    'deviation': float(row['deviation'])
+                }
+                for _, row in self.anomalies.iterrows()
+            ]
+            messages.append(format_event('anomalies', anomalies))
+        if self.gaps is not None and not self.gaps.empty:
+            gaps = self.gaps
+            if filters.component:
+                gaps = gaps[gaps['component'] == filters.component]
+            if not gaps.empty:
+                messages.append(format_event('gaps', [
+                    {
+                        'component': str(row['component']),
+                        'gap_start': row['gap_start'].strftime('%Y-%m-%d %H:%M:%S'),
+                        'gap_end': row['gap_end'].strftime('%Y-%m-%d %H:%M:%S'),
+                        'duration_seconds': float(row['duration_seconds'])
+                    }
+                    for _, row in gaps.iterrows()
+                ]))
+        return "".join(messages)
+
+def format_event(name: str, data: Any) -> str:
+    """Format a server-sent event."""
+    return f"event: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+class Subscription:
+    """A subscriber's bounded queue of pending events."""
+
+    def __init__(self, filters: Filters, max_pending: int):
+        self.filters = filters
+        self.events: "queue.Queue[BatchEvent]" = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+
+    def offer(self, event: BatchEvent):
+        """Queue an event, dropping the oldest one if the subscriber is behind."""
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+class EventBroadcaster:
+    """Fan out ingested batches to stream subscribers.
+
+    Publishing never blocks on slow clients: each subscriber has a bounded
+    queue and loses its oldest events when full, and is told how many it
+    missed so it can fall back to polling the regular endpoints.
+    """
+
+    def __init__(self, max_pending: int = 100, heartbeat: float = 15.0):
+        self.max_pending = max_pending
+        self.heartbeat = heartbeat
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, filters: Filters) -> Subscription:
+        subscription = Subscription(filters, self.max_pending)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def publish(self, event: BatchEvent):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(event)
+
+    def stream(self, subscription: Subscription) -> Iterator[str]:
+        """Yield SSE text for a subscription until the client disconnects."""
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    event = subscription.events.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if subscription.dropped:
+                    yield format_event('lagged', {'dropped': subscription.dropped})
+                    subscription.dropped = 0
+                payload = event.payload(subscription.filters)
+                if payload:
+                    yield payload
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,135 @@
+import gzip
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from flask import Response, current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+# Optional faster encoders and compressors
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that serialises with orjson when it is installed.
+
+    Dates and other non-native values still go through Flask's default
+    handling so responses look the same as with the standard encoder.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=options).decode("utf-8")
+
+class CachedBody:
+    """Serialised response body with lazily built compressed variants."""
+
+    def __init__(self, body: bytes, mimetype: str):
+        self.mimetype = mimetype
+        self.encoded = {"identity": body}
+        self._lock = threading.Lock()
+
+    def get(self, encoding: str) -> bytes:
+        """Return the body in the given content encoding."""
+        if encoding not in self.encoded:
+            with self._lock:
+                if encoding not in self.encoded:
+                    body = self.encoded["identity"]
+                    if encoding == "br":
+                        self.encoded[encoding] = brotli.compress(body, quality=5)
+                    else:
+                        self.encoded[encoding] = gzip.compress(body, compresslevel=6)
+        return self.encoded[encoding]
+
+class ResponseCache:
+    """Bounded LRU cache of serialised responses keyed by data version and URL."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, entry: CachedBody):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def choose_encoding(size: int) -> str:
+    """Pick the best content encoding the client accepts for a body size."""
+    if size < MIN_COMPRESS_SIZE:
+        return "identity"
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return "identity"
+
+def cached_api(cache: ResponseCache, get_version: Callable[[], Optional[Hashable]]):
+    """Serve a GET endpoint from cache, with ETags and compression.
+
+    get_version returns an identifier of the data the endpoint reads, or None
+    when nothing is loaded. The ETag is derived from it, so a client that
+    already has the current version gets a 304 without the view running. It
+    is weak because the same version is served under several encodings.
+    """
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = get_version()
+            if version is None:
+                return view(*args, **kwargs)
+
+            etag = f"v{version}"
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                response.set_etag(etag, weak=True)
+                return response
+
+            key = (version, request.full_path)
+            entry = cache.get(key)
+            if entry is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                entry = CachedBody(response.get_data(), response.mimetype)
+                cache.put(key, entry)
+
+            encoding = choose_encoding(len(entry.get("identity")))
+            response = Response(entry.get(encoding), mimetype=entry.mimetype)
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+            response.headers["Vary"] = "Accept-Encoding"
+            response.headers["Cache-Control"] = "no-cache"
+            response.set_etag(etag, weak=True)
+            return response
+        return wrapper
+    return decorator
@@ -1,6 +1,7 @@
 // src/web/static/js/dashboard.js
 let currentPage = 1;
 const perPage = 50;
+let liveStream = null;
 
 // Function to load and display statistics
 async function loadStats() {
@@ -27,13 +28,12 @@ async function loadStats() {
             `${data.busiest_hour[0]}:00 (${data.busiest_hour[1].toLocaleString()} logs)`;
         
         // Load anomalies count
-        const anomaliesResponse = await fetch('/api/anomalies');
-        if (!anomaliesResponse.ok) {
-            throw new Error(`HTTP error! status: ${anomaliesResponse.status}`);
+        await loadAnomalyCount();
+        
+        // Live updates are only pushed when the server follows the log files
+        if (data.following) {
+            startLiveStream();
         }
-        const anomaliesData = await anomaliesResponse.json();
-        document.getElementById('anomalies-count').textContent = 
-            `${anomaliesData.length} anomalies detected`;
         
         // Update component dropdown
         const componentSelect = document.getElementById('component');
@@ -57,6 +57,17 @@ async function loadStats() {
     }
 }
 
+// Function to load and display the number of anomalies
+async function loadAnomalyCount() {
+    const anomaliesResponse = await fetch('/api/anomalies');
+    if (!anomaliesResponse.ok) {
+        throw new Error(`HTTP error! status: ${anomaliesResponse.status}`);
+    }
+    const anomaliesData = await anomaliesResponse.json();
+    document.getElementById('anomalies-count').textContent = 
+        `${anomaliesData.length} anomalies detected`;
+}
+
 // Function to format date for API
 function formatDateForAPI(date) {
     if (!date) return '';
@@ -184,6 +195,41 @@ function changePage(page) {
     loadLogs();
 }
 
+// Function to subscribe to live updates pushed by the server
+function startLiveStream() {
+    if (!window.EventSource || liveStream) return;
+    const stream = new EventSource('/api/stream');
+    liveStream = stream;
+    let refreshTimer = null;
+    
+    stream.addEventListener('stats', (event) => {
+        // Update the total from the pushed deltas instead of re-polling
+        const added = JSON.parse(event.data).reduce((sum, d) => sum + d.count, 0);
+        const totalElement = document.getElementById('total-logs');
+        const total = parseInt(totalElement.textContent.replace(/,/g, ''), 10);
+        if (!isNaN(total)) {
+            totalElement.textContent = (total + added).toLocaleString();
+        }
+        
+        // Refresh the first page of the table at most once per second
+        if (currentPage === 1 && !refreshTimer) {
+            refreshTimer = setTimeout(() => {
+                refreshTimer = null;
+                loadLogs();
+            }, 1000);
+        }
+    });
+    
+    stream.addEventListener('anomalies', (event) => {
+        // New buckets may also replace earlier anomalies, so recount from the server
+        const latest = JSON.parse(event.data).at(-1);
+        loadAnomalyCount().then(() => {
+            const countElement = document.getElementById('anomalies-count');
+            countElement.title = `Latest: ${latest.timestamp} (${latest.log_count} logs, expected ${latest.expected.toFixed(1)})`;
+        }).catch((error) => console.error('Error loading anomalies:', error));
+    });
+}
+
 // Event listeners
 document.addEventListener('DOMContentLoaded', () => {
     loadStats();
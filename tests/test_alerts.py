@@ -0,0 +1,88 @@
+import json
+import pandas as pd
+import pytest
+from src.alerts import (
+    AlertEngine, ErrorRateRule, MemorySink, MessageCountRule, SilenceRule, WindowCounter, WindowRule,
+    load_alert_config,
+)
+
+def make_batch(start, seconds, component="api", errors=0, message="ok"):
+    """Build one entry per second, the first `errors` of them errors."""
+    times = pd.date_range(start, periods=seconds, freq="1s")
+    return pd.DataFrame({
+        "timestamp": times,
+        "component": component,
+        "is_error": [i < errors for i in range(seconds)],
+        "message": message,
+    })
+
+def test_window_counter_forgets_old_slots():
+    """Test the ring only sums slots inside the window."""
+    counter = WindowCounter(60, slots=6)
+    for slot in range(10):
+        counter.add(slot, 1)
+    assert counter.totals()[0] == 6
+    counter.add(2, 1)
+    assert counter.totals()[0] == 6
+    counter.add(100, 5)
+    assert counter.totals()[0] == 5
+
+def test_error_rate_fires_once_and_resolves():
+    """Test an error burst raises one alert and clean traffic resolves it."""
+    sink = MemorySink()
+    engine = AlertEngine([ErrorRateRule("api-errors", 60, 50, component="api", min_count=10)], [sink])
+
+    engine.evaluate(make_batch("2023-05-01 10:00:00", 60))
+    assert sink.alerts == []
+    engine.evaluate(make_batch("2023-05-01 10:01:00", 60, errors=60))
+    engine.evaluate(make_batch("2023-05-01 10:02:00", 60, errors=60))
+    assert [alert.state for alert in sink.alerts] == ["firing"]
+    assert engine.firing() == ["api-errors"]
+
+    engine.evaluate(make_batch("2023-05-01 10:03:00", 120))
+    assert [alert.state for alert in sink.alerts] == ["firing", "resolved"]
+    assert engine.firing() == []
+
+def test_message_template_and_silence():
+    """Test template counts and silences, including one that ends within a batch."""
+    sink = MemorySink()
+    engine = AlertEngine([
+        MessageCountRule("timeouts", 60, 5, template="Connection timeout to *"),
+        SilenceRule("db-silent", "db", 300),
+    ], [sink])
+
+    engine.evaluate(pd.concat([
+        make_batch("2023-05-01 10:00:00", 10, component="db", message="Connection timeout to db-1"),
+        make_batch("2023-05-01 10:20:00", 1, component="db"),
+    ], ignore_index=True))
+
+    assert [(alert.rule, alert.state) for alert in sink.alerts] == [
+        ("timeouts", "firing"), ("db-silent", "firing"), ("db-silent", "resolved"), ("timeouts", "resolved"),
+    ]
+    assert sink.alerts[1].timestamp == pd.Timestamp("2023-05-01 10:05:09")
+
+def test_load_alert_config(tmp_path):
+    """Test rules and sinks are read from JSON and invalid rules are rejected."""
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({
+        "rules": [{"name": "quiet", "type": "silence", "component": "api", "max_silence": 60}],
+        "sinks": [{"type": "file", "path": str(tmp_path / "alerts.jsonl")}],
+    }))
+    engine = load_alert_config(path)
+    engine.evaluate(make_batch("2023-05-01 10:00:00", 1))
+    engine.evaluate(make_batch("2023-05-01 10:05:00", 1, component="db"))
+
+    lines = (tmp_path / "alerts.jsonl").read_text().splitlines()
+    assert json.loads(lines[0])["rule"] == "quiet"
+
+    path.write_text(json.dumps({"rules": [{"type": "error_rate", "window": 60}]}))
+    with pytest.raises(ValueError):
+        load_alert_config(path)
+
+def test_incomplete_rule_cannot_be_created():
+    """Test a window rule without a check fails when it is instantiated."""
+    class NoCheck(WindowRule):
+        pass
+
+    with pytest.raises(TypeError):
+        NoCheck("incomplete", 60, 1)
@@ -0,0 +1,104 @@
+import pandas as pd
+from src.analysis import (
+    detect_gaps, detect_bursts, get_inter_arrival_stats, GapTracker, get_error_rate, get_component_stats,
+    detect_anomalies, get_metric_stats, get_sampling_error,
+)
+
+def make_logs(rows):
+    """Build a time-ordered frame from (timestamp, component) pairs."""
+    df = pd.DataFrame(rows, columns=["timestamp", "component"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+def test_detect_gaps():
+    """Test silences are found per component, not over the merged stream."""
+    df = make_logs([
+        ("2023-05-01 10:00:00", "api"),
+        ("2023-05-01 10:05:00", "db"),
+        ("2023-05-01 10:10:00", "db"),
+        ("2023-05-01 10:20:00", "api"),
+        ("2023-05-01 10:30:00", "db"),
+    ])
+    gaps = detect_gaps(df, min_gap=600)
+
+    assert list(zip(gaps["component"], gaps["duration_seconds"], gaps["ongoing"])) == [
+        ("api", 1200.0, False),
+        ("db", 1200.0, False),
+    ]
+    assert get_inter_arrival_stats(df).loc["api", "max"] == 1200
+
+def test_detect_gaps_ongoing():
+    """Test a group quiet until the end of the data is reported."""
+    df = make_logs([
+        ("2023-05-01 09:50:00", "api"),
+        ("2023-05-01 10:00:00", "db"),
+        ("2023-05-01 10:30:00", "db"),
+    ])
+    gaps = detect_gaps(df, min_gap=600)
+
+    assert list(zip(gaps["component"], gaps["ongoing"])) == [("api", True), ("db", False)]
+    assert gaps.iloc[0]["duration_seconds"] == 2400
+
+def test_detect_bursts():
+    """Test a spike in one component's window rate is flagged."""
+    rows = [(f"2023-05-01 10:{minute:02d}:00", "api") for minute in range(30)]
+    rows += [("2023-05-01 10:15:30", "api")] * 10
+    bursts = detect_bursts(make_logs(rows), window="1min", threshold=3.0)
+
+    assert len(bursts) == 1
+    assert bursts.iloc[0]["log_count"] == 11
+
+def test_gap_tracker_spans_batches():
+    """Test the incremental tracker finds gaps across batch boundaries."""
+    tracker = GapTracker(min_gap=600)
+    first = tracker.update(make_logs([("2023-05-01 10:00:00", "api")]))
+    second = tracker.update(make_logs([("2023-05-01 10:20:00", "api"), ("2023-05-01 10:21:00", "db")]))
+
+    assert first.empty
+    assert list(second["duration_seconds"]) == [1200.0]
+    assert tracker.silent(pd.Timestamp("2023-05-01 10:40:00")) == {"api": 1200.0, "db": 1140.0}
+
+def test_gap_tracker_matches_full_detection():
+    """Test the tracked gaps equal a full detection over all batches."""
+    rows = [("2023-05-01 10:00:00", "api"), ("2023-05-01 10:05:00", "db"), ("2023-05-01 10:20:00", "api"),
+            ("2023-05-01 10:30:00", "db"), ("2023-05-01 10:31:00", "api")]
+    tracker = GapTracker(min_gap=600)
+    tracker.update(make_logs(rows[:2]))
+    tracker.update(make_logs(rows[2:]))
+    expected = detect_gaps(make_logs(rows), min_gap=600)
+    gaps = tracker.gaps(pd.Timestamp("2023-05-01 10:31:00"))
+
+    assert list(zip(gaps["component"], gaps["duration_seconds"], gaps["ongoing"])) == list(
+        zip(expected["component"], expected["duration_seconds"], expected["ongoing"]))
+
+def test_weighted_stats_match_uncollapsed():
+    """Test rows with a repeat_count give the same statistics as the repeated rows."""
+    times = pd.date_range("2023-05-01 10:00", periods=40, freq="1min")
+    full = pd.DataFrame({
+        "timestamp": times.repeat(3),
+        "component": ["api", "db", "db"] * 40,
+        "is_error": [False, True, True] * 40,
+        "latency_ms": [100.0, 20.0, 20.0] * 40,
+    })
+    collapsed = full.iloc[::3].copy()
+    collapsed = pd.concat([collapsed, full.iloc[1::3].assign(repeat_count=2)]).sort_values("timestamp", kind="stable")
+    collapsed["repeat_count"] = collapsed["repeat_count"].fillna(1).astype("int64")
+
+    assert get_error_rate(collapsed) == get_error_rate(full)
+    pd.testing.assert_frame_equal(get_component_stats(collapsed), get_component_stats(full), check_dtype=False)
+    assert list(detect_anomalies(collapsed, 1.0)["log_count"]) == list(detect_anomalies(full, 1.0)["log_count"])
+    assert get_metric_stats(collapsed, "latency_ms")["count"].to_dict() == {"api": 40, "db": 80}
+
+def test_sampling_error_covers_true_values():
+    """Test estimates from a weighted sample bound the full-data totals."""
+    full = pd.DataFrame({
+        "timestamp": pd.date_range("2023-05-01", periods=10000, freq="1s"),
+        "is_error": [i % 10 == 0 for i in range(10000)],
+    })
+    sample = full.sample(frac=0.1, random_state=1).assign(sample_weight=10.0)
+    estimate = get_sampling_error(sample)
+
+    assert abs(estimate["total_logs"] - 10000) <= estimate["total_logs_margin"]
+    assert abs(estimate["error_rate"] - 10.0) <= estimate["error_rate_margin"]
+    assert get_error_rate(sample) == estimate["error_rate"]
+    assert get_sampling_error(full) == {}
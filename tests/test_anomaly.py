@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+from src.analysis import detect_anomalies
+from src.anomaly import AnomalyEngine, detect_seasonal_anomalies
+
+def make_logs():
+    """Build a frame with steady traffic and one spike per component."""
+    times = list(pd.date_range("2023-05-01 10:00", periods=24, freq="5min")) * 2
+    components = ["api"] * 24 + ["db"] * 24
+    spikes = [(pd.Timestamp("2023-05-01 11:30"), "api")] * 10 + [(pd.Timestamp("2023-05-01 11:45"), "db")] * 6
+    rows = list(zip(times, components)) + spikes
+    df = pd.DataFrame(rows, columns=["timestamp", "component"])
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+def test_engine_matches_detect_anomalies():
+    """Test total-volume anomalies are the same as detect_anomalies for each threshold."""
+    df = make_logs()
+    results = AnomalyEngine().detect(df, "v1", [1.0, 3.0])
+
+    for threshold, anomalies in results.items():
+        expected = detect_anomalies(df, threshold)
+        assert list(anomalies["timestamp"]) == list(expected["timestamp"])
+        assert list(anomalies["deviation"]) == list(expected["deviation"])
+
+def test_engine_per_component_and_cache():
+    """Test per-component series are scored once per version."""
+    df = make_logs()
+    engine = AnomalyEngine()
+    anomalies = engine.detect(df, "v1", [3.0], by="component")[3.0]
+
+    assert list(zip(anomalies["timestamp"].dt.strftime("%H:%M"), anomalies["component"])) == [
+        ("11:30", "api"), ("11:45", "db"),
+    ]
+    assert engine.scores(df, "v1", by="component") is engine.scores(pd.DataFrame(), "v1", by="component")
+
+def make_daily_logs(days=4):
+    """Build a frame with the same morning ramp every day."""
+    rows = []
+    for day in pd.date_range("2023-05-01", periods=days, freq="D"):
+        buckets = pd.date_range(day + pd.Timedelta(hours=7), day + pd.Timedelta(hours=10), freq="5min", inclusive="left")
+        for position, bucket in enumerate(buckets):
+            rows.extend([bucket] * min(40, position * 5))
+    return pd.DataFrame({"timestamp": sorted(rows), "component": "api"})
+
+def test_seasonal_ignores_daily_ramp_and_flags_spike():
+    """Test the seasonal method compares buckets with the same time on other days."""
+    df = make_daily_logs()
+    assert detect_seasonal_anomalies(df, 3.0).empty
+    assert not detect_anomalies(df, 3.0).empty
+
+    spike = pd.DataFrame({"timestamp": [pd.Timestamp("2023-05-03 09:00")] * 30, "component": "api"})
+    spiked = pd.concat([df, spike]).sort_values("timestamp", kind="stable").reset_index(drop=True)
+    anomalies = detect_seasonal_anomalies(spiked, 3.0)
+    assert list(anomalies["timestamp"]) == [pd.Timestamp("2023-05-03 09:00")]
+    assert anomalies["expected"].iloc[0] == 40
+
+def test_seasonal_model_reused_for_small_appends():
+    """Test the engine keeps a dataset's seasonal model until enough buckets are added."""
+    df = make_daily_logs()
+    engine = AnomalyEngine(refit_fraction=0.5)
+    engine.scores(df, "v1", method="seasonal", baseline="load")
+    model = engine._models[("load", None, "5min", "day")]
+
+    extra = pd.DataFrame({"timestamp": [pd.Timestamp("2023-05-05 07:30")] * 40, "component": "api"})
+    engine.scores(pd.concat([df, extra], ignore_index=True), "v2", method="seasonal", baseline="load")
+    assert engine._models[("load", None, "5min", "day")] is model
+
+    engine.scores(make_daily_logs(days=8), "v3", method="seasonal", baseline="load")
+    assert engine._models[("load", None, "5min", "day")] is not model
+
+def test_seasonal_rejects_buckets_not_dividing_a_day():
+    """Test seasonal detection refuses buckets that do not tile the season."""
+    for bucket in ("7min", "2D"):
+        with pytest.raises(ValueError):
+            detect_seasonal_anomalies(make_logs(), 3.0, "day", bucket)
@@ -0,0 +1,51 @@
+from src.checkpoint import CheckpointStore, run_checkpointed
+from src.distributed import merge_partials, read_partial
+
+def write_logs(directory):
+    paths = []
+    for name, level in (("a.log", "INFO"), ("b.log", "ERROR")):
+        path = directory / name
+        path.write_text(f"2023-05-01 10:00:00 [{level}] api: Request processed successfully in 120ms\n")
+        paths.append(path)
+    return paths
+
+def run(paths, store, resume=True):
+    events = []
+    partials = run_checkpointed(paths, "standard", store, resume, progress=lambda path, skipped: events.append(
+        (path.name, skipped)))
+    return partials, events
+
+def test_resume_skips_unchanged_files(tmp_path):
+    """Test a resumed run reuses finished files and redoes changed ones."""
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    paths = write_logs(logs)
+    store = CheckpointStore(tmp_path / "checkpoints")
+
+    partials, events = run(paths, store)
+    assert events == [("a.log", False), ("b.log", False)]
+    assert merge_partials(read_partial(path) for path in partials)["total_logs"] == 2
+
+    _, events = run(paths, store)
+    assert events == [("a.log", True), ("b.log", True)]
+
+    with open(paths[1], "a") as file:
+        file.write("2023-05-01 10:05:00 [ERROR] api: Request failed\n")
+    partials, events = run(paths, store)
+    assert events == [("a.log", True), ("b.log", False)]
+    assert merge_partials(read_partial(path) for path in partials)["total_logs"] == 3
+
+    _, events = run(paths, store, resume=False)
+    assert events == [("a.log", False), ("b.log", False)]
+
+def test_incomplete_checkpoint_is_redone(tmp_path):
+    """Test a partial without its completion marker is not trusted."""
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    paths = write_logs(logs)
+    store = CheckpointStore(tmp_path / "checkpoints")
+    run(paths, store)
+    store.marker_path(paths[0]).unlink()
+
+    _, events = run(paths, store)
+    assert events == [("b.log", True), ("a.log", False)]
@@ -0,0 +1,45 @@
+import pandas as pd
+from src.correlation import correlated_series, detect_incidents, error_matrix
+
+def make_logs():
+    """Build steady traffic from two files with one shared burst and one isolated burst."""
+    rows = []
+    for source in ("a.log", "b.log"):
+        for component in ("api", "db"):
+            for minute in range(60):
+                timestamp = pd.Timestamp("2023-05-01 10:00") + pd.Timedelta(minutes=minute)
+                rows.append((timestamp, source, component, minute % 20 == 0))
+    # A shared outage at 10:30 and an isolated burst at 10:45
+    for source, component in (("a.log", "api"), ("b.log", "api"), ("b.log", "db")):
+        rows += [(pd.Timestamp("2023-05-01 10:30:10"), source, component, True)] * 4
+    rows += [(pd.Timestamp("2023-05-01 10:45:10"), "a.log", "db", True)] * 4
+    df = pd.DataFrame(rows, columns=["timestamp", "source_file", "component", "is_error"])
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+def test_error_matrix_has_every_bucket():
+    """Test the matrix has one column per file and component and includes quiet buckets."""
+    matrix = error_matrix(make_logs())
+
+    assert matrix.shape == (60, 4)
+    assert matrix.loc[pd.Timestamp("2023-05-01 10:30"), ("b.log", "db")] == 4
+    assert matrix.loc[pd.Timestamp("2023-05-01 10:31")].sum() == 0
+
+def test_incidents_need_several_series():
+    """Test only the burst shared by several series is reported as an incident."""
+    incidents = detect_incidents(make_logs())
+
+    assert len(incidents) == 1
+    incident = incidents.iloc[0]
+    assert incident["window_start"] == pd.Timestamp("2023-05-01 10:30")
+    assert incident["series_count"] == 3
+    assert incident["sources"] == "a.log,b.log"
+    assert incident["components"] == "api,db"
+    assert incident["error_count"] == 12
+
+    assert len(detect_incidents(make_logs(), min_series=1)) == 2
+
+def test_correlated_series():
+    """Test series that burst together are the most correlated pair."""
+    pairs = correlated_series(error_matrix(make_logs()))
+
+    assert {pairs.iloc[0]["series_a"], pairs.iloc[0]["series_b"]} <= {"a.log/api", "b.log/api", "b.log/db"}
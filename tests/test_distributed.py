@@ -0,0 +1,54 @@
+from src.distributed import (
+    create_partial, merge_partials, write_partial, read_partial, run_local_workers,
+    partial_component_stats, partial_busiest_hour, partial_error_rate, partial_bucket_counts,
+)
+
+LINES = {
+    "a.log": [
+        "2023-05-01 10:00:00 [INFO] api: Request processed successfully in 120ms",
+        "2023-05-01 10:01:00 [ERROR] database: Query failed: Connection timeout",
+        "2023-05-01 10:20:00 [INFO] api: User user_1 accessed resource profile",
+    ],
+    "b.log": [
+        "2023-05-01 11:00:00 [INFO] auth: User user_2 logged in successfully",
+        "2023-05-01 11:02:00 [CRITICAL] api: API service unresponsive for 30 seconds",
+    ],
+}
+
+def write_logs(directory):
+    paths = []
+    for name, lines in LINES.items():
+        path = directory / name
+        path.write_text("\n".join(lines) + "\n")
+        paths.append(path)
+    return paths
+
+def test_merge_matches_single_node(tmp_path):
+    """Test merged partials give the same results as one node over all files."""
+    paths = write_logs(tmp_path)
+    merged = merge_partials([create_partial([paths[0]]), create_partial([paths[1]])])
+    single = create_partial(paths)
+
+    assert merged["total_logs"] == single["total_logs"] == 5
+    assert partial_error_rate(merged) == 40.0
+    assert partial_busiest_hour(merged) == (10, 3)
+    assert partial_component_stats(merged).equals(partial_component_stats(single))
+    assert partial_bucket_counts(merged).equals(partial_bucket_counts(single))
+    assert len(partial_bucket_counts(merged)) == 13
+
+def test_local_workers_round_trip(tmp_path):
+    """Test worker processes write partials the coordinator can merge."""
+    paths = write_logs(tmp_path)
+    partial_paths = run_local_workers(paths, "standard", tmp_path / "partials", workers=2)
+    merged = merge_partials(read_partial(path) for path in partial_paths)
+
+    assert len(partial_paths) == 2
+    assert merged["component_counts"]["api"] == [3, 1]
+    assert merged["level_counts"] == {"INFO": 3, "ERROR": 1, "CRITICAL": 1}
+
+def test_partial_file_round_trip(tmp_path):
+    """Test partials survive being written and read back."""
+    partial = create_partial(write_logs(tmp_path))
+    write_partial(partial, tmp_path / "node.json.gz")
+
+    assert read_partial(tmp_path / "node.json.gz") == partial
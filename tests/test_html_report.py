@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from src.analysis import detect_anomalies, get_component_stats, get_error_rate
+from src.html_report import downsample, report_data_from_frame, volume_figure, write_html_report
+from src.processing import process_logs
+
+def test_downsample_keeps_extremes():
+    """Test thinning a long series keeps its spikes and stays near the point budget."""
+    values = np.zeros(100000)
+    values[12345] = 50
+    values[67890] = -20
+    series = pd.Series(values, index=pd.date_range("2023-05-01", periods=len(values), freq="min"))
+
+    points = downsample(series, 1000)
+    assert len(points) <= 1000
+    assert points.max() == 50 and points.min() == -20
+    assert points.index.is_monotonic_increasing
+
+def test_write_html_report(tmp_path):
+    """Test the report is one self-contained page with WebGL volume traces per level."""
+    df = process_logs([
+        {"timestamp": f"2023-05-01 10:{minute:02d}:00", "level": "ERROR" if minute % 5 == 0 else "INFO",
+         "component": "api", "message": "Request processed", "parsed": True}
+        for minute in range(60)
+    ])
+    data = report_data_from_frame(df, get_error_rate(df), get_component_stats(df), detect_anomalies(df))
+    assert list(data.series.columns) == ["ERROR", "INFO"] and data.series.to_numpy().sum() == 60
+
+    assert [trace.type for trace in volume_figure(data).data] == ["scattergl"] * 3
+
+    html = write_html_report(data, tmp_path).read_text(encoding="utf-8")
+    assert "<script src=" not in html and "60 log entries" in html
@@ -1,6 +1,6 @@
 import pytest
 from pathlib import Path
-from src.ingestion import LogParser, read_logs
+from src.ingestion import LogParser, read_logs, follow_logs, collapse_repeats, sample_logs, Quarantine
 
 def test_standard_log_format():
     """Test parsing standard log format."""
@@ -39,3 +39,122 @@ def test_invalid_line():
     
     assert result["parsed"] == False
     assert "raw" in result
+
+def test_follow_logs(tmp_path):
+    """Test tailing yields only complete lines appended after the start."""
+    log_file = tmp_path / "server.log"
+    log_file.write_text("2023-05-01 10:15:30 [INFO] api: Old line\n")
+    follower = follow_logs(tmp_path, poll_interval=0, continuation_wait=0)
+
+    with open(log_file, "a") as f:
+        f.write("2023-05-01 10:15:31 [ERROR] api: New line\n2023-05-01 10:15:32 [INFO] api: Partial")
+    batch = next(follower)
+
+    assert [entry["message"] for entry in batch] == ["New line"]
+    assert batch[0]["source_file"] == "server.log"
+
+def test_follow_logs_attaches_later_continuation_lines(tmp_path):
+    """Test a stack trace written after its entry, in a later poll, is still attached to it."""
+    log_file = tmp_path / "server.log"
+    log_file.write_text("")
+    quarantine = Quarantine()
+    follower = follow_logs(tmp_path, poll_interval=0, quarantine=quarantine, continuation_wait=0.2)
+
+    with open(log_file, "a") as f:
+        f.write("2023-05-01 10:15:31 [ERROR] api: Request failed\n")
+    with open(log_file, "a") as f:
+        f.write("Traceback (most recent call last):\n  File \"api.py\", line 3, in handle\nKeyError: 'id'\n")
+    batch = next(follower)
+
+    assert [entry["message"].splitlines() for entry in batch] == [[
+        "Request failed", "Traceback (most recent call last):", '  File "api.py", line 3, in handle', "KeyError: 'id'",
+    ]]
+    assert quarantine.counts == {}
+
+def test_collapse_repeats():
+    """Test repeats within the window fold into one entry and others are kept."""
+    parser = LogParser("standard")
+    lines = [
+        "2023-05-01 10:00:00 [WARNING] cache: Cache miss for key user_1",
+        "2023-05-01 10:00:00 [WARNING] cache: Cache miss for key user_1",
+        "2023-05-01 10:00:01 [WARNING] cache: Cache miss for key user_2",
+        "2023-05-01 10:00:01 [WARNING] cache: Cache miss for key user_1",
+        "2023-05-01 10:00:05 [WARNING] cache: Cache miss for key user_1",
+    ]
+    entries = list(collapse_repeats((parser.parse_line(line) for line in lines), window=2))
+
+    assert [(entry["message"][-6:], entry["repeat_count"]) for entry in entries] == [
+        ("user_1", 3), ("user_2", 1), ("user_1", 1),
+    ]
+    assert entries[0]["last_timestamp"].second == 1
+
+    templates = list(collapse_repeats((parser.parse_line(line) for line in lines), window=2, by="template"))
+    assert [entry["repeat_count"] for entry in templates] == [4, 1]
+
+def test_sample_logs(tmp_path):
+    """Test sampling modes keep the expected lines with matching weights."""
+    lines = [f"2023-05-01 10:{i // 60:02d}:{i % 60:02d} [INFO] api: Request {i} processed" for i in range(1000)]
+    lines += [f"2023-05-01 11:00:{i:02d} [ERROR] db: Query {i} failed" for i in range(20)]
+    (tmp_path / "server.log").write_text("\n".join(lines) + "\n")
+
+    hashed = list(sample_logs(tmp_path, mode="hash", rate=0.2))
+    assert hashed == list(sample_logs(tmp_path, mode="hash", rate=0.2))
+    assert 100 < len(hashed) < 320
+    assert all(entry["sample_weight"] == 5 for entry in hashed)
+
+    stratified = list(sample_logs(tmp_path, mode="stratified", rate=0.2))
+    errors = [entry for entry in stratified if entry["level"] == "ERROR"]
+    assert len(errors) == 20 and all(entry["sample_weight"] == 1 for entry in errors)
+    assert all(entry["sample_weight"] == 5 for entry in stratified if entry["level"] != "ERROR")
+
+    reservoir = list(sample_logs(tmp_path, mode="reservoir", size=100))
+    assert len(reservoir) == 100
+    assert sum(entry["sample_weight"] for entry in reservoir) == pytest.approx(1020)
+
+    # Hashing by a field keeps all or none of the entries with each value
+    for rate in (0.1, 0.3, 0.5, 0.7, 0.9):
+        assert len(list(sample_logs(tmp_path, mode="hash", rate=rate, key="component"))) in (0, 20, 1000, 1020)
+
+def test_sample_logs_keeps_stack_traces_and_quarantines(tmp_path):
+    """Test sampled error entries keep their stack traces and kept bad lines are quarantined."""
+    (tmp_path / "server.log").write_text(
+        "2023-05-01 10:00:00 [ERROR] worker: Job failed\n"
+        "Traceback (most recent call last):\n"
+        "ValueError: bad input\n"
+        "--- garbage ---\n"
+        "2023-05-01 10:00:01 [INFO] worker: Job started\n"
+    )
+    quarantine = Quarantine()
+    entries = list(sample_logs(tmp_path, mode="stratified", rate=1.0, quarantine=quarantine))
+
+    assert entries[0]["message"].splitlines() == ["Job failed", "Traceback (most recent call last):",
+                                                  "ValueError: bad input"]
+    assert [entry["sample_weight"] for entry in entries] == [1.0, 1.0]
+    assert quarantine.counts == {"server.log": 1}
+
+    reservoir = list(sample_logs(tmp_path, mode="reservoir", size=10))
+    assert reservoir[0]["message"].endswith("ValueError: bad input")
+
+def test_read_logs_assembles_multiline_and_quarantines(tmp_path):
+    """Test stack trace lines join their entry and other bad lines are quarantined."""
+    log_file = tmp_path / "worker.log"
+    log_file.write_text(
+        "not a log line\n"
+        "2023-05-01 10:00:00 [ERROR] worker: Job failed\n"
+        "Traceback (most recent call last):\n"
+        "  File \"worker.py\", line 10, in run\n"
+        "ValueError: bad input\n"
+        "--- garbage ---\n"
+        "2023-05-01 10:00:01 [INFO] worker: Job started\n"
+    )
+    quarantine = Quarantine(tmp_path / "quarantine.log")
+    entries = list(read_logs(log_file, quarantine=quarantine))
+    quarantine.close()
+
+    assert [entry["message"].splitlines()[0] for entry in entries] == ["Job failed", "Job started"]
+    assert entries[0]["message"].splitlines()[-1] == "ValueError: bad input"
+    assert all(entry["parsed"] and entry["source_file"] == "worker.log" for entry in entries)
+    assert quarantine.counts == {"worker.log": 2}
+    assert (tmp_path / "quarantine.log").read_text().splitlines() == [
+        "worker.log\tnot a log line", "worker.log\t--- garbage ---",
+    ]
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+from src.main import build_parser, main
+
+def test_import_is_light():
+    """Test importing the CLI does not load pandas, matplotlib or Flask."""
+    code = "import sys, src.main; print(sorted(m for m in ('pandas', 'matplotlib', 'flask') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
+
+def test_no_charts_run(tmp_path):
+    """Test plain options run the analyze command and --no-charts skips the charts."""
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    (log_dir / "app.log").write_text(
+        "2023-05-01 10:00:00 [INFO] api: Request processed in 120ms\n"
+        "2023-05-01 10:01:00 [ERROR] database: Query failed\n"
+    )
+    main(["--log-dir", str(log_dir), "--output-dir", str(tmp_path / "out"), "--no-charts"])
+
+    assert (tmp_path / "out" / "component_stats.csv").exists()
+    assert not list((tmp_path / "out").glob("*.png"))
+    assert build_parser().parse_args(["web", "--debug"]).web_debug
+
+def test_local_workers_run(tmp_path, capsys):
+    """Test the merged report of local workers writes its outputs and names the options it ignores."""
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    for name in ("a.log", "b.log"):
+        (log_dir / name).write_text("2023-05-01 10:00:00 [ERROR] api: Request failed\n")
+    main(["--log-dir", str(log_dir), "--output-dir", str(tmp_path / "out"), "--no-charts", "--local-workers", "2",
+          "--incidents", "--collapse-repeats", "5"])
+
+    assert (tmp_path / "out" / "component_stats.csv").exists()
+    assert "Ignoring --collapse-repeats, --incidents: not supported with --local-workers" in capsys.readouterr().out
+
+def test_sampled_run_skips_line_level_reports(tmp_path, capsys):
+    """Test a sampled run skips silences and keeps incidents when every error was kept."""
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    (log_dir / "app.log").write_text("".join(
+        f"2023-05-01 10:{minute:02d}:00 [{'ERROR' if minute % 10 == 0 else 'INFO'}] api: Request {minute}\n"
+        for minute in range(60)))
+    main(["--log-dir", str(log_dir), "--output-dir", str(tmp_path / "out"), "--no-charts",
+          "--sample", "stratified", "--sample-rate", "0.5", "--incidents"])
+    output = capsys.readouterr().out
+
+    assert "Not reported for a sample: component silences\n" in output
+    assert "--- Correlated Error Incidents ---" in output
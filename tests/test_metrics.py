@@ -0,0 +1,33 @@
+import pytest
+from src.metrics import Counter, Histogram, Metric, MetricsRegistry
+
+def test_histogram_buckets_are_cumulative():
+    """Test observations land in the first bucket whose bound they do not exceed."""
+    histogram = Histogram("latency_ms", "Latency.", (10, 100), ("component",))
+    histogram.observe([5, 10, 50, 1000, float("nan")], "api")
+    histogram.observe([20], "api")
+
+    assert histogram.samples() == [
+        'latency_ms_bucket{component="api",le="10"} 2',
+        'latency_ms_bucket{component="api",le="100"} 4',
+        'latency_ms_bucket{component="api",le="+Inf"} 5',
+        'latency_ms_sum{component="api"} 1085',
+        'latency_ms_count{component="api"} 5',
+    ]
+
+def test_registry_renders_text_format():
+    """Test metrics render with help, type and escaped label values."""
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("entries_total", "Entries.", ("component",)))
+    counter.inc(2, 'say "hi"\n')
+
+    assert registry.render() == (
+        "# HELP entries_total Entries.\n"
+        "# TYPE entries_total counter\n"
+        'entries_total{component="say \\"hi\\"\\n"} 2\n'
+    )
+
+def test_metric_without_samples_cannot_be_created():
+    """Test the metric base class requires samples()."""
+    with pytest.raises(TypeError):
+        Metric("incomplete_total", "No samples.")
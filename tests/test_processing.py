@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from src.processing import (
+    extract_metrics, enrich_data, merge_sorted_runs, process_logs, sort_by_time, append_sorted, last_timestamps,
+    time_deltas,
+)
+
+def test_extract_metrics():
+    """Test numeric fields are extracted into typed columns."""
+    df = pd.DataFrame({"message": [
+        "Query executed in 120ms",
+        "Connection pool status: 8/10 active",
+        "User user_1 logged in successfully",
+    ]})
+    result = extract_metrics(df)
+
+    assert str(result["latency_ms"].dtype) == "float32"
+    assert result["latency_ms"].iloc[0] == 120
+    assert result["pool_active"].iloc[1] == 8
+    assert result["pool_size"].iloc[1] == 10
+    assert result["latency_ms"].isna().iloc[2]
+
+def test_extract_metrics_custom_fields():
+    """Test a custom extractor configuration."""
+    df = pd.DataFrame({"message": ["Cache hit ratio: 87%", "Cache size: 100MB"]})
+    fields = {"ratio": {"pattern": r'ratio: (?P<hit_ratio>\d+)%', "dtypes": {"hit_ratio": "Int32"}}}
+    result = extract_metrics(df, fields)
+
+    assert list(result["hit_ratio"].isna()) == [False, True]
+    assert result["hit_ratio"].iloc[0] == 87
+
+def test_enrich_data():
+    """Test derived columns are added."""
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(["2023-05-01 10:00:05", "2023-05-01 10:00:00"]),
+        "level": ["ERROR", "INFO"],
+        "component": ["api", "api"],
+        "message": ["API request failed: Timeout error", "Request processed successfully in 120ms"],
+    })
+    result = enrich_data(df)
+
+    assert list(result["is_error"]) == [False, True]
+    assert list(result["time_delta"].fillna(0)) == [0, 5]
+    assert result["latency_ms"].iloc[0] == 120
+
+def test_merge_sorted_runs():
+    """Test merging runs matches a stable global sort."""
+    values = np.array([1, 4, 9, 2, 4, 8, 0, 5, 3])
+    order = merge_sorted_runs(values, np.array([0, 3, 6]))
+
+    assert list(order) == list(np.argsort(values, kind="stable"))
+
+def test_process_logs():
+    """Test the single-pass pipeline drops unparsed lines and merges files."""
+    logs = [
+        {"timestamp": datetime(2023, 5, 1, 10, 0, 0), "level": "INFO", "component": "api",
+         "message": "Query executed in 120ms", "parsed": True, "source_file": "a.log"},
+        {"timestamp": datetime(2023, 5, 1, 10, 0, 9), "level": "ERROR", "component": "db",
+         "message": "Query failed: timeout", "parsed": True, "source_file": "a.log"},
+        {"raw": "garbage", "parsed": False, "source_file": "a.log"},
+        {"timestamp": datetime(2023, 5, 1, 10, 0, 4), "level": "INFO", "component": "api",
+         "message": "Job started", "parsed": True, "source_file": "b.log"},
+    ]
+    result = process_logs(iter(logs), chunk_size=2)
+
+    assert len(result) == 3
+    assert list(result["source_file"]) == ["a.log", "b.log", "a.log"]
+    assert list(result["is_error"]) == [False, False, True]
+    assert list(result["hour"]) == [10, 10, 10]
+    assert list(result["time_delta"].fillna(-1)) == [-1, -1, 9]
+    assert result["latency_ms"].iloc[0] == 120
+
+def test_sort_by_time_interleaved():
+    """Test interleaved files are sorted without merging one run per row."""
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(["2023-05-01 10:00:00", "2023-05-01 10:00:01",
+                                     "2023-05-01 10:00:02", "2023-05-01 10:00:03"] * 2),
+        "source_file": ["a.log", "b.log"] * 4,
+    })
+
+    assert sort_by_time(df.iloc[:4]).index.tolist() == [0, 1, 2, 3]
+    result = sort_by_time(df)
+    assert result["timestamp"].is_monotonic_increasing
+    assert result.index.tolist() == [0, 4, 1, 5, 2, 6, 3, 7]
+
+def test_append_sorted_matches_full_rebuild():
+    """Test in-order and late batches give the same deltas as a full recompute."""
+    times = pd.date_range("2023-05-01 10:00", periods=12, freq="10s")
+    frame = pd.DataFrame({"timestamp": times, "source_file": ["a.log", "b.log", "c.log"] * 4})
+    df = frame.iloc[:6].copy()
+    df["time_delta"] = time_deltas(df)
+    last_seen = last_timestamps(df)
+
+    df = append_sorted(df, frame.iloc[8:].copy(), last_seen)
+    df = append_sorted(df, frame.iloc[6:8].copy(), last_seen)
+
+    expected = frame.copy()
+    expected["time_delta"] = time_deltas(expected)
+    assert df["timestamp"].tolist() == expected["timestamp"].tolist()
+    assert df["time_delta"].fillna(-1).tolist() == expected["time_delta"].fillna(-1).tolist()
+    assert last_seen["a.log"] == times[9]
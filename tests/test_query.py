@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+from src.query import Query, QueryCache, execute_query
+
+def make_logs():
+    """Build a small processed frame."""
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(["2023-05-01 10:00:00", "2023-05-01 10:20:00",
+                                     "2023-05-01 11:05:00", "2023-05-01 11:10:00"]),
+        "component": ["api", "api", "db", "api"],
+        "source_file": ["a.log", "b.log", "a.log", "a.log"],
+        "is_error": [False, True, True, False],
+        "latency_ms": [100.0, 300.0, None, 200.0],
+    })
+
+def test_execute_query_groups_and_buckets():
+    """Test grouping by a field and an hourly bucket with filters."""
+    query = Query(group_by=["component"], bucket="1h", aggregates=["count", "error_rate", "mean:latency_ms"],
+                  filters={"source_file": ["a.log"]})
+    result, total_groups = execute_query(make_logs(), query)
+
+    assert total_groups == 3
+    assert list(result["component"]) == ["api", "api", "db"]
+    assert list(result["count"]) == [1, 1, 1]
+    assert list(result["error_rate"]) == [0.0, 0.0, 100.0]
+    assert list(result["mean_latency_ms"].fillna(-1)) == [100.0, 200.0, -1]
+
+def test_execute_query_limit_and_order():
+    """Test results are ordered and limited."""
+    result, total_groups = execute_query(make_logs(), Query(group_by=["component"], order_by="-count", limit=1))
+
+    assert total_groups == 2
+    assert result.to_dict("records") == [{"component": "api", "count": 3}]
+
+def test_query_validation():
+    """Test invalid queries are rejected before running."""
+    with pytest.raises(ValueError):
+        Query(aggregates=["p99:latency_ms"])
+    with pytest.raises(ValueError):
+        Query(limit=0)
+    with pytest.raises(ValueError):
+        execute_query(make_logs(), Query(group_by=["host"]))
+
+def test_query_cache_reuses_results():
+    """Test equivalent queries on the same data version share a cached result."""
+    cache = QueryCache()
+    first = cache.execute(make_logs(), Query(filters={"component": ["db", "api"]}), "v1")
+    second = cache.execute(pd.DataFrame(), Query(filters={"component": ["api", "db"]}), "v1")
+
+    assert second is first
+
+def test_execute_query_counts_repeats():
+    """Test collapsed rows count once per line they stand for."""
+    df = make_logs().assign(repeat_count=[1, 4, 2, 1])
+    result, _ = execute_query(df, Query(group_by=["component"], aggregates=["count", "errors", "error_rate"]))
+
+    assert list(result["count"]) == [6, 2]
+    assert list(result["errors"]) == [4, 2]
+    assert result["error_rate"].iloc[0] == pytest.approx(400 / 6)
+
+def test_execute_query_weights_field_aggregates():
+    """Test field aggregates of collapsed rows equal those over the lines they stand for."""
+    df = make_logs().assign(repeat_count=[1, 4, 2, 2])
+    expanded = make_logs().loc[[0, 1, 1, 1, 1, 2, 2, 3, 3]].reset_index(drop=True)
+    query = Query(group_by=["component"], order_by="component",
+                  aggregates=["sum:latency_ms", "mean:latency_ms", "std:latency_ms", "max:latency_ms"])
+
+    pd.testing.assert_frame_equal(execute_query(df, query)[0], execute_query(expanded, query)[0],
+                                  check_dtype=False)
+    median, _ = execute_query(df, Query(group_by=["component"], aggregates=["median:latency_ms"],
+                                        order_by="component"))
+    assert median["median_latency_ms"].iloc[0] == 300.0
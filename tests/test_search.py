@@ -0,0 +1,70 @@
+import gzip
+from datetime import datetime
+
+from src.main import main
+from src.search import PatternSet, grep_logs, required_literal
+
+def test_required_literal():
+    """Test the literal extracted for the prefilter is one every match contains."""
+    assert required_literal(r"Connection reset by \w+") == "Connection reset by "
+    assert required_literal(r"disk\.full") == "disk.full"
+    assert required_literal(r"time?out") == "tim"
+    assert required_literal(r"(reset|refused) peer") == " peer"
+    assert required_literal(r"reset|refused") == ""
+    assert required_literal(r"[A-Z]+\d{3}") == ""
+
+def test_pattern_set_matches_through_prefilter():
+    """Test lines are matched by the patterns they satisfy, including patterns without a literal."""
+    patterns = PatternSet(["Timeout", r"code=5\d\d", r"^\d+$"], ignore_case=True)
+    assert patterns.match("request TIMEOUT code=503") == [0, 1]
+    assert patterns.match("12345") == [2]
+    assert patterns.match("code=404") == []
+
+def test_grep_merges_files_in_time_order(tmp_path):
+    """Test matches from plain and gzipped files are merged by time and filtered by since/until."""
+    (tmp_path / "a.log").write_text(
+        "2023-05-01 10:00:00 [ERROR] api: Timeout calling db\n"
+        "2023-05-01 10:02:00 [ERROR] api: Request failed\n"
+        "Traceback (most recent call last):\n"
+        "  TimeoutError: read timed out\n"
+        "2023-05-01 10:04:00 [INFO] api: Timeout recovered\n"
+    )
+    with gzip.open(tmp_path / "b.log.gz", "wt") as file:
+        file.write("2023-05-01 10:01:00 [ERROR] db: Timeout waiting for lock\n"
+                   "2023-05-01 10:03:00 [INFO] db: Lock acquired\n")
+
+    matches = list(grep_logs(sorted(tmp_path.iterdir()), ["Timeout"]))
+    assert [(m["source_file"], m["line_number"]) for m in matches] == [
+        ("a.log", 1), ("b.log.gz", 1), ("a.log", 4), ("a.log", 5)]
+    # The stack trace line carries the fields of its entry
+    assert matches[2]["timestamp"] == datetime(2023, 5, 1, 10, 2) and matches[2]["component"] == "api"
+
+    matches = list(grep_logs(sorted(tmp_path.iterdir()), ["Timeout"], since=datetime(2023, 5, 1, 10, 1),
+                             until=datetime(2023, 5, 1, 10, 3), workers=2))
+    assert [m["line_number"] for m in matches] == [1, 4]
+
+def test_grep_command(tmp_path, capsys):
+    """Test the grep command prints matching lines with their file and line number."""
+    (tmp_path / "app.log").write_text(
+        "2023-05-01 10:00:00 [INFO] api: Request processed\n"
+        "2023-05-01 10:01:00 [ERROR] api: Connection refused\n"
+    )
+    main(["grep", "--log-dir", str(tmp_path), "-e", "refused", "-e", "reset"])
+    assert capsys.readouterr().out == "app.log:2: 2023-05-01 10:01:00 [ERROR] api: Connection refused\n"
+
+def test_grep_since_reports_offsets_unless_counting_lines(tmp_path):
+    """Test lines after a bisected start are located by byte offset, and by line number on request."""
+    lines = [f"2023-05-01 {i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d} [INFO] api: Request {i} processed"
+             for i in range(20000)]
+    log_file = tmp_path / "a.log"
+    log_file.write_text("\n".join(lines) + "\n")
+    since = datetime(2023, 5, 1, 5)
+
+    match, = grep_logs([log_file], [r"Request 19000 "], since=since)
+    assert match["line_number"] is None
+    with open(log_file, "rb") as file:
+        file.seek(match["offset"])
+        assert file.readline().decode().rstrip("\n") == lines[19000]
+
+    match, = grep_logs([log_file], [r"Request 19000 "], since=since, line_numbers=True)
+    assert match["line_number"] == 19001
@@ -0,0 +1,64 @@
+import pytest
+from src.sketches import HyperLogLog, TopK, DDSketch, LogSketches
+
+def test_hyperloglog_estimate():
+    """Test distinct count estimate is within a few percent."""
+    sketch = HyperLogLog()
+    for i in range(20000):
+        sketch.add(f"user_{i % 5000}")
+
+    assert abs(sketch.count() - 5000) / 5000 < 0.05
+
+def test_hyperloglog_merge():
+    """Test merging sketches built over overlapping streams."""
+    left, right = HyperLogLog(), HyperLogLog()
+    for i in range(3000):
+        left.add(str(i))
+        right.add(str(i + 1500))
+    left.merge(right)
+
+    assert abs(left.count() - 4500) / 4500 < 0.05
+
+def test_top_k():
+    """Test heavy hitters are found and survive merging."""
+    left, right = TopK(k=3), TopK(k=3)
+    for i in range(1000):
+        left.add(f"ip_{i}")
+        right.add("hot" if i % 2 else f"other_{i}")
+    left.merge(right)
+
+    value, count = left.top(1)[0]
+    assert value == "hot"
+    assert count >= 500
+
+def test_top_k_keeps_frequent_candidates():
+    """Test a new value only evicts a candidate it has overtaken."""
+    top = TopK(k=2, capacity=2)
+    for value in ["a"] * 10 + ["b"] * 10 + ["c"]:
+        top.add(value)
+
+    assert sorted(top.candidates) == ["a", "b"]
+    for _ in range(11):
+        top.add("c")
+    assert "c" in top.candidates
+
+def test_ddsketch_quantiles():
+    """Test quantiles are within the relative accuracy."""
+    sketch = DDSketch(relative_accuracy=0.01)
+    for value in range(1, 1001):
+        sketch.add(value)
+
+    assert sketch.quantile(0.5) == pytest.approx(500, rel=0.02)
+    assert sketch.quantile(0.99) == pytest.approx(990, rel=0.02)
+
+def test_log_sketches_round_trip():
+    """Test field extraction and serialization of log sketches."""
+    sketches = LogSketches()
+    sketches.update({"parsed": True, "component": "api", "message": "User user_1 accessed resource profile"})
+    sketches.update({"parsed": True, "component": "api", "message": "Request processed successfully in 120ms"})
+    sketches.update({"raw": "junk", "parsed": False})
+    restored = LogSketches.from_dict(sketches.to_dict())
+
+    assert restored.distinct["user"].count() == 1
+    assert restored.latency.count == 1
+    assert restored.component_latency["api"].quantile(0.5) == pytest.approx(120, rel=0.02)
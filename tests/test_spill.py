@@ -0,0 +1,29 @@
+import pandas as pd
+
+from src.distributed import build_partial
+from src.processing import process_logs
+from src.sketches import LogSketches
+from src.spill import SpilledLogs, process_logs_within_budget
+
+def make_logs(count):
+    return [{"timestamp": f"2023-05-01 10:{i // 60 % 60:02d}:{i % 60:02d}", "level": "ERROR" if i % 7 == 0 else "INFO",
+             "component": f"service{i % 3}", "message": f"Request processed in {i % 200}ms",
+             "source_file": f"app{i % 2}.log", "parsed": True} for i in range(count)]
+
+def test_fits_in_budget_matches_process_logs():
+    """Test data under the budget is returned as the same DataFrame process_logs builds."""
+    result = process_logs_within_budget(make_logs(500), 10 ** 9, chunk_size=100)
+    pd.testing.assert_frame_equal(result, process_logs(make_logs(500)))
+
+def test_spilled_aggregates_match_in_memory(tmp_path):
+    """Test aggregates over spilled chunks and the in-memory tail match those of the whole frame."""
+    result = process_logs_within_budget(make_logs(2000), 100 * 1024, tmp_path, chunk_size=200)
+    assert isinstance(result, SpilledLogs)
+    with result:
+        assert result.spilled and result.memory <= 100 * 1024
+        assert sum(len(chunk) for chunk in result.chunks()) == 2000
+        partial = result.to_partial(LogSketches())
+    expected = build_partial(process_logs(make_logs(2000)), LogSketches())
+    for key in ("total_logs", "error_logs", "component_counts", "level_counts", "hourly_counts", "bucket_counts"):
+        assert partial[key] == expected[key]
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,194 @@
+import gzip
+import pytest
+from src.ingestion import LogParser
+from src.web import app as web_app
+from src.alerts import AlertEngine, MemorySink, SilenceRule
+
+LINES = [
+    "2023-05-01 10:00:00 [INFO] api: Request processed successfully in 120ms",
+    "2023-05-01 10:01:00 [ERROR] database: Query failed: Connection timeout",
+] * 200
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / "server.log").write_text("\n".join(LINES) + "\n")
+    web_app.load_data(tmp_path)
+    return web_app.app.test_client()
+
+def test_etag_not_modified(client):
+    """Test a matching If-None-Match is answered with 304."""
+    first = client.get("/api/component-stats")
+    second = client.get("/api/component-stats", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.data == b""
+
+def test_etag_changes_on_reload(client, tmp_path):
+    """Test reloading the data invalidates ETags."""
+    etag = client.get("/api/stats").headers["ETag"]
+    web_app.load_data(tmp_path)
+
+    assert client.get("/api/stats", headers={"If-None-Match": etag}).status_code == 200
+
+def test_etag_unique_per_load(client, tmp_path):
+    """Test ETags differ across loads even when the version counter repeats."""
+    etag = client.get("/api/stats").headers["ETag"]
+    web_app.load_data(tmp_path)
+
+    assert web_app.datasets.snapshot().version == 1
+    assert etag.startswith('W/')
+    assert client.get("/api/stats").headers["ETag"] != etag
+
+def test_gzip_response(client):
+    """Test large responses are compressed for clients that accept it."""
+    plain = client.get("/api/logs?per_page=100")
+    compressed = client.get("/api/logs?per_page=100", headers={"Accept-Encoding": "gzip"})
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.data) == plain.data
+
+def test_append_streams_filtered_entries(client):
+    """Test appended entries reach subscribers matching their filters."""
+    errors_only = web_app.broadcaster.subscribe(web_app.Filters(level="ERROR"))
+    info_only = web_app.broadcaster.subscribe(web_app.Filters(level="INFO"))
+    before = len(web_app.datasets.snapshot().df)
+    web_app.append_logs([LogParser().parse_line(
+        "2023-05-01 10:02:00 [ERROR] api: API request failed: Timeout error")])
+
+    event = errors_only.events.get_nowait()
+    assert len(web_app.datasets.snapshot().df) == before + 1
+    assert "API request failed" in event.payload(errors_only.filters)
+    assert event.payload(info_only.filters) == ""
+    web_app.broadcaster.unsubscribe(errors_only)
+    web_app.broadcaster.unsubscribe(info_only)
+
+def test_gaps_follow_appended_entries(client):
+    """Test tracked gaps after an append match a full detection."""
+    web_app.append_logs([LogParser().parse_line("2023-05-01 10:30:00 [INFO] api: Request processed")])
+    gaps = client.get("/api/gaps").get_json()["gaps"]
+    expected = web_app.detect_gaps(web_app.datasets.snapshot().df)
+
+    assert [(g["component"], g["duration_seconds"], g["ongoing"]) for g in gaps] == list(
+        zip(expected["component"], expected["duration_seconds"], expected["ongoing"]))
+    assert ("database", 1740.0, True) in [(g["component"], g["duration_seconds"], g["ongoing"]) for g in gaps]
+
+def test_append_publishes_new_snapshot(client):
+    """Test appends leave the snapshot a reader already holds unchanged."""
+    before = web_app.datasets.snapshot()
+    latency_count = before.sketches.latency.count
+    web_app.append_logs([LogParser().parse_line("2023-05-01 10:03:00 [INFO] api: Request processed in 80ms")])
+    after = web_app.datasets.snapshot()
+
+    assert len(before.df) == len(LINES)
+    assert before.sketches.latency.count == latency_count
+    assert len(after.df) == len(LINES) + 1
+    assert after.sketches.latency.count == latency_count + 1
+    assert after.version == before.version + 1
+
+def test_slow_subscriber_drops_oldest():
+    """Test a full subscriber queue drops old events instead of blocking."""
+    broadcaster = web_app.EventBroadcaster(max_pending=2)
+    subscription = broadcaster.subscribe(web_app.Filters())
+    for _ in range(5):
+        broadcaster.publish(object())
+
+    assert subscription.events.qsize() == 2
+    assert subscription.dropped == 3
+
+def test_datasets_load_lazily_and_evict(client, tmp_path):
+    """Test extra datasets load on first request and the least recently used is unloaded."""
+    for name in ("staging", "prod"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "app.log").write_text("\n".join(LINES[:20]) + "\n")
+        web_app.datasets.register(name, tmp_path / name)
+    web_app.datasets.memory_budget = web_app.datasets.get().memory + 1
+
+    try:
+        assert not {d["name"]: d["loaded"] for d in web_app.datasets.describe()}["staging"]
+        assert client.get("/api/stats?dataset=staging").get_json()["total_logs"] == 20
+        assert client.get("/api/stats?dataset=prod").get_json()["total_logs"] == 20
+        loaded = {d["name"]: d["loaded"] for d in client.get("/api/datasets").get_json()["datasets"]}
+        assert loaded == {"default": True, "staging": False, "prod": True}
+        assert client.get("/api/stats?dataset=missing").status_code == 404
+    finally:
+        web_app.datasets.memory_budget = None
+        for name in ("staging", "prod"):
+            web_app.datasets.unregister(name)
+    assert web_app.datasets.names() == ["default"]
+
+def test_query_endpoint(client):
+    """Test ad-hoc aggregation queries and their validation errors."""
+    data = client.get("/api/query?group_by=component&agg=count,error_rate&order=component").get_json()
+
+    assert data["columns"] == ["component", "count", "error_rate"]
+    assert data["rows"] == [
+        {"component": "api", "count": 200, "error_rate": 0.0},
+        {"component": "database", "count": 200, "error_rate": 100.0},
+    ]
+    assert client.get("/api/query?agg=median:message").status_code == 400
+
+def test_anomalies_for_several_thresholds(client):
+    """Test a list of thresholds is answered from one set of scores."""
+    data = client.get("/api/anomalies?thresholds=1,3&by=level").get_json()
+
+    assert set(data) == {"1.0", "3.0"}
+    assert client.get("/api/anomalies?window=1").status_code == 400
+    assert client.get("/api/anomalies?method=seasonal&bucket=7min").status_code == 400
+    assert client.get("/api/anomalies?method=seasonal&bucket=2D").status_code == 400
+
+def test_web_append_evaluates_alerts(tmp_path):
+    """Test entries appended to the dashboard data are checked against the rules."""
+    (tmp_path / "server.log").write_text("2023-05-01 10:00:00 [INFO] api: started\n")
+    web_app.load_data(tmp_path)
+    sink = MemorySink()
+    web_app.alert_engine = AlertEngine([SilenceRule("api-silent", "api", 60)], [sink])
+    try:
+        parser = LogParser()
+        web_app.append_logs([parser.parse_line("2023-05-01 10:00:30 [INFO] api: ok")])
+        web_app.append_logs([parser.parse_line("2023-05-01 10:05:00 [INFO] db: ok")])
+        response = web_app.app.test_client().get("/api/alerts")
+    finally:
+        web_app.alert_engine = None
+
+    assert [alert.rule for alert in sink.alerts] == ["api-silent"]
+    assert response.get_json()["firing"] == ["api-silent"]
+
+def test_incidents_endpoint(client):
+    """Test incidents are served with their series and rejected parameters give 400."""
+    response = client.get("/api/incidents?min_series=1")
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert "incidents" in data and "correlations" in data
+    assert client.get("/api/incidents?bucket=10s").status_code == 400
+
+def test_metrics_endpoint(tmp_path):
+    """Test /metrics counts loaded and appended entries and unparsed lines, and a reload replaces the counts."""
+    (tmp_path / "server.log").write_text("\n".join(LINES) + "\nnot a log line\n")
+    web_app.load_data(tmp_path)
+    web_app.load_data(tmp_path)
+    web_app.append_logs([LogParser().parse_line("2023-05-01 10:02:00 [ERROR] database: Query failed in 300ms")])
+    response = web_app.app.test_client().get("/metrics")
+    text = response.get_data(as_text=True)
+
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    assert 'log_entries_total{dataset="default",component="api",level="INFO"} 200' in text
+    assert 'log_errors_total{dataset="default",component="database"} 201' in text
+    assert 'log_parse_failures_total{dataset="default",source_file="server.log"} 1' in text
+    assert 'log_latency_ms_bucket{dataset="default",component="api",le="250"} 200' in text
+    assert 'log_latency_ms_count{dataset="default",component="database"} 1' in text
+    assert "# TYPE log_parse_lines_per_second gauge" in text
+
+def test_run_server_keeps_dashboard_port(tmp_path, monkeypatch):
+    """Test the dashboard is served on its own port when receivers listen on others."""
+    (tmp_path / "server.log").write_text("\n".join(LINES) + "\n")
+    runs = []
+    monkeypatch.setattr(web_app, "start_receiver_thread", lambda receiver, host, listen: {"syslog-udp": 5514})
+    monkeypatch.setattr(web_app.app, "run", lambda **kwargs: runs.append(kwargs))
+    monkeypatch.setattr(web_app, "log_metrics", web_app.LogMetrics())
+    monkeypatch.setattr(web_app, "following", False)
+
+    web_app.run_server(tmp_path, listen={"syslog-udp": 0}, port=8080)
+
+    assert runs[0]["port"] == 8080